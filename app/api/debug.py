@@ -0,0 +1,60 @@
+"""
+Debug endpoints. Disabled unless DEBUG_PROFILE_ENABLED is set, and protected
+by the X-Debug-Token header.
+"""
+
+import asyncio
+import hmac
+import time
+from typing import Optional
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.profiling import ProfilerBusyError, finish_session, start_session
+
+router = APIRouter()
+
+
+@router.post("/profile")
+async def profile(
+    requests: int = Query(20, ge=1, description="Stop after this many predictions"),
+    seconds: float = Query(10.0, gt=0, description="Stop after this many seconds"),
+    x_debug_token: Optional[str] = Header(None),
+):
+    """
+    Profile the next `requests` predictions or `seconds`, whichever comes first.
+
+    Returns:
+        Zip archive with a folded-stack CPU profile (cpu.folded), a Chrome
+        trace of the model forward (torch_trace.json) and summary.json
+    """
+    if not settings.DEBUG_PROFILE_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    # Compared as bytes: compare_digest rejects non-ASCII str with a TypeError
+    if not settings.DEBUG_PROFILE_TOKEN or not hmac.compare_digest(
+        (x_debug_token or "").encode(), settings.DEBUG_PROFILE_TOKEN.encode()
+    ):
+        raise HTTPException(status_code=403, detail="Invalid or missing X-Debug-Token")
+
+    seconds = min(seconds, settings.DEBUG_PROFILE_MAX_SECONDS)
+    try:
+        session = await run_in_threadpool(
+            start_session, requests, seconds, settings.DEBUG_PROFILE_SAMPLE_INTERVAL_MS
+        )
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    try:
+        while not session.done:
+            await asyncio.sleep(0.05)
+    finally:
+        bundle = await run_in_threadpool(finish_session, session)
+
+    filename = f"profile-{time.strftime('%Y%m%d-%H%M%S')}.zip"
+    return Response(
+        content=bundle,
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -25,9 +25,11 @@ async def health_check(request: Request):
         model_wrapper = get_model()
         model_loaded = model_wrapper.is_loaded
         device = model_wrapper.device if model_loaded else "unknown"
+        execution_mode = model_wrapper.execution_mode if model_loaded else None
     except Exception:
         model_loaded = False
         device = "unknown"
+        execution_mode = None
 
     # Calculate uptime if available
     uptime_seconds = None
@@ -43,5 +45,6 @@ async def health_check(request: Request):
         device=device,
         version=settings.APP_VERSION,
         uptime_seconds=uptime_seconds,
+        execution_mode=execution_mode,
     )
     return resp
@@ -0,0 +1,128 @@
+"""
+Bulk job API endpoints.
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, File, Form, HTTPException, Response, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.core.config import settings
+from app.core.jobs import (
+    ArchiveTooLargeError,
+    DirectoryNotAllowedError,
+    JobManager,
+    JobQueueFullError,
+    JobStateError,
+    UnknownJobError,
+    get_job_manager,
+)
+from app.schemas.response import JobListResponse, JobStatus
+
+router = APIRouter()
+
+
+def _manager() -> JobManager:
+    manager = get_job_manager()
+    if manager is None:
+        raise HTTPException(status_code=404, detail="Bulk jobs are disabled (JOBS_ENABLED)")
+    return manager
+
+
+async def _call(fn, *args):
+    """Run a job manager call off the event loop, mapping its errors to HTTP errors."""
+    try:
+        return await run_in_threadpool(fn, *args)
+    except UnknownJobError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "60"})
+    except DirectoryNotAllowedError as e:
+        raise HTTPException(status_code=403, detail=str(e))
+    except ArchiveTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except JobStateError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/jobs", response_model=JobStatus, status_code=202)
+async def submit_job(
+    file: Optional[UploadFile] = File(None),
+    path: Optional[str] = Form(None),
+):
+    """
+    Queue a bulk job.
+
+    Args:
+        file: zip or tar (optionally compressed) archive of images
+        path: Or a directory on the server under JOBS_ALLOWED_DIRS
+
+    Returns:
+        The queued job; poll GET /v1/jobs/{job_id} for progress
+    """
+    manager = _manager()
+    if (file is None) == (path is None):
+        raise HTTPException(
+            status_code=400, detail="Send either an archive `file` or a directory `path`"
+        )
+    if file is not None:
+        max_bytes = int(settings.JOBS_MAX_ARCHIVE_MB * 1024 * 1024)
+        status = await _call(
+            manager.submit_archive, file.file, file.filename or "archive", max_bytes
+        )
+    else:
+        status = await _call(manager.submit_directory, path)
+    return JobStatus(**status)
+
+
+@router.get("/jobs", response_model=JobListResponse)
+async def list_jobs():
+    """All jobs, newest first."""
+    return JobListResponse(jobs=[JobStatus(**s) for s in await _call(_manager().list_jobs)])
+
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def get_job(job_id: str):
+    """Job state and progress."""
+    return JobStatus(**await _call(_manager().status, job_id))
+
+
+@router.get("/jobs/{job_id}/results")
+async def get_job_results(job_id: str):
+    """
+    Results recorded so far as NDJSON: one object per image with `index`,
+    `item` and either `faces` (as in /v1/predict) or `error`.
+    """
+    manager = _manager()
+    status = await _call(manager.status, job_id)
+    chunks = await _call(manager.iter_results, job_id)
+    return StreamingResponse(
+        chunks,
+        media_type="application/x-ndjson",
+        headers={
+            "X-Job-State": status["state"],
+            "Content-Disposition": f'attachment; filename="{job_id}.ndjson"',
+        },
+    )
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobStatus)
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job; a running job stops after its current batch."""
+    return JobStatus(**await _call(_manager().cancel, job_id))
+
+
+@router.post("/jobs/{job_id}/resume", response_model=JobStatus)
+async def resume_job(job_id: str):
+    """Queue a cancelled or failed job again, continuing after its last recorded batch."""
+    return JobStatus(**await _call(_manager().resume, job_id))
+
+
+@router.delete("/jobs/{job_id}", status_code=204)
+async def delete_job(job_id: str):
+    """Delete a finished job and its results."""
+    await _call(_manager().delete, job_id)
+    return Response(status_code=204)
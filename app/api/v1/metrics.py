@@ -0,0 +1,57 @@
+"""
+Runtime metrics API endpoint.
+"""
+
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.admission import get_admission_controller
+from app.core.audit import get_audit_log
+from app.core.jobs import get_job_manager
+from app.core.logging import logging_stats
+from app.core.pacing import get_pacing_controller
+from app.inference.cascade import get_cascade
+from app.inference.crops import get_crop_pipeline
+from app.inference.pool import get_model_pool
+from app.schemas.response import (
+    AdmissionStats,
+    AuditStats,
+    CascadeStats,
+    CropModeStats,
+    JobsStats,
+    LoggingStats,
+    MetricsResponse,
+    ModelPoolStats,
+    PacingStats,
+)
+
+router = APIRouter()
+
+
+@router.get("/metrics", response_model=MetricsResponse)
+async def get_metrics():
+    """
+    Runtime metrics endpoint.
+
+    Returns:
+        MetricsResponse with admission controller, cascade, crop mode, model
+        pool, pacing, audit log, bulk job and log queue state
+    """
+    cascade = get_cascade()
+    crops = get_crop_pipeline()
+    pacing = get_pacing_controller()
+    audit = get_audit_log()
+    jobs = get_job_manager()
+    # Job counts read every job.json in the spool: keep that off the event loop
+    jobs_stats = await run_in_threadpool(jobs.stats) if jobs is not None else None
+    log_queue = logging_stats()
+    return MetricsResponse(
+        admission=AdmissionStats(**get_admission_controller().stats()),
+        cascade=CascadeStats(**cascade.stats()) if cascade is not None else None,
+        crops=CropModeStats(**crops.stats()) if crops is not None else None,
+        model_pool=ModelPoolStats(**get_model_pool().stats()),
+        pacing=PacingStats(**pacing.stats()) if pacing is not None else None,
+        audit=AuditStats(**audit.stats()) if audit is not None else None,
+        jobs=JobsStats(**jobs_stats) if jobs_stats is not None else None,
+        logging=LoggingStats(**log_queue) if log_queue is not None else None,
+    )
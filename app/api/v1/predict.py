@@ -2,79 +2,209 @@
 Prediction API endpoint.
 """
 
+import logging
 import time
+from typing import Optional
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, File, Header, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 
+from app.core.admission import (
+    DeadlineExceededError,
+    OverloadedError,
+    get_admission_controller,
+)
+from app.core.audit import get_audit_log
 from app.core.config import settings
+from app.core.limits import read_upload
+from app.core.pacing import get_pacing_controller
+from app.core.profiling import get_profile_session
+from app.inference.cascade import FAST_TIER, FULL_TIER, get_cascade
+from app.inference.crops import CROP_TIER, get_crop_pipeline
 from app.inference.model import get_model
+from app.inference.pool import UnknownModelError, get_model_pool
 from app.inference.postprocessor import format_detections, postprocess_results
-from app.inference.preprocessor import decode_image, preprocess_image
-from app.schemas.response import ErrorResponse, PredictionResponse
+from app.inference.preprocessor import ImageTooLargeError, decode_image, preprocess_image
+from app.schemas.response import ErrorResponse, PacingHint, PredictionResponse
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
+def _infer(preprocessed, model=None, session_id=None):
+    """Run inference, inside the profile session if one is recording."""
+    session = get_profile_session()
+    if session is not None:
+        return session.run(_run_models, preprocessed, model, session_id)
+    return _run_models(preprocessed, model, session_id)
+
+
+def _pacing_hint(decode_ms: float, inference_ms: float) -> Optional[PacingHint]:
+    """Record this frame's stage latencies and return the current pacing hint."""
+    pacing = get_pacing_controller()
+    if pacing is None:
+        return None
+    pacing.record(decode_ms, inference_ms)
+    if settings.ADMISSION_ENABLED:
+        admission = get_admission_controller()
+        pacing.maybe_update(admission.limit, admission.queue_depth)
+    else:
+        pacing.maybe_update(1, 0)
+    return PacingHint(**pacing.hint())
+
+
+def _audit(faces, latency_ms: float, tier: str, model, image_bytes: bytes) -> None:
+    """Queue the decision for the audit log; never blocks."""
+    audit = get_audit_log()
+    if audit is None:
+        return
+    if model is None:
+        if tier == CROP_TIER:
+            model = get_crop_pipeline().classifier
+        else:
+            model = get_cascade().fast if tier == FAST_TIER else get_model()
+    record = {
+        "ts": time.time(),
+        "model": model.model_path,
+        "tier": tier,
+        "app_version": settings.APP_VERSION,
+        "latency_ms": latency_ms,
+        "faces": [face.model_dump() for face in faces],
+    }
+    audit.submit(record, image_bytes)
+
+
+def _run_models(preprocessed, model=None, session_id=None):
+    """
+    Run a pooled model if given, else crop mode if enabled, else the cascade
+    if enabled, else the default model. Returns (results, tier).
+    """
+    if model is not None:
+        return model.predict(preprocessed), FULL_TIER
+    crops = get_crop_pipeline()
+    if crops is not None:
+        return crops.predict(preprocessed, session_id), CROP_TIER
+    cascade = get_cascade()
+    if cascade is not None:
+        return cascade.predict(preprocessed)
+    return get_model().predict(preprocessed), FULL_TIER
+
+
 @router.post("/predict", response_model=PredictionResponse)
-async def predict_image(file: UploadFile = File(...)):
+async def predict_image(
+    file: UploadFile = File(...),
+    x_request_deadline_ms: Optional[float] = Header(None),
+    x_model_id: Optional[str] = Header(None),
+    x_session_id: Optional[str] = Header(None),
+):
     """
     Predict if faces in image are real or fake.
 
     Args:
         file: Image file (JPEG/PNG)
+        x_request_deadline_ms: Optional client time budget in milliseconds,
+            counted from when the request reaches the handler. Requests that
+            cannot start inference within the budget are rejected with 504.
+        x_model_id: Optional pooled model (see MODEL_POOL_DIR); the default
+            model serves requests without one. Unknown IDs get 404.
+        x_session_id: Optional client session; in crop mode, frames of a
+            session reuse the previous frame's face boxes (CROP_REUSE_FRAMES)
 
     Returns:
-        PredictionResponse with detected faces
+        PredictionResponse with detected faces and a pacing hint for the
+        client's next frame
     """
     start_time = time.time()
 
+    deadline = None
+    if x_request_deadline_ms is not None:
+        if x_request_deadline_ms <= 0:
+            raise HTTPException(status_code=400, detail="X-Request-Deadline-Ms must be positive")
+        deadline = time.monotonic() + x_request_deadline_ms / 1000
+
     # Validate file type
     if not file.content_type.startswith("image/"):
         raise HTTPException(status_code=400, detail="File must be an image (JPEG/PNG)")
 
     # Read image bytes
     try:
-        image_bytes = await file.read()
-
-        # Check file size
-        if len(image_bytes) > settings.MAX_IMAGE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Image too large. Max size: {settings.MAX_IMAGE_SIZE / 1024 / 1024}MB",
-            )
+        image_bytes = await read_upload(file, settings.MAX_IMAGE_SIZE)
 
-        # Decode image
+        # Decode image (dimensions are checked from the header first)
+        decode_start = time.perf_counter()
         image = decode_image(image_bytes)
 
         # Preprocess
         preprocessed = preprocess_image(image)
-
-        # Get model
-        model_wrapper = get_model()
-
-        # Run inference
-        results = model_wrapper.predict(preprocessed)
+        decode_ms = (time.perf_counter() - decode_start) * 1000
+
+        # Pooled models load (once) before taking an admission slot
+        model = None
+        if x_model_id is not None:
+            model = await run_in_threadpool(get_model_pool().get, x_model_id)
+
+        # Run inference behind the admission controller
+        if settings.ADMISSION_ENABLED:
+            async with get_admission_controller().slot(deadline):
+                inference_start = time.perf_counter()
+                results, tier = await run_in_threadpool(
+                    _infer, preprocessed, model, x_session_id
+                )
+        else:
+            inference_start = time.perf_counter()
+            results, tier = await run_in_threadpool(_infer, preprocessed, model, x_session_id)
+        inference_ms = (time.perf_counter() - inference_start) * 1000
 
         # Post-process
         detections = postprocess_results(results)
         formatted_detections = format_detections(detections)
 
-        # Debug logging
-        import logging
-
-        logger = logging.getLogger(__name__)
-        logger.info(
-            f"Detections found: {len(detections)}, Formatted: {len(formatted_detections)}"
-        )
-        if len(detections) > 0:
-            logger.info(f"First detection: {detections[0]}")
+        logger.debug("Detections found: %d (tier %s): %s", len(detections), tier, detections)
 
         # Calculate latency
         latency_ms = (time.time() - start_time) * 1000
 
-        return PredictionResponse(faces=formatted_detections, latency_ms=latency_ms)
+        # Hand the decision to the audit writer thread (image hashing happens there)
+        _audit(formatted_detections, latency_ms, tier, model, image_bytes)
+
+        return PredictionResponse(
+            faces=formatted_detections,
+            latency_ms=latency_ms,
+            tier=tier,
+            model_id=x_model_id,
+            pacing=_pacing_hint(decode_ms, inference_ms),
+        )
 
+    except HTTPException:
+        raise
+    except OverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except DeadlineExceededError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except UnknownModelError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.post("/models/{model_id}/predict", response_model=PredictionResponse)
+async def predict_image_with_model(
+    model_id: str,
+    file: UploadFile = File(...),
+    x_request_deadline_ms: Optional[float] = Header(None),
+    x_session_id: Optional[str] = Header(None),
+):
+    """
+    Predict with the pooled model `model_id`; same as /predict with X-Model-Id.
+    """
+    return await predict_image(
+        file=file,
+        x_request_deadline_ms=x_request_deadline_ms,
+        x_model_id=model_id,
+        x_session_id=x_session_id,
+    )
@@ -0,0 +1,233 @@
+"""
+Adaptive admission control for the inference path.
+
+The controller bounds how many requests may run the model concurrently and
+adjusts that bound from observed inference latency (AIMD: additive increase
+while latency is under target, multiplicative decrease when it is over).
+Requests carry an optional deadline; anything that would still be queued when
+its deadline passes is dropped before it reaches the model.
+"""
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Deque, Optional
+
+from app.core.config import settings
+
+
+class AdmissionRejected(Exception):
+    """Base class for requests refused by the admission controller."""
+
+
+class OverloadedError(AdmissionRejected):
+    """Raised when the wait queue is full and the request is shed."""
+
+
+class DeadlineExceededError(AdmissionRejected):
+    """Raised when a request's deadline passes before it reaches the model."""
+
+
+@dataclass
+class _Waiter:
+    future: asyncio.Future
+    deadline: Optional[float]
+
+
+class AdmissionController:
+    """AIMD concurrency limiter with deadline-aware queueing.
+
+    All methods must be called from the event loop thread; the controller
+    itself does no locking.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 4,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        target_latency_ms: float = 250.0,
+        max_queue: int = 64,
+        backoff: float = 0.9,
+        ewma_alpha: float = 0.2,
+    ):
+        self._limit = float(initial_limit)
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._target_latency_ms = target_latency_ms
+        self._max_queue = max_queue
+        self._backoff = backoff
+        self._alpha = ewma_alpha
+
+        self._in_flight = 0
+        self._waiters: Deque[_Waiter] = deque()
+        self._latency_ewma_ms: Optional[float] = None
+
+        self.admitted_count = 0
+        self.shed_count = 0
+        self.expired_count = 0
+
+    @property
+    def limit(self) -> int:
+        """Current integer concurrency limit."""
+        return max(self._min_limit, int(self._limit))
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently holding a slot."""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a slot."""
+        return len(self._waiters)
+
+    @property
+    def latency_ewma_ms(self) -> Optional[float]:
+        """Smoothed inference latency in milliseconds."""
+        return self._latency_ewma_ms
+
+    def estimated_wait_s(self) -> float:
+        """Estimate how long a newly queued request would wait for a slot."""
+        if self._latency_ewma_ms is None or self._in_flight < self.limit:
+            return 0.0
+        batches_ahead = (len(self._waiters) + 1) / self.limit
+        return batches_ahead * self._latency_ewma_ms / 1000.0
+
+    async def acquire(self, deadline: Optional[float] = None) -> None:
+        """
+        Wait for an inference slot.
+
+        Args:
+            deadline: Absolute `time.monotonic()` deadline, or None
+
+        Raises:
+            DeadlineExceededError: If the deadline passes (or would pass) before
+                a slot becomes available
+            OverloadedError: If the wait queue is full
+        """
+        now = time.monotonic()
+        if deadline is not None and deadline - now <= self.estimated_wait_s():
+            self.expired_count += 1
+            raise DeadlineExceededError("Deadline would pass before inference starts")
+
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            self.admitted_count += 1
+            return
+
+        if len(self._waiters) >= self._max_queue:
+            self.shed_count += 1
+            raise OverloadedError("Server overloaded, request shed")
+
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), deadline)
+        self._waiters.append(waiter)
+        timeout = None if deadline is None else max(0.0, deadline - now)
+
+        try:
+            await asyncio.wait({waiter.future}, timeout=timeout)
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.exception():
+                # Slot was handed over just as the client went away.
+                self._release_slot()
+            else:
+                self._discard(waiter)
+            raise
+
+        if not waiter.future.done():
+            self._discard(waiter)
+            self.expired_count += 1
+            raise DeadlineExceededError("Deadline exceeded while queued")
+
+        # Propagates DeadlineExceededError if the waiter was expired on wake-up.
+        waiter.future.result()
+        self.admitted_count += 1
+
+    def release(self, latency_ms: Optional[float] = None) -> None:
+        """
+        Return a slot and feed the observed latency into the limit.
+
+        Args:
+            latency_ms: Inference latency of the finished request, if it ran
+        """
+        if latency_ms is not None:
+            self._observe(latency_ms)
+        self._release_slot()
+
+    @asynccontextmanager
+    async def slot(self, deadline: Optional[float] = None):
+        """Context manager that holds a slot and records its latency."""
+        await self.acquire(deadline)
+        start = time.perf_counter()
+        latency_ms = None
+        try:
+            yield
+            latency_ms = (time.perf_counter() - start) * 1000
+        finally:
+            self.release(latency_ms)
+
+    def _observe(self, latency_ms: float) -> None:
+        if self._latency_ewma_ms is None:
+            self._latency_ewma_ms = latency_ms
+        else:
+            self._latency_ewma_ms += self._alpha * (latency_ms - self._latency_ewma_ms)
+
+        if latency_ms > self._target_latency_ms:
+            self._limit = max(float(self._min_limit), self._limit * self._backoff)
+        elif self._in_flight >= self.limit / 2:
+            # Only grow while the current limit is actually being used.
+            self._limit = min(float(self._max_limit), self._limit + 1.0 / self._limit)
+
+    def _release_slot(self) -> None:
+        self._in_flight -= 1
+        now = time.monotonic()
+        while self._waiters and self._in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if waiter.future.done():
+                continue
+            if waiter.deadline is not None and waiter.deadline <= now:
+                self.expired_count += 1
+                waiter.future.set_exception(
+                    DeadlineExceededError("Deadline exceeded while queued")
+                )
+                continue
+            self._in_flight += 1
+            waiter.future.set_result(None)
+
+    def _discard(self, waiter: _Waiter) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def stats(self) -> dict:
+        """Snapshot of controller state for the metrics endpoint."""
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "latency_ewma_ms": self._latency_ewma_ms,
+            "admitted_count": self.admitted_count,
+            "shed_count": self.shed_count,
+            "expired_count": self.expired_count,
+        }
+
+
+# Global controller instance
+_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller() -> AdmissionController:
+    """Get the global admission controller."""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController(
+            initial_limit=settings.ADMISSION_INITIAL_LIMIT,
+            min_limit=settings.ADMISSION_MIN_LIMIT,
+            max_limit=settings.ADMISSION_MAX_LIMIT,
+            target_latency_ms=settings.ADMISSION_TARGET_LATENCY_MS,
+            max_queue=settings.ADMISSION_MAX_QUEUE,
+        )
+    return _controller
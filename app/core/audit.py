@@ -0,0 +1,348 @@
+"""
+Audit log of prediction decisions, written off the request path.
+
+`AuditLog.submit` appends a record to a bounded in-memory queue and returns
+immediately. A background thread takes records off the queue in batches
+(every `AUDIT_FLUSH_INTERVAL_S`, or sooner once `AUDIT_BATCH_SIZE` are
+waiting), computes image hashes if enabled, and appends the batch to the
+sink. A slow or stalled disk only grows the queue; when the queue is full,
+records are dropped according to the drop policy and counted, and the
+request is never blocked.
+
+Sinks are append-only:
+
+- `JsonlSink`: one JSON object per line, rotated by size to `<path>.1`,
+  `<path>.2`, ...
+- `SqliteSink`: a `predictions` table in a WAL-mode SQLite database, one
+  transaction per batch
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Deque, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+DROP_POLICIES = (DROP_NEWEST, DROP_OLDEST)
+
+
+class JsonlSink:
+    """Appends records to a size-rotated JSON Lines file."""
+
+    def __init__(
+        self, path: str, max_bytes: int = 100 * 2**20, backup_count: int = 10, fsync: bool = False
+    ):
+        """
+        Args:
+            path: Current log file
+            max_bytes: Rotate once the file would grow past this; 0 disables rotation
+            backup_count: Rotated files to keep
+            fsync: fsync after every batch
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.fsync = fsync
+        self._file = None
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "ab")
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{i}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def write(self, records: List[dict]) -> None:
+        if self._file is None:
+            self._open()
+        data = b"".join(json.dumps(r, separators=(",", ":")).encode() + b"\n" for r in records)
+        if self.max_bytes and self._file.tell() and self._file.tell() + len(data) > self.max_bytes:
+            self._rotate()
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class SqliteSink:
+    """Appends records to a WAL-mode SQLite database."""
+
+    def __init__(self, path: str, fsync: bool = False):
+        """
+        Args:
+            path: Database file
+            fsync: Sync the WAL on every commit (synchronous=FULL instead of NORMAL)
+        """
+        self.path = path
+        self.fsync = fsync
+        self._db: Optional[sqlite3.Connection] = None
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Opened by the writer thread, which is the only one to use it
+        self._db = sqlite3.connect(self.path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(f"PRAGMA synchronous={'FULL' if self.fsync else 'NORMAL'}")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS predictions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ts REAL NOT NULL,
+                model TEXT,
+                tier TEXT,
+                app_version TEXT,
+                latency_ms REAL,
+                face_count INTEGER NOT NULL,
+                faces TEXT NOT NULL,
+                image_sha256 TEXT
+            )
+            """
+        )
+        self._db.commit()
+
+    def write(self, records: List[dict]) -> None:
+        if self._db is None:
+            self._open()
+        rows = [
+            (
+                r["ts"],
+                r.get("model"),
+                r.get("tier"),
+                r.get("app_version"),
+                r.get("latency_ms"),
+                len(r["faces"]),
+                json.dumps(r["faces"], separators=(",", ":")),
+                r.get("image_sha256"),
+            )
+            for r in records
+        ]
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO predictions (ts, model, tier, app_version, latency_ms, face_count, "
+                "faces, image_sha256) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class AuditLog:
+    """Bounded queue of audit records drained by a background writer thread."""
+
+    def __init__(
+        self,
+        sink,
+        max_queue: int = 10000,
+        flush_interval_s: float = 1.0,
+        batch_size: int = 500,
+        drop_policy: str = DROP_NEWEST,
+        hash_images: bool = False,
+        max_pending_image_bytes: int = 256 * 2**20,
+    ):
+        """
+        Args:
+            sink: JsonlSink, SqliteSink or anything with write(records) and close()
+            max_queue: Records held in memory before the drop policy applies
+            flush_interval_s: Longest time a record waits before being written
+            batch_size: Write as soon as this many records are waiting
+            drop_policy: "drop_newest" refuses new records when full,
+                "drop_oldest" discards the oldest queued record instead
+            hash_images: Store the SHA-256 of each uploaded image
+            max_pending_image_bytes: Image bytes held for hashing; records
+                beyond this are logged without a hash
+        """
+        if drop_policy not in DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy {drop_policy!r}, expected {DROP_POLICIES}")
+        self.sink = sink
+        self.max_queue = max_queue
+        self.flush_interval_s = flush_interval_s
+        self.batch_size = batch_size
+        self.drop_policy = drop_policy
+        self.hash_images = hash_images
+        self.max_pending_image_bytes = max_pending_image_bytes
+
+        self._queue: Deque[tuple] = deque()
+        self._pending_image_bytes = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+        self.submitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.unhashed = 0
+        self.write_errors = 0
+        self.batches = 0
+        self.last_write_ms: Optional[float] = None
+
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, record: dict, image_bytes: Optional[bytes] = None) -> bool:
+        """
+        Queue a record without blocking.
+
+        Args:
+            record: JSON-serialisable decision record
+            image_bytes: Uploaded image, hashed by the writer if hashing is enabled
+
+        Returns:
+            False if the record was dropped
+        """
+        with self._cond:
+            if self._closed:
+                return False
+            self.submitted += 1
+            if len(self._queue) >= self.max_queue:
+                self.dropped += 1
+                if self.drop_policy == DROP_NEWEST:
+                    return False
+                _, old_image = self._queue.popleft()
+                if old_image is not None:
+                    self._pending_image_bytes -= len(old_image)
+
+            if not self.hash_images:
+                image_bytes = None
+            elif image_bytes is not None:
+                if self._pending_image_bytes + len(image_bytes) > self.max_pending_image_bytes:
+                    self.unhashed += 1
+                    image_bytes = None
+                else:
+                    self._pending_image_bytes += len(image_bytes)
+
+            self._queue.append((record, image_bytes))
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def _take_batch(self) -> List[tuple]:
+        with self._cond:
+            deadline = time.monotonic() + self.flush_interval_s
+            while len(self._queue) < self.batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            self._pending_image_bytes -= sum(len(i) for _, i in batch if i is not None)
+            return batch
+
+    def _write(self, batch: List[tuple]) -> None:
+        records = []
+        for record, image_bytes in batch:
+            if image_bytes is not None:
+                record["image_sha256"] = hashlib.sha256(image_bytes).hexdigest()
+            records.append(record)
+        start = time.perf_counter()
+        try:
+            self.sink.write(records)
+        except Exception:
+            self.write_errors += 1
+            logger.exception("Audit write of %d records failed", len(records))
+            return
+        self.last_write_ms = (time.perf_counter() - start) * 1000
+        self.written += len(records)
+        self.batches += 1
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch:
+                self._write(batch)
+            elif self._closed:
+                break
+        self.sink.close()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._queue)
+
+    def close(self, timeout: float = 10.0) -> None:
+        """Write everything still queued and close the sink."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("Audit writer did not finish; %d records not written", self.queue_depth)
+
+    def stats(self) -> dict:
+        """Snapshot of queue and writer counters for the metrics endpoint."""
+        return {
+            "queue_depth": self.queue_depth,
+            "submitted": self.submitted,
+            "written": self.written,
+            "dropped": self.dropped,
+            "unhashed": self.unhashed,
+            "write_errors": self.write_errors,
+            "batches": self.batches,
+            "last_write_ms": self.last_write_ms,
+        }
+
+
+def build_sink():
+    """The sink configured by AUDIT_BACKEND."""
+    if settings.AUDIT_BACKEND == "jsonl":
+        return JsonlSink(
+            settings.AUDIT_PATH,
+            max_bytes=int(settings.AUDIT_MAX_FILE_MB * 2**20),
+            backup_count=settings.AUDIT_BACKUP_COUNT,
+            fsync=settings.AUDIT_FSYNC,
+        )
+    if settings.AUDIT_BACKEND == "sqlite":
+        return SqliteSink(settings.AUDIT_PATH, fsync=settings.AUDIT_FSYNC)
+    raise ValueError(f"Unknown AUDIT_BACKEND {settings.AUDIT_BACKEND!r}, expected jsonl or sqlite")
+
+
+# Global audit log instance
+_audit_log: Optional[AuditLog] = None
+
+
+def get_audit_log() -> Optional[AuditLog]:
+    """Get the global audit log, or None when AUDIT_ENABLED is off."""
+    global _audit_log
+    if _audit_log is None and settings.AUDIT_ENABLED:
+        _audit_log = AuditLog(
+            build_sink(),
+            max_queue=settings.AUDIT_QUEUE_SIZE,
+            flush_interval_s=settings.AUDIT_FLUSH_INTERVAL_S,
+            batch_size=settings.AUDIT_BATCH_SIZE,
+            drop_policy=settings.AUDIT_DROP_POLICY,
+            hash_images=settings.AUDIT_HASH_IMAGES,
+            max_pending_image_bytes=int(settings.AUDIT_HASH_MAX_PENDING_MB * 2**20),
+        )
+    return _audit_log
+
+
+def close_audit_log() -> None:
+    """Flush and close the global audit log, if open."""
+    global _audit_log
+    if _audit_log is not None:
+        _audit_log.close()
+        _audit_log = None
@@ -16,11 +16,25 @@ class Settings(BaseSettings):
     # Lower threshold to catch more detections (including screen-based spoofs)
     CONFIDENCE_THRESHOLD: float = 0.70
     DEVICE: str = "auto"  # auto, cpu, cuda
+    # Inference size; defaults to the size the checkpoint was trained at (640 if unknown)
+    MODEL_IMGSZ: Optional[int] = None
+    # Written by training/export_models.py; serve its selected artifact if it matches MODEL_PATH
+    MODEL_MANIFEST_PATH: str = "model/export_manifest.json"
+    # Compiled PyTorch path: off, trace (TorchScript, cached on disk) or compile (torch.compile)
+    MODEL_COMPILE: str = "off"
+    MODEL_COMPILE_CACHE_DIR: str = "cache/compiled"
+    # Frame sizes (WxH, comma separated) to compile for at startup; others compile on first use
+    MODEL_COMPILE_FRAME_SIZES: str = "640x480"
 
     # API Configuration
     API_PORT: int = 8000
     API_HOST: str = "0.0.0.0"
     LOG_LEVEL: str = "info"  # debug, info, warning, error
+    LOG_FORMAT: str = "json"  # json, text
+    LOG_QUEUE_SIZE: int = 10000  # records beyond this are dropped, never block
+    # Hot-path loggers: "<logger prefix>=<records/s>,..." and keep 1 in N of their records
+    LOG_RATE_LIMITS: str = "app.inference=20,app.api.v1.predict=20"
+    LOG_SAMPLE_EVERY: int = 1
 
     # CORS Configuration
     # NOTE: keep as simple strings; parse in app startup if you want comma-separated support.
@@ -31,9 +45,126 @@ class Settings(BaseSettings):
 
     # Inference Configuration
     MAX_IMAGE_SIZE: int = 10 * 1024 * 1024  # 10MB
+    # Checked from the image header before decoding
+    MAX_IMAGE_DIMENSION: int = 8192
+    MAX_IMAGE_PIXELS: int = 4096 * 4096
     IMAGE_WIDTH: int = 640
     IMAGE_HEIGHT: int = 480
 
+    # Admission Control
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_INITIAL_LIMIT: int = 4
+    ADMISSION_MIN_LIMIT: int = 1
+    ADMISSION_MAX_LIMIT: int = 32
+    ADMISSION_TARGET_LATENCY_MS: float = 250.0
+    ADMISSION_MAX_QUEUE: int = 64
+
+    # Client Pacing (hints in prediction responses)
+    PACING_ENABLED: bool = True
+    # Keep the busiest stage (decode or inference) this busy
+    PACING_TARGET_UTILIZATION: float = 0.7
+    PACING_MIN_INTERVAL_MS: float = 100.0
+    PACING_MAX_INTERVAL_MS: float = 2000.0
+    PACING_INITIAL_INTERVAL_MS: float = 333.0
+    PACING_UPDATE_INTERVAL_S: float = 1.0
+    # Upload size and JPEG quality levels, best first: "<w>x<h>@<quality>,..."
+    PACING_LEVELS: str = "640x480@90,480x360@80,320x240@70"
+
+    # Audit Log (opt-in record of every prediction, written by a background thread)
+    AUDIT_ENABLED: bool = False
+    AUDIT_BACKEND: str = "jsonl"  # jsonl (size-rotated files) or sqlite (WAL mode)
+    AUDIT_PATH: str = "logs/audit.jsonl"
+    AUDIT_QUEUE_SIZE: int = 10000
+    AUDIT_DROP_POLICY: str = "drop_newest"  # drop_newest, drop_oldest (when the queue is full)
+    AUDIT_FLUSH_INTERVAL_S: float = 1.0
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_MAX_FILE_MB: float = 100.0  # jsonl rotation size
+    AUDIT_BACKUP_COUNT: int = 10
+    AUDIT_FSYNC: bool = False
+    # SHA-256 of each upload; images wait in memory (up to the cap) until hashed
+    AUDIT_HASH_IMAGES: bool = False
+    AUDIT_HASH_MAX_PENDING_MB: float = 256.0
+
+    # Runtime Threading
+    # Explicit values override both the tuned config and the default core split.
+    TORCH_NUM_THREADS: Optional[int] = None
+    TORCH_INTEROP_THREADS: Optional[int] = None
+    CV2_NUM_THREADS: Optional[int] = None
+    WEB_CONCURRENCY: int = 1  # uvicorn worker count; cores are split between workers
+
+    # Startup Auto-tuning (opt-in)
+    AUTOTUNE_ENABLED: bool = False
+    AUTOTUNE_OBJECTIVE: str = "throughput"  # throughput, latency
+    AUTOTUNE_TARGET_LATENCY_MS: Optional[float] = None
+    AUTOTUNE_DURATION_S: float = 3.0
+    AUTOTUNE_CACHE_PATH: str = "cache/autotune.json"
+
+    # Model Pool (per-site models chosen with X-Model-Id or /v1/models/{id}/predict)
+    MODEL_POOL_DIR: str = "model/sites"  # <id>.pt, <id>.onnx, ... per model
+    MODEL_POOL_MEMORY_MB: float = 2048.0
+    MODEL_POOL_IDLE_TTL_S: Optional[float] = 900.0
+
+    # Confidence Cascade (opt-in)
+    # A fast model decides confident frames; uncertain or faceless ones go to MODEL_PATH
+    CASCADE_ENABLED: bool = False
+    CASCADE_FAST_MODEL_PATH: str = "model/anti_spoofing_fast.pt"
+    CASCADE_FAST_IMGSZ: Optional[int] = 320
+    CASCADE_UNCERTAIN_LOW: float = 0.4
+    CASCADE_UNCERTAIN_HIGH: float = 0.8
+
+    # Crop Mode (opt-in): a cheap localiser finds faces, a small classifier labels each crop
+    CROP_MODE_ENABLED: bool = False
+    CROP_CLASSIFIER_PATH: str = "model/anti_spoofing_crops.pt"
+    CROP_CLASSIFIER_IMGSZ: Optional[int] = None  # defaults to the size it was trained at
+    CROP_MARGIN: float = 1.3  # crop side / longer face box side
+    CROP_LOCALISER: str = "detector"  # detector (boxes only, small input) or haar (OpenCV 4.x)
+    CROP_LOCALISER_MODEL_PATH: Optional[str] = None  # defaults to MODEL_PATH
+    CROP_LOCALISER_IMGSZ: int = 256
+    CROP_LOCALISER_CONF: float = 0.25
+    CROP_LOCALISER_WIDTH: int = 320  # haar: frames are downscaled to this width
+    CROP_HAAR_BOX_SCALE: float = 1.25  # haar boxes are tighter than the training labels
+    # Frames per X-Session-Id that reuse the last localised boxes (0 = localise every frame)
+    CROP_REUSE_FRAMES: int = 2
+
+    # Bulk Jobs (opt-in POST /v1/jobs over archives or server-local directories)
+    JOBS_ENABLED: bool = False
+    JOBS_DIR: str = "jobs"  # spool: state, item list and NDJSON results per job
+    # Directories jobs may read (comma separated); empty allows archive uploads only
+    JOBS_ALLOWED_DIRS: str = ""
+    JOBS_WORKERS: int = 1  # jobs run concurrently
+    JOBS_BATCH_SIZE: int = 32  # images per forward pass
+    JOBS_DECODE_THREADS: int = 2
+    JOBS_MAX_QUEUED: int = 100  # further submissions get 503
+    JOBS_MAX_ARCHIVE_MB: float = 2048.0
+    JOBS_MAX_IMAGES: int = 500000
+    JOBS_NICE: int = 10  # added to the OS nice value of job threads (Linux)
+    # Before each batch, wait up to this long while interactive requests are in flight
+    JOBS_MAX_YIELD_MS: float = 2000.0
+    # Idle workers check JOBS_DIR this often for jobs queued by other processes
+    JOBS_POLL_INTERVAL_S: float = 1.0
+
+    # Debug Profiling (POST /debug/profile; needs a non-empty token)
+    DEBUG_PROFILE_ENABLED: bool = False
+    DEBUG_PROFILE_TOKEN: str = ""
+    DEBUG_PROFILE_MAX_SECONDS: float = 60.0
+    DEBUG_PROFILE_SAMPLE_INTERVAL_MS: float = 5.0
+
+    # Sticky Session Router (python -m app.router.main, in front of app.main workers)
+    ROUTER_HOST: str = "0.0.0.0"
+    ROUTER_PORT: int = 8080
+    ROUTER_WORKERS: int = 2  # local workers to spawn
+    ROUTER_WORKER_BASE_PORT: int = 8101  # spawned workers listen on consecutive ports
+    ROUTER_WORKER_URLS: str = ""  # comma separated, workers started elsewhere
+    ROUTER_SESSION_HEADER: str = "X-Session-Id"
+    ROUTER_SESSION_TTL_S: float = 300.0  # idle sessions are unpinned after this
+    ROUTER_VNODES: int = 64  # hash ring points per worker
+    ROUTER_HEALTH_INTERVAL_S: float = 2.0
+    ROUTER_UNHEALTHY_AFTER: int = 3  # failed health checks before a worker is taken out
+    ROUTER_STARTUP_TIMEOUT_S: float = 120.0
+    # Proxied request timeout; /v1/jobs and /debug/ only time out while connecting
+    ROUTER_TIMEOUT_S: float = 60.0
+    ROUTER_ADMIN_TOKEN: str = ""  # needed to add or drain workers
+
     # Application Metadata
     APP_NAME: str = "Anti-Spoofing Detection API"
     APP_VERSION: str = "1.0.0"
@@ -0,0 +1,802 @@
+"""
+Asynchronous bulk jobs over stored images (POST /v1/jobs).
+
+A job is a zip/tar archive uploaded with the request, or a directory on the
+server under one of `JOBS_ALLOWED_DIRS`. Submission lists the images once
+and returns a job ID; a pool of `JOBS_WORKERS` background threads then runs
+queued jobs in `JOBS_BATCH_SIZE` forward passes of the default model.
+
+Each job is spooled under `JOBS_DIR/<job id>/`:
+
+- `job.json`: state and progress, replaced atomically after every batch
+- `items.json`: the image names, in processing order
+- `input.archive`: the uploaded archive, if any
+- `results.ndjson`: one JSON object per image, appended per batch
+
+Progress is only recorded once a batch's results are on disk, so after a
+restart (or `resume` of a cancelled or failed job) results are truncated to
+the last recorded batch and the job continues from there.
+
+All worker processes may share `JOBS_DIR`. A process runs a job only while
+it holds an exclusive lock on the job's `.lock` file. The OS drops the lock
+if the process dies, so a job stopped that way is taken over by another
+process. Status, cancel and resume go through the spool, so any worker can
+answer for any job.
+
+Jobs run behind interactive traffic: their threads run at a raised OS nice
+value (Linux), and before each batch they wait, for up to
+`JOBS_MAX_YIELD_MS`, while interactive requests hold or wait for an
+admission slot.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.inference.postprocessor import format_detections, postprocess_results
+from app.inference.preprocessor import decode_image, preprocess_image
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATES = (QUEUED, RUNNING)
+ALL_STATES = (QUEUED, RUNNING, COMPLETED, FAILED, CANCELLED)
+
+DIRECTORY = "directory"
+ARCHIVE = "archive"
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+COPY_CHUNK_SIZE = 1024 * 1024
+JOB_ID = re.compile(r"[0-9a-f]{32}")
+# How often a job waiting on interactive traffic checks again
+YIELD_POLL_S = 0.02
+
+
+class JobError(ValueError):
+    """Raised for a job submission or action that cannot be accepted."""
+
+
+class DirectoryNotAllowedError(JobError):
+    """Raised for a directory outside JOBS_ALLOWED_DIRS."""
+
+
+class ArchiveTooLargeError(JobError):
+    """Raised when an uploaded archive exceeds JOBS_MAX_ARCHIVE_MB."""
+
+
+class JobStateError(JobError):
+    """Raised for an action the job's current state does not allow."""
+
+
+class JobQueueFullError(Exception):
+    """Raised when JOBS_MAX_QUEUED jobs are already waiting."""
+
+
+class UnknownJobError(KeyError):
+    """Raised for a job ID with no spooled job."""
+
+
+@dataclass
+class Job:
+    """A bulk job's state, persisted as `job.json`."""
+
+    job_id: str
+    source: str  # "directory" or "archive"
+    name: str  # directory path or uploaded file name
+    path: str  # directory path or spooled archive
+    total: int
+    state: str = QUEUED
+    processed: int = 0
+    failed: int = 0
+    faces: int = 0
+    # Size of results.ndjson covering the first `processed` images
+    results_bytes: int = 0
+    # Time spent processing batches, across resumes
+    busy_s: float = 0.0
+    created_at: float = 0.0
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+    def status(self) -> dict:
+        """State and progress for the API."""
+        status = asdict(self)
+        status["progress"] = self.processed / self.total if self.total else 1.0
+        status["images_per_s"] = self.processed / self.busy_s if self.busy_s else None
+        return status
+
+
+def _is_image(name: str) -> bool:
+    return name.lower().endswith(IMAGE_EXTENSIONS)
+
+
+def _read_limited(stream, size: int, max_bytes: int) -> bytes:
+    """Read one image, refusing anything over `max_bytes` (declared or actual)."""
+    if size > max_bytes:
+        raise ValueError(f"Image is {size} bytes, max {max_bytes}")
+    data = stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f"Image is over {max_bytes} bytes")
+    return data
+
+
+def resolve_directory(path: str, allowed_dirs: Sequence[str]) -> str:
+    """
+    Resolve a submitted directory, which must lie under one of `allowed_dirs`.
+
+    Raises:
+        DirectoryNotAllowedError: If it is outside every allowed directory
+        JobError: If it is not a directory
+    """
+    real = os.path.realpath(path)
+    for allowed in allowed_dirs:
+        root = os.path.realpath(allowed)
+        if os.path.commonpath([real, root]) == root:
+            break
+    else:
+        raise DirectoryNotAllowedError(f"{path} is not under JOBS_ALLOWED_DIRS")
+    if not os.path.isdir(real):
+        raise JobError(f"{path} is not a directory")
+    return real
+
+
+def list_directory(root: str) -> List[str]:
+    """Images under `root`, recursively, as sorted relative paths (none outside `root`)."""
+    items = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if not _is_image(filename):
+                continue
+            path = os.path.join(dirpath, filename)
+            # Symlinked files must not lead out of the submitted directory
+            if os.path.commonpath([os.path.realpath(path), root]) != root:
+                continue
+            items.append(os.path.relpath(path, root))
+    return items
+
+
+def _archive_members(archive) -> Iterator[Tuple[str, int, Callable]]:
+    """(name, declared size, opener) for each image member, in archive order."""
+    if isinstance(archive, zipfile.ZipFile):
+        for info in archive.infolist():
+            if not info.is_dir() and _is_image(info.filename):
+                yield info.filename, info.file_size, lambda info=info: archive.open(info)
+    else:
+        for member in archive:
+            if member.isfile() and _is_image(member.name):
+                yield member.name, member.size, lambda m=member: archive.extractfile(m)
+
+
+def _open_archive(path: str):
+    if zipfile.is_zipfile(path):
+        return zipfile.ZipFile(path)
+    # Stream mode: members are read in order, compressed tars are never re-scanned
+    return tarfile.open(path, "r|*")
+
+
+def list_archive(path: str) -> List[str]:
+    """
+    Image members of a zip or tar (optionally compressed) archive, in order.
+
+    Raises:
+        JobError: If the file is not a readable zip or tar archive
+    """
+    try:
+        with _open_archive(path) as archive:
+            return [name for name, _, _ in _archive_members(archive)]
+    except (tarfile.TarError, zipfile.BadZipFile, EOFError, OSError) as e:
+        raise JobError(f"Not a readable zip or tar archive: {e}")
+
+
+def read_items(job: Job, items: List[str], max_bytes: int) -> Iterator[Tuple[str, object]]:
+    """
+    Yield (name, image bytes or the exception reading it) from item `job.processed` on.
+    """
+    if job.source == DIRECTORY:
+        for name in items[job.processed :]:
+            path = os.path.join(job.path, name)
+            try:
+                with open(path, "rb") as f:
+                    yield name, _read_limited(f, os.fstat(f.fileno()).st_size, max_bytes)
+            except (OSError, ValueError) as e:
+                yield name, e
+        return
+
+    with _open_archive(job.path) as archive:
+        for name, size, opener in islice(_archive_members(archive), job.processed, None):
+            try:
+                with opener() as f:
+                    yield name, _read_limited(f, size, max_bytes)
+            except (ValueError, OSError, zipfile.BadZipFile, tarfile.TarError) as e:
+                yield name, e
+
+
+def _decode(data) -> object:
+    """RGB frame for image bytes, or the exception that prevented it."""
+    if isinstance(data, Exception):
+        return data
+    try:
+        return preprocess_image(decode_image(data))
+    except ValueError as e:
+        return e
+
+
+def _try_lock(path: str) -> Optional[int]:
+    """
+    Take an exclusive lock on `path` without waiting.
+
+    Returns:
+        The locked file descriptor, or None if another holder has it. The OS
+        releases the lock when the descriptor is closed or the process exits.
+    """
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT)
+    except OSError:
+        return None
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        os.close(fd)
+        return None
+    return fd
+
+
+def _unlock(fd: int) -> None:
+    if fcntl is None:
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    os.close(fd)
+
+
+def _lower_priority(nice: int) -> None:
+    """Raise the calling thread's nice value; per-thread only on Linux."""
+    if nice <= 0 or not sys.platform.startswith("linux"):
+        return
+    try:
+        tid = threading.get_native_id()
+        os.setpriority(os.PRIO_PROCESS, tid, os.getpriority(os.PRIO_PROCESS, tid) + nice)
+    except OSError as e:
+        logger.warning("Could not lower job thread priority: %s", e)
+
+
+class JobManager:
+    """
+    Bulk jobs spooled under `root` and the background worker pool that runs them.
+
+    Several processes (uvicorn or router workers) may share one spool: state
+    is read from `job.json`, and a job runs only in the process holding its
+    lock file, so each process can report on, cancel or resume any job.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        model=None,
+        workers: int = 1,
+        batch_size: int = 32,
+        decode_threads: int = 2,
+        max_queued: int = 100,
+        max_images: int = 500000,
+        max_image_bytes: int = 10 * 1024 * 1024,
+        allowed_dirs: Sequence[str] = (),
+        nice: int = 10,
+        max_yield_s: float = 2.0,
+        busy: Optional[Callable[[], bool]] = None,
+        poll_interval_s: float = 1.0,
+    ):
+        """
+        Args:
+            root: Spool directory, one subdirectory per job
+            model: Anything with `predict_batch(frames)`; defaults to `get_model()`
+            workers: Jobs processed concurrently
+            batch_size: Images per forward pass
+            decode_threads: Threads decoding each batch
+            max_queued: Queued jobs beyond this are refused
+            max_images: Largest accepted job
+            max_image_bytes: Larger images are recorded as errors
+            allowed_dirs: Server-local directories jobs may read; empty allows none
+            nice: Added to the OS nice value of job threads (Linux)
+            max_yield_s: Longest wait for interactive traffic before each batch
+            busy: Returns True while interactive requests are running or queued
+            poll_interval_s: How often idle workers look for jobs queued by
+                other processes
+        """
+        self.root = root
+        self.model = model
+        self.batch_size = batch_size
+        self.max_queued = max_queued
+        self.max_images = max_images
+        self.max_image_bytes = max_image_bytes
+        self.allowed_dirs = list(allowed_dirs)
+        self.nice = nice
+        self.max_yield_s = max_yield_s
+        self.busy = busy
+        self.poll_interval_s = poll_interval_s
+
+        # job ID -> ((inode, mtime, size) of job.json, Job); entries are read-only
+        self._cache: Dict[str, Tuple[tuple, Job]] = {}
+        # Jobs this process runs: job ID -> lock file descriptor
+        self._owned: Dict[str, int] = {}
+        self._claim_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._wakeups = 0
+        self._closed = False
+
+        self.images_processed = 0
+        self.batches = 0
+        self.yield_s = 0.0
+
+        os.makedirs(root, exist_ok=True)
+        self._decoder = ThreadPoolExecutor(
+            decode_threads,
+            thread_name_prefix="job-decode",
+            initializer=_lower_priority,
+            initargs=(nice,),
+        )
+        self._threads = [
+            threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _dir(self, job_id: str) -> str:
+        if not JOB_ID.fullmatch(job_id):
+            raise UnknownJobError(f"Unknown job {job_id!r}")
+        return os.path.join(self.root, job_id)
+
+    def _path(self, job_id: str, name: str) -> str:
+        return os.path.join(self._dir(job_id), name)
+
+    def _save(self, job: Job) -> None:
+        """Atomically replace the job's job.json."""
+        path = self._path(job.job_id, "job.json")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(asdict(job), f)
+        os.replace(tmp, path)
+
+    def _read(self, job_id: str) -> Job:
+        """The job as on disk. Raises UnknownJobError."""
+        try:
+            with open(self._path(job_id, "job.json")) as f:
+                return Job(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            raise UnknownJobError(f"Unknown job {job_id!r}")
+
+    def _load(self, job_id: str) -> Job:
+        """The job as on disk, re-read only when job.json has been replaced."""
+        try:
+            st = os.stat(self._path(job_id, "job.json"))
+        except OSError:
+            self._cache.pop(job_id, None)
+            raise UnknownJobError(f"Unknown job {job_id!r}")
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        cached = self._cache.get(job_id)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        job = self._read(job_id)
+        self._cache[job_id] = (key, job)
+        return job
+
+    def _scan(self) -> List[Job]:
+        """Every spooled job, oldest first."""
+        jobs = []
+        for job_id in os.listdir(self.root):
+            try:
+                jobs.append(self._load(job_id))
+            except UnknownJobError:
+                continue
+        return sorted(jobs, key=lambda j: j.created_at)
+
+    def _notify(self) -> None:
+        with self._cond:
+            self._wakeups += 1
+            self._cond.notify()
+
+    def _create(self, job_id: str, source: str, name: str, path: str, items: List[str]) -> dict:
+        if not items:
+            raise JobError(f"No images ({', '.join(IMAGE_EXTENSIONS)}) found in {name}")
+        if len(items) > self.max_images:
+            raise JobError(f"{name} has {len(items)} images, max {self.max_images}")
+        job = Job(job_id, source, name, path, total=len(items), created_at=time.time())
+        with open(self._path(job_id, "items.json"), "w") as f:
+            json.dump(items, f)
+        self._check_queue()
+        # Visible to every process from here on
+        self._save(job)
+        self._notify()
+        return job.status()
+
+    def _check_queue(self) -> None:
+        if self._closed:
+            raise JobQueueFullError("Job manager is shutting down")
+        queued = sum(job.state == QUEUED for job in self._scan())
+        if queued >= self.max_queued:
+            raise JobQueueFullError(f"{queued} jobs already queued")
+
+    def submit_directory(self, path: str) -> dict:
+        """
+        Queue a job over the images under a server-local directory.
+
+        Returns:
+            The new job's status
+
+        Raises:
+            DirectoryNotAllowedError: If `path` is outside the allowed directories
+            JobError: If it is not a directory, or has no or too many images
+            JobQueueFullError: If `max_queued` jobs are waiting
+        """
+        self._check_queue()
+        root = resolve_directory(path, self.allowed_dirs)
+        items = list_directory(root)
+        job_id = uuid.uuid4().hex
+        os.makedirs(self._dir(job_id))
+        try:
+            return self._create(job_id, DIRECTORY, path, root, items)
+        except Exception:
+            shutil.rmtree(self._dir(job_id), ignore_errors=True)
+            raise
+
+    def submit_archive(self, stream, filename: str, max_bytes: int) -> dict:
+        """
+        Spool an uploaded zip or tar archive and queue a job over its images.
+
+        Args:
+            stream: Readable binary file object with the archive
+            filename: Uploaded file name, for display
+            max_bytes: Largest accepted archive
+
+        Returns:
+            The new job's status
+
+        Raises:
+            ArchiveTooLargeError: If the archive exceeds `max_bytes`
+            JobError: If it is not a zip or tar archive, or has no or too many images
+            JobQueueFullError: If `max_queued` jobs are waiting
+        """
+        self._check_queue()
+        job_id = uuid.uuid4().hex
+        os.makedirs(self._dir(job_id))
+        path = self._path(job_id, "input.archive")
+        try:
+            size = 0
+            with open(path, "wb") as out:
+                while True:
+                    chunk = stream.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ArchiveTooLargeError(f"Archive too large. Max size: {max_bytes}B")
+                    out.write(chunk)
+            return self._create(job_id, ARCHIVE, filename, path, list_archive(path))
+        except Exception:
+            shutil.rmtree(self._dir(job_id), ignore_errors=True)
+            raise
+
+    def status(self, job_id: str) -> dict:
+        """Job state and progress. Raises UnknownJobError."""
+        return self._load(job_id).status()
+
+    def list_jobs(self) -> List[dict]:
+        """Every job's status, newest first."""
+        return [job.status() for job in reversed(self._scan())]
+
+    def cancel(self, job_id: str) -> dict:
+        """
+        Cancel a queued or running job; results so far are kept.
+
+        A running job, in this or another process, stops after its current batch.
+        """
+        job = self._read(job_id)
+        if job.state not in ACTIVE_STATES:
+            raise JobStateError(f"Job {job_id} is already {job.state}")
+        fd = _try_lock(self._path(job_id, ".lock"))
+        if fd is None:
+            # Running: its owner checks for this before every batch
+            open(self._path(job_id, "cancel"), "w").close()
+            return job.status()
+        try:
+            job = self._read(job_id)
+            if job.state not in ACTIVE_STATES:
+                raise JobStateError(f"Job {job_id} is already {job.state}")
+            job.state = CANCELLED
+            job.finished_at = time.time()
+            self._save(job)
+            return job.status()
+        finally:
+            _unlock(fd)
+
+    def resume(self, job_id: str) -> dict:
+        """Queue a cancelled or failed job again; it continues after its last batch."""
+        self._read(job_id)
+        fd = _try_lock(self._path(job_id, ".lock"))
+        if fd is None:
+            raise JobStateError(f"Job {job_id} is running; only cancelled or failed resume")
+        try:
+            job = self._read(job_id)
+            if job.state not in (CANCELLED, FAILED):
+                raise JobStateError(f"Job {job_id} is {job.state}; only cancelled or failed resume")
+            self._check_queue()
+            if os.path.exists(self._path(job_id, "cancel")):
+                os.remove(self._path(job_id, "cancel"))
+            job.state = QUEUED
+            job.error = None
+            job.finished_at = None
+            self._save(job)
+        finally:
+            _unlock(fd)
+        self._notify()
+        return job.status()
+
+    def delete(self, job_id: str) -> None:
+        """Remove a finished job and its spooled files."""
+        self._read(job_id)
+        fd = _try_lock(self._path(job_id, ".lock"))
+        if fd is None:
+            raise JobStateError(f"Job {job_id} is running; cancel it first")
+        try:
+            job = self._read(job_id)
+            if job.state in ACTIVE_STATES:
+                raise JobStateError(f"Job {job_id} is {job.state}; cancel it first")
+            # Gone for every process before the files go
+            os.remove(self._path(job_id, "job.json"))
+        finally:
+            _unlock(fd)
+        self._cache.pop(job_id, None)
+        shutil.rmtree(self._dir(job_id), ignore_errors=True)
+
+    def iter_results(self, job_id: str, chunk_size: int = COPY_CHUNK_SIZE) -> Iterator[bytes]:
+        """
+        The job's NDJSON results recorded so far, in chunks. Raises UnknownJobError.
+        """
+        end = self._load(job_id).results_bytes
+        path = self._path(job_id, "results.ndjson")
+
+        def chunks():
+            with open(path, "rb") as f:
+                remaining = end
+                while remaining > 0:
+                    chunk = f.read(min(chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    yield chunk
+
+        return chunks() if end else iter(())
+
+    def _yield_to_interactive(self) -> None:
+        if self.busy is None:
+            return
+        start = time.monotonic()
+        while not self._closed and self.busy() and time.monotonic() - start < self.max_yield_s:
+            time.sleep(YIELD_POLL_S)
+        self.yield_s += time.monotonic() - start
+
+    def _claim(self) -> Optional[Job]:
+        """Lock the oldest queued job (or one whose process died) that no process holds."""
+        for job in self._scan():
+            if job.state not in ACTIVE_STATES or job.job_id in self._owned:
+                continue
+            fd = _try_lock(self._path(job.job_id, ".lock"))
+            if fd is None:
+                continue
+            try:
+                job = self._read(job.job_id)
+            except UnknownJobError:
+                _unlock(fd)
+                continue
+            if job.state not in ACTIVE_STATES:
+                _unlock(fd)
+                continue
+            if os.path.exists(self._path(job.job_id, "cancel")):
+                os.remove(self._path(job.job_id, "cancel"))
+                job.state = CANCELLED
+                job.finished_at = time.time()
+                self._save(job)
+                _unlock(fd)
+                continue
+            if job.state == RUNNING:
+                logger.info("Resuming bulk job %s left by a stopped process", job.job_id)
+            job.state = RUNNING
+            job.started_at = job.started_at or time.time()
+            self._save(job)
+            self._owned[job.job_id] = fd
+            return job
+        return None
+
+    def _take(self) -> Optional[Job]:
+        while True:
+            with self._cond:
+                seen = self._wakeups
+            with self._claim_lock:
+                if self._closed:
+                    return None
+                job = self._claim()
+            if job is not None:
+                return job
+            with self._cond:
+                if not self._closed and self._wakeups == seen:
+                    self._cond.wait(self.poll_interval_s)
+
+    def _run(self) -> None:
+        _lower_priority(self.nice)
+        while True:
+            job = self._take()
+            if job is None:
+                return
+            try:
+                self._process(job)
+            except Exception as e:
+                logger.exception("Bulk job %s failed", job.job_id)
+                job.state = FAILED
+                job.error = str(e)
+                job.finished_at = time.time()
+                self._save(job)
+            finally:
+                with self._claim_lock:
+                    _unlock(self._owned.pop(job.job_id))
+
+    def _process(self, job: Job) -> None:
+        """Run a job from its last recorded batch until done, cancelled or shut down."""
+        from app.inference.model import get_model
+
+        model = self.model or get_model()
+        with open(self._path(job.job_id, "items.json")) as f:
+            items = json.load(f)
+        results_path = self._path(job.job_id, "results.ndjson")
+        cancel_path = self._path(job.job_id, "cancel")
+        logger.info(
+            "Bulk job %s: %d of %d images left", job.job_id, job.total - job.processed, job.total
+        )
+
+        with open(results_path, "ab") as out:
+            # Drop results written after the last recorded batch
+            out.truncate(job.results_bytes)
+            reader = read_items(job, items, self.max_image_bytes)
+            while True:
+                if os.path.exists(cancel_path):
+                    os.remove(cancel_path)
+                    job.state = CANCELLED
+                    job.finished_at = time.time()
+                    self._save(job)
+                    return
+                if self._closed:
+                    # Picked up by another process, or on the next start
+                    job.state = QUEUED
+                    self._save(job)
+                    return
+                self._yield_to_interactive()
+
+                start = time.perf_counter()
+                batch = list(islice(reader, self.batch_size))
+                if not batch:
+                    break
+                frames = list(self._decoder.map(_decode, [data for _, data in batch]))
+                ok = [i for i, frame in enumerate(frames) if not isinstance(frame, Exception)]
+                results = model.predict_batch([frames[i] for i in ok]) if ok else []
+                detections = dict(zip(ok, results))
+
+                lines, failed, faces = [], 0, 0
+                for i, (name, _) in enumerate(batch):
+                    record = {"index": job.processed + i, "item": name}
+                    if i in detections:
+                        found = format_detections(postprocess_results([detections[i]]))
+                        record["faces"] = [face.model_dump() for face in found]
+                        faces += len(found)
+                    else:
+                        record["error"] = str(frames[i])
+                        failed += 1
+                    lines.append(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+                data = b"".join(lines)
+                out.write(data)
+                out.flush()
+                os.fsync(out.fileno())
+
+                job.processed += len(batch)
+                job.failed += failed
+                job.faces += faces
+                job.results_bytes += len(data)
+                job.busy_s += time.perf_counter() - start
+                self._save(job)
+                with self._cond:
+                    self.images_processed += len(batch)
+                    self.batches += 1
+
+        job.state = COMPLETED
+        job.finished_at = time.time()
+        self._save(job)
+        logger.info(
+            "Bulk job %s completed: %d images, %d failed", job.job_id, job.total, job.failed
+        )
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Stop the workers after their current batch; unfinished jobs are queued again."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._decoder.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        """Job counts by state (whole spool) and this process's worker counters."""
+        states = [job.state for job in self._scan()]
+        with self._cond:
+            return {
+                "workers": len(self._threads),
+                **{state: states.count(state) for state in ALL_STATES},
+                "images_processed": self.images_processed,
+                "batches": self.batches,
+                "yield_s": self.yield_s,
+            }
+
+
+# Global job manager instance
+_job_manager: Optional[JobManager] = None
+
+
+def _interactive_busy() -> bool:
+    """True while the admission controller has requests in flight or queued."""
+    from app.core.admission import get_admission_controller
+
+    # Plain attribute reads from the worker threads; a stale value only
+    # shifts when the next batch starts
+    admission = get_admission_controller()
+    return admission.in_flight > 0 or admission.queue_depth > 0
+
+
+def get_job_manager() -> Optional[JobManager]:
+    """Get the global job manager, or None when JOBS_ENABLED is off."""
+    global _job_manager
+    if _job_manager is None and settings.JOBS_ENABLED:
+        _job_manager = JobManager(
+            settings.JOBS_DIR,
+            workers=settings.JOBS_WORKERS,
+            batch_size=settings.JOBS_BATCH_SIZE,
+            decode_threads=settings.JOBS_DECODE_THREADS,
+            max_queued=settings.JOBS_MAX_QUEUED,
+            max_images=settings.JOBS_MAX_IMAGES,
+            max_image_bytes=settings.MAX_IMAGE_SIZE,
+            allowed_dirs=[d.strip() for d in settings.JOBS_ALLOWED_DIRS.split(",") if d.strip()],
+            nice=settings.JOBS_NICE,
+            max_yield_s=settings.JOBS_MAX_YIELD_MS / 1000,
+            busy=_interactive_busy if settings.ADMISSION_ENABLED else None,
+            poll_interval_s=settings.JOBS_POLL_INTERVAL_S,
+        )
+    return _job_manager
+
+
+def close_job_manager() -> None:
+    """Stop the global job manager's workers, if started."""
+    global _job_manager
+    if _job_manager is not None:
+        _job_manager.close()
+        _job_manager = None
@@ -0,0 +1,110 @@
+"""
+Upload size limits enforced while the request body streams in.
+
+`BodySizeLimitMiddleware` rejects a request with 413 as soon as its declared
+Content-Length, or the bytes actually received, exceed the limit, so an
+oversized upload is never buffered or spooled in full. `read_upload` applies
+the same limit to the parsed file in chunks.
+"""
+
+from typing import Sequence
+
+from fastapi import HTTPException, UploadFile
+from starlette.responses import JSONResponse
+
+# Room for multipart boundaries and part headers around the image itself.
+MULTIPART_OVERHEAD = 64 * 1024
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class RequestTooLargeError(HTTPException):
+    """Request body or upload over the configured limit."""
+
+    def __init__(self, max_bytes: int):
+        super().__init__(
+            status_code=413,
+            detail=f"Image too large. Max size: {max_bytes / 1024 / 1024}MB",
+        )
+
+
+class BodySizeLimitMiddleware:
+    """ASGI middleware capping request body size on selected path prefixes."""
+
+    def __init__(self, app, max_body_size: int, paths: Sequence[str]):
+        """
+        Args:
+            app: ASGI application
+            max_body_size: Largest accepted body in bytes
+            paths: Path prefixes the limit applies to
+        """
+        self.app = app
+        self.max_body_size = max_body_size
+        self.paths = tuple(paths)
+
+    async def _reject(self, scope, receive, send, status_code: int, detail: str) -> None:
+        response = JSONResponse({"detail": detail}, status_code=status_code)
+        response.headers["Connection"] = "close"
+        await response(scope, receive, send)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.paths):
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None:
+            try:
+                declared = int(content_length)
+            except ValueError:
+                await self._reject(scope, receive, send, 400, "Invalid Content-Length")
+                return
+            if declared > self.max_body_size:
+                error = RequestTooLargeError(self.max_body_size - MULTIPART_OVERHEAD)
+                await self._reject(scope, receive, send, 413, error.detail)
+                return
+
+        received = 0
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_body_size:
+                    raise RequestTooLargeError(self.max_body_size - MULTIPART_OVERHEAD)
+            return message
+
+        async def tracked_send(message):
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except RequestTooLargeError as e:
+            # Normally turned into a response by the app's exception handlers
+            if response_started:
+                raise
+            await self._reject(scope, receive, send, 413, e.detail)
+
+
+async def read_upload(file: UploadFile, max_bytes: int) -> bytes:
+    """
+    Read an upload in chunks, stopping as soon as it exceeds `max_bytes`.
+
+    Raises:
+        RequestTooLargeError: If the upload is larger than `max_bytes`
+    """
+    chunks = []
+    size = 0
+    while True:
+        chunk = await file.read(READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if size > max_bytes:
+            raise RequestTooLargeError(max_bytes)
+        chunks.append(chunk)
+    return b"".join(chunks)
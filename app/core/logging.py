@@ -1,27 +1,186 @@
 """
 Structured logging configuration.
+
+Records are handed to a `QueueHandler` and written by a `QueueListener`
+thread, so formatting to JSON and stdout I/O never run on the request path.
+The queue is bounded; when it is full, records are dropped rather than
+blocking the caller, and counted in `/v1/metrics`.
+
+Hot-path loggers can be rate limited and sampled (`LOG_RATE_LIMITS`,
+`LOG_SAMPLE_EVERY`). Only records below WARNING are limited; the next record
+that gets through carries the number suppressed before it. Hot-path messages
+are lazily %-formatted DEBUG records, so at INFO they cost a level check.
 """
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Optional
 
 from app.core.config import settings
 
+# Attributes every LogRecord has; anything else was passed via `extra=`.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional["_DroppingQueueHandler"] = None
+_atexit_registered = False
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(
+                timespec="milliseconds"
+            ),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def parse_rate_limits(value: str) -> Dict[str, float]:
+    """Parse "app.inference=20,app.api=5" into {"app.inference": 20.0, "app.api": 5.0}."""
+    limits = {}
+    for item in value.split(","):
+        if item.strip():
+            name, rate = item.split("=")
+            limits[name.strip()] = float(rate)
+    return limits
+
+
+class HotPathFilter(logging.Filter):
+    """Per-logger sampling and token-bucket rate limiting of sub-WARNING records."""
+
+    def __init__(self, limits: Dict[str, float], sample_every: int = 1):
+        """
+        Args:
+            limits: Logger name prefix -> records per second (burst of one second)
+            sample_every: Keep one in this many records of limited loggers
+        """
+        super().__init__()
+        self._limits = limits
+        self._sample_every = max(1, sample_every)
+        self._lock = threading.Lock()
+        # logger name -> [tokens, last refill time, seen, suppressed]
+        self._state: Dict[str, list] = {}
+
+    def _rate(self, name: str) -> Optional[float]:
+        best = None
+        for prefix, rate in self._limits.items():
+            if name == prefix or name.startswith(prefix + "."):
+                if best is None or len(prefix) > len(best):
+                    best = prefix
+        return self._limits[best] if best is not None else None
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate is None:
+            return True
+
+        now = time.monotonic()
+        with self._lock:
+            state = self._state.setdefault(record.name, [rate, now, 0, 0])
+            state[0] = min(rate, state[0] + (now - state[1]) * rate)
+            state[1] = now
+            state[2] += 1
+            if (state[2] - 1) % self._sample_every or state[0] < 1.0:
+                state[3] += 1
+                return False
+            state[0] -= 1.0
+            suppressed, state[3] = state[3], 0
+        if suppressed:
+            record.suppressed = suppressed
+        return True
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of blocking when the queue is full."""
+
+    def __init__(self, record_queue: queue.Queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The base class formats the message here, on the calling thread; leave
+        # that to the listener's handler (the queue is in-process, no pickling)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _formatter() -> logging.Formatter:
+    if settings.LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter(
+        "%(asctime)s - %(name)s - %(levelname)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S"
+    )
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats() -> Optional[dict]:
+    """Log queue depth and records dropped because it was full, once set up."""
+    if _handler is None:
+        return None
+    return {"queue_depth": _handler.queue.qsize(), "dropped": _handler.dropped}
+
 
 def setup_logging():
     """Configure application logging."""
+    global _atexit_registered, _handler, _listener
     log_level = getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO)
-    
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
-        handlers=[
-            logging.StreamHandler(sys.stdout)
-        ]
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(_formatter())
+
+    handler = _DroppingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    handler.addFilter(
+        HotPathFilter(parse_rate_limits(settings.LOG_RATE_LIMITS), settings.LOG_SAMPLE_EVERY)
     )
-    
+
+    stop_logging()
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    _handler = handler
+    root.setLevel(log_level)
+
+    _listener = logging.handlers.QueueListener(handler.queue, stream, respect_handler_level=True)
+    _listener.start()
+    if not _atexit_registered:
+        # setup_logging may run several times per process (router, tests)
+        atexit.register(stop_logging)
+        _atexit_registered = True
+
     # Set specific loggers
     logging.getLogger("uvicorn").setLevel(logging.INFO)
     logging.getLogger("ultralytics").setLevel(logging.WARNING)
-    
+
     return logging.getLogger(__name__)
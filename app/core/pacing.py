@@ -0,0 +1,203 @@
+"""
+Server-driven pacing for camera clients.
+
+Every prediction response carries a hint: how long the client should wait
+before its next frame, and the largest resolution and JPEG quality to upload
+it at. The hint is shared by all clients and updated by a control loop that
+keeps the busiest stage near a target utilisation:
+
+- decode + preprocess runs on the event loop, so its utilisation is its busy
+  time over wall time;
+- inference utilisation is its busy time over wall time times the
+  admission concurrency limit, plus the admission queue depth over the limit.
+
+Each update multiplies the frame interval by (utilisation / target) ** gain,
+within the configured bounds. Upload quality steps down a level when the
+decode stage is the bottleneck or the interval is already at its maximum,
+and steps back up once the interval is at its minimum with load well under
+target.
+
+All methods must be called from the event loop thread; the controller
+itself does no locking.
+"""
+
+import re
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from app.core.config import settings
+
+LEVEL_PATTERN = re.compile(r"^(\d+)x(\d+)@(\d+)$")
+# Largest change of the frame interval per update
+MAX_STEP = 2.0
+
+
+@dataclass(frozen=True)
+class QualityLevel:
+    max_width: int
+    max_height: int
+    jpeg_quality: int
+
+
+def parse_levels(spec: str) -> List[QualityLevel]:
+    """
+    Parse "<width>x<height>@<jpeg quality>,..." from best to cheapest.
+
+    Raises:
+        ValueError: If an entry is malformed or the list is empty
+    """
+    levels = []
+    for entry in spec.split(","):
+        match = LEVEL_PATTERN.match(entry.strip())
+        if not match:
+            raise ValueError(f"Invalid pacing level {entry!r}, expected e.g. 640x480@90")
+        width, height, quality = map(int, match.groups())
+        levels.append(QualityLevel(width, height, min(100, max(1, quality))))
+    if not levels:
+        raise ValueError("No pacing levels configured")
+    return levels
+
+
+class PacingController:
+    """Computes the pacing hint returned with each prediction."""
+
+    def __init__(
+        self,
+        levels: List[QualityLevel],
+        target_utilization: float = 0.7,
+        min_interval_ms: float = 100.0,
+        max_interval_ms: float = 2000.0,
+        initial_interval_ms: float = 333.0,
+        update_interval_s: float = 1.0,
+        gain: float = 0.5,
+    ):
+        """
+        Args:
+            levels: Upload resolutions and JPEG qualities, best first
+            target_utilization: Utilisation of the busiest stage to aim for
+            min_interval_ms: Shortest frame interval ever suggested
+            max_interval_ms: Longest frame interval ever suggested
+            initial_interval_ms: Frame interval before any load is measured
+            update_interval_s: How often the control loop runs
+            gain: Exponent applied to the utilisation error per update
+        """
+        self.levels = levels
+        self.target_utilization = target_utilization
+        self.min_interval_ms = min_interval_ms
+        self.max_interval_ms = max_interval_ms
+        self.update_interval_s = update_interval_s
+        self.gain = gain
+
+        self.interval_ms = min(max_interval_ms, max(min_interval_ms, initial_interval_ms))
+        self.level = 0
+        self.decode_utilization = 0.0
+        self.inference_utilization = 0.0
+        self.updates = 0
+
+        self._window_start = time.monotonic()
+        self._decode_busy_ms = 0.0
+        self._inference_busy_ms = 0.0
+        self._frames = 0
+        self.frame_rate = 0.0
+
+    def record(self, decode_ms: float, inference_ms: float) -> None:
+        """Add the stage latencies of one served frame to the current window."""
+        self._decode_busy_ms += decode_ms
+        self._inference_busy_ms += inference_ms
+        self._frames += 1
+
+    @property
+    def utilization(self) -> float:
+        """Utilisation of the busiest stage in the last window."""
+        return max(self.decode_utilization, self.inference_utilization)
+
+    def update(self, capacity: int, queue_depth: int, now: Optional[float] = None) -> None:
+        """
+        Close the current window and adjust the hint.
+
+        Args:
+            capacity: Requests that may run inference concurrently
+            queue_depth: Requests waiting for an inference slot
+            now: `time.monotonic()` timestamp, for tests
+        """
+        now = time.monotonic() if now is None else now
+        elapsed_ms = max(1e-3, (now - self._window_start) * 1000)
+        capacity = max(1, capacity)
+        self.decode_utilization = self._decode_busy_ms / elapsed_ms
+        self.inference_utilization = (
+            self._inference_busy_ms / (elapsed_ms * capacity) + queue_depth / capacity
+        )
+        self.frame_rate = self._frames * 1000 / elapsed_ms
+        self._window_start = now
+        self._decode_busy_ms = self._inference_busy_ms = 0.0
+        self._frames = 0
+        self.updates += 1
+
+        utilization = self.utilization
+        ratio = min(MAX_STEP, max(1 / MAX_STEP, utilization / self.target_utilization))
+        cheapest = len(self.levels) - 1
+        if ratio > 1 and self.level < cheapest and (
+            self.decode_utilization >= self.inference_utilization
+            or self.interval_ms >= self.max_interval_ms
+        ):
+            # Smaller uploads relieve decoding; keep the frame rate this round
+            self.level += 1
+            return
+
+        self.interval_ms = min(
+            self.max_interval_ms, max(self.min_interval_ms, self.interval_ms * ratio**self.gain)
+        )
+        if (
+            self.level > 0
+            and self.interval_ms <= self.min_interval_ms
+            and utilization < self.target_utilization / 2
+        ):
+            self.level -= 1
+
+    def maybe_update(self, capacity: int, queue_depth: int) -> None:
+        """Run the control loop if the current window is over."""
+        if time.monotonic() - self._window_start >= self.update_interval_s:
+            self.update(capacity, queue_depth)
+
+    def hint(self) -> dict:
+        """The current pacing hint."""
+        level = self.levels[self.level]
+        return {
+            "next_frame_ms": round(self.interval_ms),
+            "max_width": level.max_width,
+            "max_height": level.max_height,
+            "jpeg_quality": level.jpeg_quality,
+        }
+
+    def stats(self) -> dict:
+        """Snapshot of controller state for the metrics endpoint."""
+        return {
+            **self.hint(),
+            "level": self.level,
+            "target_utilization": self.target_utilization,
+            "utilization": self.utilization,
+            "decode_utilization": self.decode_utilization,
+            "inference_utilization": self.inference_utilization,
+            "frame_rate": self.frame_rate,
+            "updates": self.updates,
+        }
+
+
+# Global controller instance
+_controller: Optional[PacingController] = None
+
+
+def get_pacing_controller() -> Optional[PacingController]:
+    """Get the global pacing controller, or None if pacing is disabled."""
+    global _controller
+    if _controller is None and settings.PACING_ENABLED:
+        _controller = PacingController(
+            parse_levels(settings.PACING_LEVELS),
+            target_utilization=settings.PACING_TARGET_UTILIZATION,
+            min_interval_ms=settings.PACING_MIN_INTERVAL_MS,
+            max_interval_ms=settings.PACING_MAX_INTERVAL_MS,
+            initial_interval_ms=settings.PACING_INITIAL_INTERVAL_MS,
+            update_interval_s=settings.PACING_UPDATE_INTERVAL_S,
+        )
+    return _controller
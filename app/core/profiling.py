@@ -0,0 +1,197 @@
+"""
+On-demand profiling of the running service. `get_profile_session()` returns
+the active session, if any.
+
+A session records, for the next N requests or T seconds (whichever comes
+first):
+
+- a sampling CPU profile of every Python thread, written as folded stacks
+  (`cpu.folded`, for flamegraph.pl or speedscope), and
+- a `torch.profiler` trace of the model forward passes (`torch_trace.json`,
+  Chrome trace format for chrome://tracing or Perfetto).
+
+When no session is active, the request path only checks a module global.
+torch builds that cannot profile other threads (`profile_all_threads`)
+instead run profiled requests on one dedicated thread, which serialises
+inference while the session lasts.
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+import torch
+
+_session: Optional["ProfileSession"] = None
+_session_lock = threading.Lock()
+
+
+class ProfilerBusyError(Exception):
+    """Raised when a profile session is already running."""
+
+
+def _torch_profiler(all_threads: bool):
+    activities = [torch.profiler.ProfilerActivity.CPU]
+    if torch.cuda.is_available():
+        activities.append(torch.profiler.ProfilerActivity.CUDA)
+    kwargs = {}
+    if all_threads:
+        kwargs["experimental_config"] = torch._C._profiler._ExperimentalConfig(
+            profile_all_threads=True
+        )
+    return torch.profiler.profile(activities=activities, **kwargs)
+
+
+class ProfileSession:
+    """One CPU sampling + torch profiler recording window."""
+
+    def __init__(self, max_requests: int, duration_s: float, interval_ms: float = 5.0):
+        """
+        Args:
+            max_requests: Stop after this many profiled requests
+            duration_s: Stop after this many seconds
+            interval_ms: CPU sampling interval
+        """
+        self.max_requests = max_requests
+        self.duration_s = duration_s
+        self._interval_s = interval_ms / 1000
+        self.requests = 0
+        self._count_lock = threading.Lock()
+        self._done = threading.Event()
+        self._samples: Counter = Counter()
+        self._sample_count = 0
+        self._sampler: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._prof = None
+        self.torch_mode = "all_threads"
+        self.started_at = 0.0
+        self.stopped_at = 0.0
+
+    def start(self) -> None:
+        """Start the sampler thread and the torch profiler."""
+        self.started_at = time.monotonic()
+        try:
+            self._prof = _torch_profiler(all_threads=True)
+            self._prof.start()
+        except (TypeError, AttributeError, RuntimeError):
+            self.torch_mode = "serialized"
+            self._prof = _torch_profiler(all_threads=False)
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="profiled")
+            self._executor.submit(self._prof.start).result()
+
+        self._sampler = threading.Thread(target=self._sample, name="cpu-sampler", daemon=True)
+        self._sampler.start()
+
+    def _sample(self) -> None:
+        own = threading.get_ident()
+        names = {}
+        while not self._done.wait(self._interval_s):
+            if time.monotonic() - self.started_at >= self.duration_s:
+                self._done.set()
+                break
+            if len(names) != threading.active_count():
+                names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                    )
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self._samples[";".join(reversed(stack))] += 1
+            self._sample_count += 1
+
+    def run(self, fn: Callable, *args):
+        """Run one request's inference inside the session and count it."""
+        if self._executor is not None and not self._done.is_set():
+            try:
+                result = self._executor.submit(fn, *args).result()
+            except RuntimeError:  # the session stopped meanwhile
+                result = fn(*args)
+        else:
+            result = fn(*args)
+        with self._count_lock:
+            self.requests += 1
+            if self.requests >= self.max_requests:
+                self._done.set()
+        return result
+
+    @property
+    def done(self) -> bool:
+        """Whether the request or time budget is used up."""
+        return self._done.is_set() or time.monotonic() - self.started_at >= self.duration_s
+
+    def stop(self) -> bytes:
+        """
+        Stop recording and bundle the results.
+
+        Returns:
+            Zip archive with cpu.folded, torch_trace.json and summary.json
+        """
+        self._done.set()
+        self.stopped_at = time.monotonic()
+        if self._sampler is not None:
+            self._sampler.join()
+        if self._executor is not None:
+            self._executor.submit(self._prof.stop).result()
+            self._executor.shutdown()
+        else:
+            self._prof.stop()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            trace_path = os.path.join(tmp, "torch_trace.json")
+            self._prof.export_chrome_trace(trace_path)
+            summary = {
+                "requests": self.requests,
+                "duration_s": round(self.stopped_at - self.started_at, 3),
+                "cpu_samples": self._sample_count,
+                "cpu_interval_ms": self._interval_s * 1000,
+                "torch_mode": self.torch_mode,
+            }
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as bundle:
+                bundle.writestr(
+                    "cpu.folded",
+                    "".join(f"{stack} {count}\n" for stack, count in self._samples.items()),
+                )
+                bundle.write(trace_path, "torch_trace.json")
+                bundle.writestr("summary.json", json.dumps(summary, indent=2))
+        return buffer.getvalue()
+
+
+def get_profile_session() -> Optional[ProfileSession]:
+    """Get the active profile session, if any."""
+    return _session
+
+
+def start_session(max_requests: int, duration_s: float, interval_ms: float = 5.0) -> ProfileSession:
+    """Start and register a session. Raises ProfilerBusyError if one is running."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            raise ProfilerBusyError("A profile is already being recorded")
+        session = ProfileSession(max_requests, duration_s, interval_ms)
+        session.start()
+        _session = session
+    return session
+
+
+def finish_session(session: ProfileSession) -> bytes:
+    """Unregister `session`, then stop it and return its bundle."""
+    global _session
+    with _session_lock:
+        if _session is session:
+            _session = None
+    return session.stop()
@@ -0,0 +1,476 @@
+"""
+Runtime threading configuration and startup auto-tuning.
+
+Without explicit settings, PyTorch and OpenCV each size their thread pools to
+the whole machine, so several uvicorn workers on one host oversubscribe the
+cores. This module applies an explicit thread configuration at startup and,
+when `AUTOTUNE_ENABLED` is set, benchmarks how to split the cores between
+torch intra-op, inter-op and OpenCV threads for the `WEB_CONCURRENCY` workers
+actually started, with the real model and synthetic frames. The winner is
+persisted per host/model fingerprint and worker count so later starts reuse it.
+
+Run `python -m app.inference.autotune` to tune ahead of time.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import platform
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from app.core.config import get_device, settings
+
+logger = logging.getLogger(__name__)
+
+# 2: dropped batch_size, which serving (one image per request) never used
+CACHE_VERSION = 2
+
+
+@dataclass
+class RuntimeConfig:
+    """Thread/worker configuration for one host."""
+
+    torch_threads: int
+    interop_threads: int = 1
+    cv2_threads: int = 1
+    workers: int = 1
+    # Filled in by the benchmark: images_per_s, p95_latency_ms
+    measured: Dict[str, float] = field(default_factory=dict)
+
+
+def available_cores() -> int:
+    """Number of CPU cores this process may run on."""
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def host_fingerprint(model_path: str = None, device: str = None) -> str:
+    """
+    Identify the host/model combination a tuned config is valid for.
+
+    Args:
+        model_path: Model file (defaults to settings.MODEL_PATH)
+        device: Inference device (defaults to the configured device)
+
+    Returns:
+        Short hex digest
+    """
+    model_path = model_path or settings.MODEL_PATH
+    try:
+        stat = os.stat(model_path)
+        model_id = f"{os.path.abspath(model_path)}:{stat.st_size}:{int(stat.st_mtime)}"
+    except OSError:
+        model_id = model_path
+
+    try:
+        import torch
+
+        torch_version = torch.__version__
+    except ImportError:
+        torch_version = "none"
+
+    parts = [
+        platform.machine(),
+        platform.processor(),
+        str(available_cores()),
+        torch_version,
+        device or get_device(),
+        model_id,
+    ]
+    return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+
+def default_config(workers: int = None) -> RuntimeConfig:
+    """Split the available cores evenly between uvicorn workers."""
+    workers = max(1, workers or settings.WEB_CONCURRENCY)
+    threads = max(1, available_cores() // workers)
+    return RuntimeConfig(
+        torch_threads=threads, interop_threads=1, cv2_threads=threads, workers=workers
+    )
+
+
+def apply_config(config: RuntimeConfig) -> None:
+    """Apply a thread configuration to torch and OpenCV in this process."""
+    import cv2
+    import torch
+
+    torch.set_num_threads(config.torch_threads)
+    try:
+        # Only allowed before any inter-op parallel work has started.
+        torch.set_num_interop_threads(config.interop_threads)
+    except RuntimeError:
+        logger.warning("Inter-op thread count already fixed, leaving it unchanged")
+    cv2.setNumThreads(config.cv2_threads)
+
+
+def cache_key(fingerprint: str, workers: int) -> str:
+    """Cache entry for a host/model fingerprint at a worker count."""
+    return f"{fingerprint}:workers={workers}"
+
+
+def load_cached(path: str, fingerprint: str) -> Optional[RuntimeConfig]:
+    """Load a persisted config for this fingerprint, if any."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if data.get("version") != CACHE_VERSION:
+        return None
+    entry = data.get("entries", {}).get(fingerprint)
+    if entry is None:
+        return None
+    return RuntimeConfig(**entry["config"])
+
+
+def save_cached(path: str, fingerprint: str, config: RuntimeConfig, objective: str) -> None:
+    """Persist a tuned config, keeping entries for other fingerprints."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != CACHE_VERSION:
+            data = {}
+    except (OSError, ValueError):
+        data = {}
+
+    data["version"] = CACHE_VERSION
+    data.setdefault("entries", {})[fingerprint] = {
+        "config": asdict(config),
+        "objective": objective,
+        "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def _exclusive(lock_path: str, timeout: float = 600.0):
+    """Portable cross-process lock so parallel workers tune only once."""
+    os.makedirs(os.path.dirname(lock_path) or ".", exist_ok=True)
+    start = time.monotonic()
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                stale = time.time() - os.path.getmtime(lock_path) > timeout
+            except OSError:
+                stale = False
+            if stale:
+                try:
+                    os.remove(lock_path)
+                except OSError:
+                    pass
+            elif time.monotonic() - start > timeout:
+                raise TimeoutError(f"Timed out waiting for {lock_path}")
+            time.sleep(0.5)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        try:
+            os.remove(lock_path)
+        except OSError:
+            pass
+
+
+def candidate_configs(cores: int = None, workers: int = None) -> List[RuntimeConfig]:
+    """
+    Enumerate thread configurations to benchmark for a fixed worker count.
+
+    Each worker's even share of the cores is tried for torch intra-op
+    threads, along with half of it and a single thread (under-subscription
+    leaves room for decoding and the event loop), each with one or two
+    inter-op threads and with OpenCV on the full share or a single thread.
+    The even split (`default_config`) comes first.
+
+    Args:
+        cores: Cores to plan for (defaults to the available cores)
+        workers: Worker processes sharing them (defaults to WEB_CONCURRENCY)
+
+    Returns:
+        List of candidate configs
+    """
+    cores = cores or available_cores()
+    workers = max(1, workers or settings.WEB_CONCURRENCY)
+    share = max(1, cores // workers)
+
+    candidates = []
+    for torch_threads in sorted({share, max(1, share // 2), 1}, reverse=True):
+        for interop_threads in (1, 2):
+            for cv2_threads in sorted({share, 1}, reverse=True):
+                candidates.append(
+                    RuntimeConfig(
+                        torch_threads=torch_threads,
+                        interop_threads=interop_threads,
+                        cv2_threads=cv2_threads,
+                        workers=workers,
+                    )
+                )
+    return candidates
+
+
+def select_best(
+    candidates: List[RuntimeConfig],
+    objective: str = "throughput",
+    target_latency_ms: Optional[float] = None,
+) -> RuntimeConfig:
+    """
+    Pick the best measured candidate.
+
+    Args:
+        candidates: Configs with `measured` filled in
+        objective: "throughput" maximises images/s, "latency" minimises p95
+        target_latency_ms: Optional p95 budget; candidates over it are only
+            considered if none meet it
+
+    Returns:
+        Winning config
+    """
+    measured = [c for c in candidates if c.measured]
+    if not measured:
+        raise ValueError("No candidate produced measurements")
+
+    if target_latency_ms is not None:
+        within = [c for c in measured if c.measured["p95_latency_ms"] <= target_latency_ms]
+        measured = within or measured
+
+    if objective == "latency":
+        return min(
+            measured,
+            key=lambda c: (c.measured["p95_latency_ms"], -c.measured["images_per_s"]),
+        )
+    if objective == "throughput":
+        return max(
+            measured,
+            key=lambda c: (c.measured["images_per_s"], -c.measured["p95_latency_ms"]),
+        )
+    raise ValueError(f"Unknown autotune objective: {objective}")
+
+
+def _bench_worker(config: dict, duration_s: float, barrier, results) -> None:
+    """Benchmark loop run in a spawned process per simulated worker."""
+    import numpy as np
+
+    from app.inference.model import ModelWrapper
+
+    config = RuntimeConfig(**config)
+    apply_config(config)
+    wrapper = ModelWrapper()
+
+    # One frame per call, as /v1/predict serves it
+    rng = np.random.default_rng(0)
+    frames = [
+        rng.integers(0, 255, (settings.IMAGE_HEIGHT, settings.IMAGE_WIDTH, 3), dtype=np.uint8)
+    ]
+    for _ in range(2):
+        wrapper.predict_batch(frames)
+
+    barrier.wait()
+    latencies = []
+    images = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration_s:
+        t0 = time.perf_counter()
+        wrapper.predict_batch(frames)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        images += len(frames)
+    results.put((images, time.perf_counter() - start, latencies))
+
+
+def benchmark_config(config: RuntimeConfig, duration_s: float) -> Dict[str, float]:
+    """
+    Measure one configuration with `config.workers` concurrent processes.
+
+    Args:
+        config: Candidate to measure
+        duration_s: Timed run length per worker
+
+    Returns:
+        Dict with images_per_s and p95_latency_ms (latency of one prediction)
+    """
+    import multiprocessing
+
+    import numpy as np
+
+    ctx = multiprocessing.get_context("spawn")
+    barrier = ctx.Barrier(config.workers)
+    results = ctx.Queue()
+    payload = asdict(config)
+    payload["measured"] = {}
+
+    procs = [
+        ctx.Process(target=_bench_worker, args=(payload, duration_s, barrier, results))
+        for _ in range(config.workers)
+    ]
+    for proc in procs:
+        proc.start()
+
+    outputs = []
+    try:
+        for _ in procs:
+            outputs.append(results.get(timeout=duration_s + 300))
+    finally:
+        for proc in procs:
+            proc.join(timeout=10)
+            if proc.is_alive():
+                proc.terminate()
+
+    total_images = sum(o[0] for o in outputs)
+    elapsed = max(o[1] for o in outputs)
+    latencies = np.concatenate([np.asarray(o[2]) for o in outputs])
+    return {
+        "images_per_s": total_images / elapsed,
+        "p95_latency_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def tune(
+    objective: str = None,
+    target_latency_ms: Optional[float] = None,
+    duration_s: float = None,
+    candidates: List[RuntimeConfig] = None,
+) -> RuntimeConfig:
+    """
+    Benchmark candidates on this host and return the best.
+
+    Args:
+        objective: "throughput" or "latency" (defaults to settings)
+        target_latency_ms: Optional p95 budget (defaults to settings)
+        duration_s: Timed run length per candidate (defaults to settings)
+        candidates: Override the candidate list
+
+    Returns:
+        Winning config with measurements
+    """
+    objective = objective or settings.AUTOTUNE_OBJECTIVE
+    if target_latency_ms is None:
+        target_latency_ms = settings.AUTOTUNE_TARGET_LATENCY_MS
+    duration_s = duration_s or settings.AUTOTUNE_DURATION_S
+    candidates = candidates or candidate_configs()
+
+    for config in candidates:
+        try:
+            config.measured = benchmark_config(config, duration_s)
+        except Exception as e:
+            logger.warning(f"Autotune candidate {asdict(config)} failed: {e}")
+            continue
+        logger.info(
+            f"Autotune workers={config.workers} torch={config.torch_threads} "
+            f"interop={config.interop_threads} cv2={config.cv2_threads}: "
+            f"{config.measured['images_per_s']:.1f} img/s, "
+            f"p95 {config.measured['p95_latency_ms']:.1f} ms"
+        )
+
+    return select_best(candidates, objective, target_latency_ms)
+
+
+def configure_runtime() -> RuntimeConfig:
+    """
+    Resolve and apply the thread configuration for this process.
+
+    Order of precedence: explicit `TORCH_NUM_THREADS` / `TORCH_INTEROP_THREADS` /
+    `CV2_NUM_THREADS` settings, then a persisted tuned config for this host,
+    then a fresh tune if `AUTOTUNE_ENABLED`, then an even split of the cores
+    across `WEB_CONCURRENCY` workers. Tuned configs are cached per worker
+    count, so changing `WEB_CONCURRENCY` tunes again.
+
+    Returns:
+        The applied config
+    """
+    key = cache_key(host_fingerprint(), settings.WEB_CONCURRENCY)
+    cache_path = settings.AUTOTUNE_CACHE_PATH
+
+    config = load_cached(cache_path, key)
+    if config is None and settings.AUTOTUNE_ENABLED:
+        try:
+            with _exclusive(f"{cache_path}.lock"):
+                # Another worker may have finished tuning while we waited.
+                config = load_cached(cache_path, key)
+                if config is None:
+                    logger.info("Auto-tuning runtime configuration, this may take a while...")
+                    try:
+                        config = tune()
+                        save_cached(cache_path, key, config, settings.AUTOTUNE_OBJECTIVE)
+                    except Exception as e:
+                        logger.warning(f"Auto-tuning failed, using defaults: {e}")
+        except TimeoutError as e:
+            logger.warning(f"Gave up waiting for another worker's auto-tune, using defaults: {e}")
+    if config is None:
+        config = default_config()
+
+    if settings.TORCH_NUM_THREADS is not None:
+        config.torch_threads = settings.TORCH_NUM_THREADS
+    if settings.TORCH_INTEROP_THREADS is not None:
+        config.interop_threads = settings.TORCH_INTEROP_THREADS
+    if settings.CV2_NUM_THREADS is not None:
+        config.cv2_threads = settings.CV2_NUM_THREADS
+
+    apply_config(config)
+    global _runtime_config
+    _runtime_config = config
+    return config
+
+
+# Config applied to this process
+_runtime_config: Optional[RuntimeConfig] = None
+
+
+def get_runtime_config() -> RuntimeConfig:
+    """Get the config applied at startup (or the untuned default)."""
+    return _runtime_config or default_config()
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Auto-tune thread counts for this host")
+    parser.add_argument(
+        "--objective", type=str, default=None, choices=["throughput", "latency"]
+    )
+    parser.add_argument("--target-latency-ms", type=float, default=None)
+    parser.add_argument("--duration", type=float, default=None, help="Seconds per candidate")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: WEB_CONCURRENCY)"
+    )
+    parser.add_argument(
+        "--print",
+        dest="print_field",
+        type=str,
+        default=None,
+        choices=["torch_threads", "interop_threads", "cv2_threads"],
+        help="Print a single field of the (cached or tuned) config and exit",
+    )
+    parser.add_argument("--force", action="store_true", help="Re-tune even if cached")
+    args = parser.parse_args()
+
+    workers = args.workers or settings.WEB_CONCURRENCY
+    key = cache_key(host_fingerprint(), workers)
+    config = None if args.force else load_cached(settings.AUTOTUNE_CACHE_PATH, key)
+    if config is None:
+        objective = args.objective or settings.AUTOTUNE_OBJECTIVE
+        candidates = candidate_configs(workers=workers)
+        config = tune(objective, args.target_latency_ms, args.duration, candidates)
+        save_cached(settings.AUTOTUNE_CACHE_PATH, key, config, objective)
+
+    if args.print_field:
+        print(getattr(config, args.print_field))
+    else:
+        print(json.dumps(asdict(config), indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,117 @@
+"""
+Two-tier confidence cascade. `get_cascade()` holds the process-wide instance.
+
+Most frames are easy: an obvious live face or an obvious screen. A cheap model
+(smaller, lower resolution, e.g. a distilled or pruned student) runs on every
+frame, and its answer is kept when every face it finds is confidently
+classified. The frame is re-run through the full model when
+
+- a face's confidence falls in the uncertainty band `[low, high)`, or
+- no face is found at or above `low`.
+
+Faces the fast tier keeps are at or above `high`, so `high` should not be
+below `CONFIDENCE_THRESHOLD`.
+"""
+
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.inference.model import ModelWrapper, get_model
+
+FAST_TIER = "fast"
+FULL_TIER = "full"
+
+
+class ModelCascade:
+    """Fast model first, escalating uncertain frames to the full model."""
+
+    def __init__(self, fast: ModelWrapper, full: ModelWrapper, low: float, high: float):
+        """
+        Args:
+            fast: Cheap model run on every frame
+            full: Full model for escalated frames
+            low: Lower edge of the uncertainty band; weaker boxes are not faces
+            high: Upper edge; faces at or above it are decided by the fast tier
+        """
+        if not 0.0 <= low <= high <= 1.0:
+            raise ValueError(f"Invalid uncertainty band [{low}, {high})")
+        self.fast = fast
+        self.full = full
+        self.low = low
+        self.high = high
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.fast_decided = 0
+        self.escalated_uncertain = 0
+        self.escalated_no_face = 0
+
+    def _escalation_reason(self, detections: np.ndarray) -> Optional[str]:
+        confidences = detections[:, 4]
+        if not np.any(confidences >= self.low):
+            return "no_face"
+        if np.any((confidences >= self.low) & (confidences < self.high)):
+            return "uncertain"
+        return None
+
+    def predict(self, image, **kwargs) -> Tuple[List[np.ndarray], str]:
+        """
+        Run the cascade on one image.
+
+        Args:
+            image: Preprocessed image array
+            **kwargs: Passed to the full model's predict
+
+        Returns:
+            (per-image detection arrays as from `ModelWrapper.predict`, deciding tier)
+        """
+        results = self.fast.predict(image, conf=self.low)
+        reason = self._escalation_reason(results[0])
+        if reason is not None:
+            results = self.full.predict(image, **kwargs)
+
+        with self._lock:
+            self.frames += 1
+            if reason is None:
+                self.fast_decided += 1
+            elif reason == "uncertain":
+                self.escalated_uncertain += 1
+            else:
+                self.escalated_no_face += 1
+        return results, FAST_TIER if reason is None else FULL_TIER
+
+    def stats(self) -> dict:
+        """Snapshot of per-tier hit counts and rates for the metrics endpoint."""
+        with self._lock:
+            frames = self.frames
+            fast = self.fast_decided
+            uncertain = self.escalated_uncertain
+            no_face = self.escalated_no_face
+        return {
+            "frames": frames,
+            "fast_decided": fast,
+            "escalated_uncertain": uncertain,
+            "escalated_no_face": no_face,
+            "fast_hit_rate": fast / frames if frames else None,
+            "full_hit_rate": (uncertain + no_face) / frames if frames else None,
+            "uncertainty_band": [self.low, self.high],
+        }
+
+
+# Global cascade instance
+_cascade: Optional[ModelCascade] = None
+
+
+def get_cascade() -> Optional[ModelCascade]:
+    """Get the global cascade, or None when CASCADE_ENABLED is off."""
+    global _cascade
+    if _cascade is None and settings.CASCADE_ENABLED:
+        _cascade = ModelCascade(
+            ModelWrapper(settings.CASCADE_FAST_MODEL_PATH, imgsz=settings.CASCADE_FAST_IMGSZ),
+            get_model(),
+            low=settings.CASCADE_UNCERTAIN_LOW,
+            high=settings.CASCADE_UNCERTAIN_HIGH,
+        )
+    return _cascade
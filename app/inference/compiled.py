@@ -0,0 +1,178 @@
+"""
+Compiled PyTorch execution path for `ModelWrapper`.
+
+By default the fused model runs eagerly. With `MODEL_COMPILE` set to `trace`
+or `compile`, it is instead specialised for static channels-last input shapes:
+
+- `trace`: one frozen TorchScript trace per shape, saved under
+  `MODEL_COMPILE_CACHE_DIR` keyed by model content, torch version, device and
+  shape, so later starts just load it.
+- `compile`: `torch.compile` without dynamic shapes (one graph per shape);
+  Inductor's on-disk cache is pointed at the same directory.
+
+`ModelWrapper` letterboxes a frame to the smallest stride-aligned shape that
+fits it at `imgsz`, so a 640x480 camera at imgsz 640 runs at 640x480 rather
+than 640x640. Shapes for `MODEL_COMPILE_FRAME_SIZES` are compiled and warmed
+up at load time; other shapes are specialised on first use, up to
+`MAX_SHAPES`, after which they run eagerly. Any compilation failure leaves the
+wrapper on the eager path.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import warnings
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import torch
+import torch.nn as nn
+
+from app.inference.decoder import input_shape
+from app.inference.manifest import file_digest
+
+logger = logging.getLogger(__name__)
+
+COMPILE_MODES = ("trace", "compile")
+MAX_SHAPES = 8
+
+
+def parse_frame_sizes(value: str) -> List[Tuple[int, int]]:
+    """Parse "640x480,1280x720" into [(640, 480), (1280, 720)]."""
+    sizes = []
+    for item in value.split(","):
+        if item.strip():
+            width, height = item.lower().split("x")
+            sizes.append((int(width), int(height)))
+    return sizes
+
+
+class _DecodedOutput(nn.Module):
+    """Return only the decoded (B, 4 + nc, anchors) tensor of a detection model."""
+
+    def __init__(self, model: nn.Module):
+        super().__init__()
+        self.model = model
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        out = self.model(x)
+        return out[0] if isinstance(out, (tuple, list)) else out
+
+
+class CompiledRunner:
+    """Static-shape compiled forward pass for one fused PyTorch detection model."""
+
+    def __init__(
+        self,
+        module: nn.Module,
+        model_path: str,
+        imgsz: int,
+        stride: int,
+        device: str,
+        mode: str = "trace",
+        cache_dir: str = "cache/compiled",
+        frame_sizes: Iterable[Tuple[int, int]] = (),
+    ):
+        """
+        Args:
+            module: Fused, eval-mode, channels-last detection model
+            model_path: Checkpoint path, used for the cache key
+            imgsz: Inference size (long side of the letterboxed input)
+            stride: Model stride the input shapes are aligned to
+            device: Torch device string
+            mode: "trace" or "compile"
+            cache_dir: Directory for compiled artifacts
+            frame_sizes: (width, height) of expected frames, compiled up front
+        """
+        if mode not in COMPILE_MODES:
+            raise ValueError(f"Unknown compile mode: {mode}")
+        self.mode = mode
+        self.device = torch.device(device)
+        self._cache_dir = cache_dir
+        self._digest = file_digest(model_path)
+        self._lock = threading.Lock()
+        self._forwards: Dict[Tuple[int, int], Callable] = {}
+
+        self._module = _DecodedOutput(module)
+        self._compiled = self._compile(self._module) if mode == "compile" else None
+
+        shapes = {(imgsz, imgsz)} | {input_shape(h, w, imgsz, stride) for w, h in frame_sizes}
+        for shape in sorted(shapes):
+            self._warmup(shape)
+
+    def _cache_key(self, shape: Tuple[int, int]) -> str:
+        parts = [
+            self._digest,
+            torch.__version__,
+            str(self.device),
+            f"1x3x{shape[0]}x{shape[1]}",
+            "channels_last",
+        ]
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()[:16]
+
+    def _example(self, shape: Tuple[int, int]) -> torch.Tensor:
+        x = torch.zeros(1, 3, *shape, device=self.device)
+        return x.contiguous(memory_format=torch.channels_last)
+
+    def _trace(self, shape: Tuple[int, int]):
+        path = os.path.join(self._cache_dir, f"{self._cache_key(shape)}.torchscript")
+        if os.path.exists(path):
+            try:
+                loaded = torch.jit.load(path, map_location=self.device)
+                logger.info("Loaded compiled model for %s from %s", shape, path)
+                return loaded
+            except Exception as e:
+                logger.warning("Ignoring unreadable compiled model %s: %s", path, e)
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with torch.no_grad(), warnings.catch_warnings():
+            # TracerWarnings about shape-dependent branches, TorchScript deprecation notices
+            warnings.simplefilter("ignore")
+            traced = torch.jit.trace(self._module, self._example(shape), check_trace=False)
+            traced = torch.jit.freeze(traced.eval())
+            torch.jit.save(traced, tmp_path)
+        os.replace(tmp_path, path)
+        logger.info("Traced model for input %s, cached at %s", shape, path)
+        return traced
+
+    def _compile(self, module: nn.Module):
+        # Inductor reads this when it first needs its cache directory.
+        os.environ.setdefault(
+            "TORCHINDUCTOR_CACHE_DIR", os.path.abspath(os.path.join(self._cache_dir, "inductor"))
+        )
+        return torch.compile(module, dynamic=False)
+
+    def _warmup(self, shape: Tuple[int, int], runs: int = 2) -> Callable:
+        """Specialise for `shape` and run it so compilation happens now."""
+        forward = self._compiled if self._compiled is not None else self._trace(shape)
+        with torch.inference_mode():
+            for _ in range(runs):
+                forward(self._example(shape))
+        self._forwards[shape] = forward
+        return forward
+
+    def _forward_for(self, shape: Tuple[int, int]) -> Callable:
+        forward = self._forwards.get(shape)
+        if forward is not None:
+            return forward
+        with self._lock:
+            if shape in self._forwards:
+                return self._forwards[shape]
+            if len(self._forwards) >= MAX_SHAPES:
+                return self._module
+            logger.info("Compiling model for new input shape %s", shape)
+            return self._warmup(shape)
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        """
+        Forward a channels-last (B, 3, H, W) batch.
+
+        Returns:
+            Raw (B, 4 + nc, anchors) predictions
+        """
+        forward = self._forward_for(tuple(x.shape[2:]))
+        if x.shape[0] == 1 or self._compiled is not None:
+            return forward(x)
+        # Traces are specialised for batch 1.
+        return torch.cat([forward(x[i : i + 1]) for i in range(x.shape[0])])
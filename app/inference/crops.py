@@ -0,0 +1,304 @@
+"""
+Crop-level liveness mode. `get_crop_pipeline()` holds the process-wide instance.
+
+The detector spends most of its compute finding faces in a full frame, while
+the question is REAL or FAKE per face. In this mode a cheap localiser finds
+the faces and a compact classifier labels each face crop at low resolution
+(e.g. 128 px):
+
+- Localisers: "detector" runs a detector (the serving model by default) at
+  a small input size and keeps only its boxes; "haar" uses OpenCV's
+  frontal-face Haar cascade (OpenCV 4.x builds).
+- Within a session (X-Session-Id), the previous frame's boxes are reused for
+  up to `CROP_REUSE_FRAMES` frames before the localiser runs again.
+- Crops are squares of `CROP_MARGIN` times the longer box side, cut by
+  `crop_faces`, which `training/train_crops.py` also uses to build the
+  training set from the YOLO labels.
+
+`CropPipeline.predict` returns (N, 6) arrays like `ModelWrapper.predict`,
+with the classifier's label mapped onto the serving `CLASS_NAMES`, so the
+response format is unchanged.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import torch
+
+from app.core.config import get_device, settings
+from app.inference.model import ModelWrapper
+from app.inference.postprocessor import CLASS_NAMES
+
+CROP_TIER = "crop"
+# Fill for crop areas outside the frame, as in letterboxing
+PAD_VALUE = 114
+
+
+def square_boxes(boxes: np.ndarray, margin: float) -> np.ndarray:
+    """Squares centred on each x1, y1, x2, y2 box, `margin` times its longer side."""
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    centres = (boxes[:, :2] + boxes[:, 2:]) / 2
+    half = (boxes[:, 2:] - boxes[:, :2]).max(axis=1, keepdims=True) * margin / 2
+    return np.hstack([centres - half, centres + half])
+
+
+def crop_faces(image: np.ndarray, boxes: np.ndarray, imgsz: int, margin: float) -> np.ndarray:
+    """
+    Cut a square crop around each face and resize it for the classifier.
+
+    Args:
+        image: HWC uint8 frame (any channel order; crops keep it)
+        boxes: (N, 4) x1, y1, x2, y2 face boxes in frame pixels
+        imgsz: Crop side in pixels
+        margin: Crop side as a multiple of the longer box side
+
+    Returns:
+        (N, imgsz, imgsz, 3) uint8 crops; parts outside the frame are padded
+    """
+    height, width = image.shape[:2]
+    squares = np.round(square_boxes(boxes, margin)).astype(int)
+    crops = np.empty((len(squares), imgsz, imgsz, 3), dtype=np.uint8)
+    for i, (x1, y1, x2, y2) in enumerate(squares):
+        side = max(1, x2 - x1)
+        canvas = np.full((side, side, 3), PAD_VALUE, dtype=np.uint8)
+        sx1, sy1, sx2, sy2 = max(0, x1), max(0, y1), min(width, x2), min(height, y2)
+        if sx2 > sx1 and sy2 > sy1:
+            canvas[sy1 - y1 : sy2 - y1, sx1 - x1 : sx2 - x1] = image[sy1:sy2, sx1:sx2]
+        interpolation = cv2.INTER_AREA if side > imgsz else cv2.INTER_LINEAR
+        crops[i] = cv2.resize(canvas, (imgsz, imgsz), interpolation=interpolation)
+    return crops
+
+
+class CropClassifier:
+    """REAL/FAKE classifier for face crops (an Ultralytics classification model)."""
+
+    def __init__(self, model_path: str, imgsz: Optional[int] = None):
+        """
+        Args:
+            model_path: Classification checkpoint or exported artifact
+            imgsz: Crop size. Defaults to the size the model was trained at, then 128.
+        """
+        from ultralytics.nn.autobackend import AutoBackend
+
+        self.model_path = model_path
+        self._device = get_device()
+        self._backend = AutoBackend(
+            model_path, device=torch.device(self._device), fp16=False, fuse=True, verbose=False
+        )
+        self._backend.eval()
+        self.names = {int(i): str(n).lower() for i, n in self._backend.names.items()}
+        self.imgsz = int(imgsz or self._trained_imgsz() or 128)
+
+    def _trained_imgsz(self) -> Optional[int]:
+        args = getattr(getattr(self._backend, "model", None), "args", None)
+        imgsz = args.get("imgsz") if isinstance(args, dict) else None
+        imgsz = imgsz or (getattr(self._backend, "metadata", None) or {}).get("imgsz")
+        if isinstance(imgsz, (list, tuple)):
+            imgsz = max(imgsz)
+        return int(imgsz) if imgsz else None
+
+    def classify(self, crops: np.ndarray) -> np.ndarray:
+        """Class probabilities (N, classes) for (N, imgsz, imgsz, 3) RGB uint8 crops."""
+        if not len(crops):
+            return np.zeros((0, len(self.names)), dtype=np.float32)
+        x = torch.from_numpy(np.ascontiguousarray(crops)).to(self._device)
+        x = x.permute(0, 3, 1, 2).float().div_(255)
+        with torch.inference_mode():
+            probs = self._backend(x)
+        if isinstance(probs, (list, tuple)):  # (probs, logits) on newer Ultralytics
+            probs = probs[0]
+        return torch.as_tensor(probs).float().cpu().numpy()
+
+
+class DetectorLocaliser:
+    """Face boxes from a detector run at a small input size; its labels are ignored."""
+
+    def __init__(self, model_path: str, imgsz: int, conf: float):
+        self.model = ModelWrapper(model_path, imgsz=imgsz)
+        self.conf = conf
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        (result,) = self.model.predict(image)
+        return result[result[:, 4] >= self.conf, :4]
+
+
+class HaarLocaliser:
+    """Face boxes from OpenCV's frontal-face Haar cascade on a downscaled frame."""
+
+    def __init__(self, width: int = 320, box_scale: float = 1.25):
+        """
+        Args:
+            width: Frames are downscaled to this width before detection
+            box_scale: Haar boxes are tighter than the training labels; grow them by this
+        """
+        if not hasattr(cv2, "CascadeClassifier"):
+            raise RuntimeError("This OpenCV build has no Haar cascades; use the detector localiser")
+        self.path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+        self.width = width
+        self.box_scale = box_scale
+        # CascadeClassifier is not thread-safe; one per inference thread
+        self._local = threading.local()
+
+    def __call__(self, image: np.ndarray) -> np.ndarray:
+        cascade = getattr(self._local, "cascade", None)
+        if cascade is None:
+            cascade = self._local.cascade = cv2.CascadeClassifier(self.path)
+        scale = min(1.0, self.width / image.shape[1])
+        gray = cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        if scale < 1.0:
+            gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        faces = cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(24, 24))
+        if not len(faces):
+            return np.zeros((0, 4), dtype=np.float64)
+        x, y, w, h = (np.asarray(faces, dtype=np.float64) / scale).T
+        cx, cy = x + w / 2, y + h / 2
+        w, h = w * self.box_scale, h * self.box_scale
+        return np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+
+class CropPipeline:
+    """Localise faces (or reuse the session's last boxes), then classify each crop."""
+
+    def __init__(
+        self,
+        classifier: CropClassifier,
+        localiser,
+        margin: float = 1.3,
+        reuse_frames: int = 0,
+        max_sessions: int = 10000,
+    ):
+        """
+        Args:
+            classifier: Crop classifier
+            localiser: Callable returning (N, 4) face boxes for an RGB frame
+            margin: Crop side as a multiple of the longer box side
+            reuse_frames: Frames per session that reuse the last localised boxes
+            max_sessions: Sessions whose boxes are remembered (least recent dropped)
+        """
+        self.classifier = classifier
+        self.localiser = localiser
+        self.margin = margin
+        self.reuse_frames = reuse_frames
+        self.max_sessions = max_sessions
+        self._class_ids = self._map_classes(classifier.names)
+        self._lock = threading.Lock()
+        # session ID -> (boxes, frames served from them)
+        self._boxes: "OrderedDict[str, Tuple[np.ndarray, int]]" = OrderedDict()
+
+        self.frames = 0
+        self.localised = 0
+        self.reused = 0
+        self.faces = 0
+
+    @staticmethod
+    def _map_classes(names: Dict[int, str]) -> np.ndarray:
+        """Classifier class index -> serving class index (see CLASS_NAMES)."""
+        serving = {name: cls for cls, name in CLASS_NAMES.items()}
+        missing = set(serving) - set(names.values())
+        if missing:
+            raise ValueError(f"Crop classifier has no class for {sorted(missing)}: {names}")
+        return np.array([serving.get(names[i], -1) for i in range(len(names))])
+
+    def _cached_boxes(self, session_id: Optional[str]) -> Optional[np.ndarray]:
+        if session_id is None or self.reuse_frames <= 0:
+            return None
+        with self._lock:
+            entry = self._boxes.get(session_id)
+            if entry is None or entry[1] >= self.reuse_frames:
+                return None
+            self._boxes[session_id] = (entry[0], entry[1] + 1)
+            self._boxes.move_to_end(session_id)
+            self.reused += 1
+            return entry[0]
+
+    def _remember(self, session_id: Optional[str], boxes: np.ndarray) -> None:
+        if session_id is None or self.reuse_frames <= 0:
+            return
+        with self._lock:
+            self._boxes[session_id] = (boxes, 0)
+            self._boxes.move_to_end(session_id)
+            while len(self._boxes) > self.max_sessions:
+                self._boxes.popitem(last=False)
+
+    def localise(self, image: np.ndarray, session_id: Optional[str] = None) -> np.ndarray:
+        """Face boxes for a frame: the session's last boxes if still fresh, else localised."""
+        boxes = self._cached_boxes(session_id)
+        if boxes is None:
+            boxes = np.asarray(self.localiser(image), dtype=np.float64).reshape(-1, 4)
+            with self._lock:
+                self.localised += 1
+            self._remember(session_id, boxes)
+        return boxes
+
+    def classify(self, image: np.ndarray, boxes: np.ndarray) -> np.ndarray:
+        """(N, 6) x1, y1, x2, y2, confidence, serving class for the given face boxes."""
+        probs = self.classifier.classify(
+            crop_faces(image, boxes, self.classifier.imgsz, self.margin)
+        )
+        best = probs.argmax(axis=1) if len(probs) else np.zeros(0, dtype=int)
+        result = np.zeros((len(boxes), 6), dtype=np.float32)
+        result[:, :4] = boxes
+        result[:, 4] = probs[np.arange(len(best)), best] if len(best) else 0.0
+        result[:, 5] = self._class_ids[best]
+        return result
+
+    def predict(self, image: np.ndarray, session_id: Optional[str] = None) -> List[np.ndarray]:
+        """
+        Run crop-level liveness on one RGB frame.
+
+        Returns:
+            One (N, 6) array, as `ModelWrapper.predict` returns
+        """
+        boxes = self.localise(image, session_id)
+        result = self.classify(image, boxes)
+        with self._lock:
+            self.frames += 1
+            self.faces += len(result)
+        return [result]
+
+    def stats(self) -> dict:
+        """Frame and localiser counters for the metrics endpoint."""
+        with self._lock:
+            return {
+                "frames": self.frames,
+                "faces": self.faces,
+                "localised": self.localised,
+                "reused": self.reused,
+                "reuse_rate": self.reused / self.frames if self.frames else None,
+                "sessions": len(self._boxes),
+            }
+
+
+def build_localiser():
+    """The localiser configured by CROP_LOCALISER."""
+    if settings.CROP_LOCALISER == "detector":
+        return DetectorLocaliser(
+            settings.CROP_LOCALISER_MODEL_PATH or settings.MODEL_PATH,
+            imgsz=settings.CROP_LOCALISER_IMGSZ,
+            conf=settings.CROP_LOCALISER_CONF,
+        )
+    if settings.CROP_LOCALISER == "haar":
+        return HaarLocaliser(settings.CROP_LOCALISER_WIDTH, settings.CROP_HAAR_BOX_SCALE)
+    raise ValueError(
+        f"Unknown CROP_LOCALISER {settings.CROP_LOCALISER!r}, expected detector or haar"
+    )
+
+
+# Global crop pipeline instance
+_pipeline: Optional[CropPipeline] = None
+
+
+def get_crop_pipeline() -> Optional[CropPipeline]:
+    """Get the global crop pipeline, or None when CROP_MODE_ENABLED is off."""
+    global _pipeline
+    if _pipeline is None and settings.CROP_MODE_ENABLED:
+        _pipeline = CropPipeline(
+            CropClassifier(settings.CROP_CLASSIFIER_PATH, imgsz=settings.CROP_CLASSIFIER_IMGSZ),
+            build_localiser(),
+            margin=settings.CROP_MARGIN,
+            reuse_frames=settings.CROP_REUSE_FRAMES,
+        )
+    return _pipeline
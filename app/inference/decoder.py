@@ -0,0 +1,167 @@
+"""
+Native YOLOv8 pre/post-processing: letterbox, output decoding and NMS.
+
+Works on the raw `(B, 4 + nc, anchors)` head output of any backend (PyTorch,
+TorchScript, ONNX Runtime, OpenVINO), for any batch size, without building
+Ultralytics `Results`/`Boxes` objects:
+
+1. candidates above the confidence threshold are selected for the whole batch
+   at once and boxes converted from xywh to xyxy,
+2. one class-aware NMS call covers every image and class (boxes are offset by
+   image and class so they never suppress each other),
+3. boxes are mapped back from the letterboxed input to the original frame.
+
+The selection rules follow Ultralytics' `non_max_suppression` so results are
+the same as `YOLO.predict` (see tests/test_decoder.py).
+"""
+
+from typing import List, Sequence, Tuple
+
+import cv2
+import numpy as np
+import torch
+
+# Per-(image, class) box offset; larger than any input side.
+MAX_WH = 7680
+# Candidates kept per image before NMS.
+MAX_NMS = 30000
+
+
+def input_shape(height: int, width: int, imgsz: int, stride: int = 32) -> Tuple[int, int]:
+    """
+    Smallest stride-aligned (H, W) that fits a frame resized to `imgsz`.
+
+    Matches Ultralytics' rect letterbox (`auto=True`).
+    """
+    r = min(imgsz / height, imgsz / width)
+    new_h, new_w = int(round(height * r)), int(round(width * r))
+    return new_h + (imgsz - new_h) % stride, new_w + (imgsz - new_w) % stride
+
+
+def letterbox(image: np.ndarray, shape: Tuple[int, int]) -> np.ndarray:
+    """Resize keeping aspect ratio and pad (grey, centred) to `shape` (H, W)."""
+    h, w = image.shape[:2]
+    r = min(shape[0] / h, shape[1] / w)
+    new_w, new_h = int(round(w * r)), int(round(h * r))
+    if (new_w, new_h) != (w, h):
+        image = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    dw, dh = (shape[1] - new_w) / 2, (shape[0] - new_h) / 2
+    top, bottom = int(round(dh - 0.1)), int(round(dh + 0.1))
+    left, right = int(round(dw - 0.1)), int(round(dw + 0.1))
+    return cv2.copyMakeBorder(
+        image, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114)
+    )
+
+
+def to_tensor(padded: Sequence[np.ndarray], device="cpu") -> torch.Tensor:
+    """
+    Stack letterboxed HWC uint8 frames into a normalised BCHW float tensor.
+
+    Channels are reversed the same way the Ultralytics predictor does for
+    array input.
+    """
+    batch = np.stack(padded)[..., ::-1].transpose(0, 3, 1, 2)
+    x = torch.from_numpy(np.ascontiguousarray(batch)).to(device)
+    return x.float().div_(255.0)
+
+
+def _nms(boxes: torch.Tensor, scores: torch.Tensor, iou_threshold: float) -> torch.Tensor:
+    """Indices kept by greedy NMS, in descending score order."""
+    try:
+        import torchvision
+
+        return torchvision.ops.nms(boxes, scores, iou_threshold)
+    except ImportError:
+        pass
+
+    order = scores.argsort(descending=True)
+    boxes = boxes[order]
+    area = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    tl = torch.maximum(boxes[:, None, :2], boxes[None, :, :2])
+    br = torch.minimum(boxes[:, None, 2:], boxes[None, :, 2:])
+    inter = (br - tl).clamp(min=0).prod(dim=2)
+    iou = inter / (area[:, None] + area[None, :] - inter + 1e-9)
+
+    keep = torch.ones(len(order), dtype=torch.bool, device=scores.device)
+    for i in range(len(order)):
+        if keep[i]:
+            keep[i + 1 :] &= iou[i, i + 1 :] <= iou_threshold
+    return order[keep]
+
+
+def decode(
+    preds,
+    conf: float = 0.25,
+    iou: float = 0.7,
+    max_det: int = 300,
+) -> List[torch.Tensor]:
+    """
+    Decode raw head output into detections.
+
+    Args:
+        preds: (B, 4 + nc, anchors) tensor or array, boxes as xywh in input pixels
+        conf: Confidence threshold
+        iou: NMS IoU threshold
+        max_det: Maximum detections per image
+
+    Returns:
+        Per image, an (N, 6) float tensor of x1, y1, x2, y2, confidence, class
+        in letterboxed input coordinates, sorted by confidence
+    """
+    if isinstance(preds, (list, tuple)):
+        preds = preds[0]
+    preds = torch.as_tensor(preds).float()
+    batch_size = preds.shape[0]
+
+    x = preds.transpose(1, 2)  # (B, A, 4 + nc)
+    scores, classes = x[..., 4:].max(dim=2)
+    image_idx, anchor_idx = torch.nonzero(scores > conf, as_tuple=True)
+
+    candidates = x[image_idx, anchor_idx]
+    scores = scores[image_idx, anchor_idx]
+    classes = classes[image_idx, anchor_idx]
+
+    # Cap candidates per image by confidence (rarely hit).
+    counts = torch.bincount(image_idx, minlength=batch_size)
+    if batch_size and int(counts.max()) > MAX_NMS:
+        order = torch.argsort(scores, descending=True)
+        order = order[torch.argsort(image_idx[order], stable=True)]
+        rank = torch.arange(len(order), device=scores.device) - torch.repeat_interleave(
+            torch.cumsum(counts, 0) - counts, counts
+        )
+        keep = order[rank < MAX_NMS]
+        candidates, scores, classes, image_idx = (
+            candidates[keep], scores[keep], classes[keep], image_idx[keep]
+        )
+
+    xy, wh = candidates[:, :2], candidates[:, 2:4]
+    boxes = torch.cat([xy - wh / 2, xy + wh / 2], dim=1)
+
+    nc = x.shape[2] - 4
+    offsets = (image_idx * nc + classes).to(boxes.dtype)[:, None] * MAX_WH
+    keep = _nms(boxes + offsets, scores, iou)
+
+    detections = torch.cat([boxes, scores[:, None], classes[:, None].to(boxes.dtype)], dim=1)
+    kept_images = image_idx[keep]
+    return [detections[keep[kept_images == b][:max_det]] for b in range(batch_size)]
+
+
+def scale_boxes(
+    detections: torch.Tensor, shape: Tuple[int, int], original_shape: Tuple[int, int]
+) -> torch.Tensor:
+    """
+    Map boxes from the letterboxed `shape` (H, W) back onto the original frame.
+
+    Modifies and returns `detections`; boxes are clipped to the frame.
+    """
+    h0, w0 = original_shape[:2]
+    gain = min(shape[0] / h0, shape[1] / w0)
+    # Each side was rounded separately by the letterbox.
+    new_h, new_w = round(h0 * gain), round(w0 * gain)
+    pad_w = round((shape[1] - new_w) / 2 - 0.1)
+    pad_h = round((shape[0] - new_h) / 2 - 0.1)
+
+    boxes = detections[:, :4]
+    boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - pad_w) * (w0 / new_w)).clamp(0, w0)
+    boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - pad_h) * (h0 / new_h)).clamp(0, h0)
+    return detections
@@ -0,0 +1,132 @@
+"""
+Export manifest: which exported artifact the backend should serve.
+
+`training/export_models.py` exports the checkpoint to several formats and
+sizes, checks each artifact against the `.pt` and benchmarks it on the host,
+then writes a manifest next to the model naming the fastest artifact that
+passed the parity check. At startup `ModelWrapper` serves that artifact
+instead of `MODEL_PATH`, as long as the manifest was built from the same
+checkpoint (compared by content digest).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def select_fastest(artifacts: List[Dict]) -> Optional[Dict]:
+    """The artifact with the lowest median latency among those that passed parity."""
+    passed = [a for a in artifacts if a.get("parity", {}).get("passed") and a.get("latency")]
+    if not passed:
+        return None
+    return min(passed, key=lambda a: a["latency"]["median_ms"])
+
+
+def write_manifest(
+    path: str, source: str, artifacts: List[Dict], host: Optional[str] = None
+) -> Dict:
+    """
+    Write the manifest, selecting the fastest passing artifact.
+
+    Artifact paths are stored relative to the manifest so the model directory
+    can be moved or mounted elsewhere.
+
+    Returns:
+        The manifest dict
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    entries = []
+    for artifact in artifacts:
+        entry = dict(artifact)
+        entry["path"] = os.path.relpath(os.path.abspath(artifact["path"]), base)
+        entries.append(entry)
+
+    selected = select_fastest(entries)
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "source": os.path.relpath(os.path.abspath(source), base),
+        "source_sha256": file_digest(source),
+        "host": host,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "selected": selected["path"] if selected else None,
+        "artifacts": entries,
+    }
+
+    os.makedirs(base, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+    return manifest
+
+
+def load_manifest(path: str) -> Optional[Dict]:
+    """Load a manifest, or None if missing, unreadable or of another version."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != MANIFEST_VERSION:
+        return None
+    return data
+
+
+def resolve_artifact(
+    model_path: Optional[str] = None, manifest_path: Optional[str] = None
+) -> Tuple[str, Optional[int]]:
+    """
+    Pick the model file to serve.
+
+    Args:
+        model_path: Checkpoint (defaults to settings.MODEL_PATH)
+        manifest_path: Manifest (defaults to settings.MODEL_MANIFEST_PATH)
+
+    Returns:
+        (path to load, artifact input size or None to use the checkpoint's)
+    """
+    model_path = model_path or settings.MODEL_PATH
+    manifest_path = settings.MODEL_MANIFEST_PATH if manifest_path is None else manifest_path
+    if not manifest_path:
+        return model_path, None
+
+    manifest = load_manifest(manifest_path)
+    if manifest is None or not manifest.get("selected"):
+        return model_path, None
+
+    try:
+        stale = manifest.get("source_sha256") != file_digest(model_path)
+    except OSError:
+        stale = True
+    if stale:
+        logger.warning(
+            "Export manifest %s was built from another model, ignoring it", manifest_path
+        )
+        return model_path, None
+
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    entry = next(a for a in manifest["artifacts"] if a["path"] == manifest["selected"])
+    artifact_path = os.path.join(base, entry["path"])
+    if not os.path.exists(artifact_path):
+        logger.warning("Selected artifact %s is missing, serving %s", artifact_path, model_path)
+        return model_path, None
+
+    return artifact_path, entry.get("imgsz")
@@ -1,32 +1,76 @@
 """
-YOLO model wrapper with singleton pattern.
+YOLO model wrapper. `get_model()` holds the process-wide instance.
+
+Inference runs natively (see `decoder.py`): frames are letterboxed, stacked
+into one batch, forwarded through the fused PyTorch model (eager or compiled)
+or the exported artifact's runtime, and decoded with a single batched NMS
+into (N, 6) arrays of x1, y1, x2, y2, confidence, class in frame pixels.
 """
 
-from typing import Optional
+import logging
+import math
+import os
+from typing import List, Optional, Sequence
 
+import numpy as np
 import torch
 import torch.nn as nn
 from ultralytics import YOLO
 
 from app.core.config import get_device, settings
+from app.inference.compiled import CompiledRunner, parse_frame_sizes
+from app.inference.decoder import decode, input_shape, letterbox, scale_boxes, to_tensor
+from app.inference.manifest import resolve_artifact
 
+logger = logging.getLogger(__name__)
 
-class ModelWrapper:
-    """Singleton wrapper for YOLO model."""
-
-    _instance: Optional["ModelWrapper"] = None
-    _model: Optional[YOLO] = None
-    _device: Optional[str] = None
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-        return cls._instance
+class ModelWrapper:
+    """Wrapper for a YOLO model."""
 
-    def __init__(self):
-        if self._model is None:
-            self._device = get_device()
-            self._load_model()
+    def __init__(self, model_path: Optional[str] = None, imgsz: Optional[int] = None):
+        """
+        Args:
+            model_path: Model file or exported artifact. Defaults to the
+                artifact selected in the export manifest, else settings.MODEL_PATH.
+            imgsz: Inference size. Defaults to the selected artifact's export
+                size, then settings.MODEL_IMGSZ, then the size the checkpoint
+                was trained (or exported) at, then 640.
+        """
+        artifact_imgsz = None
+        if model_path is None:
+            model_path, artifact_imgsz = resolve_artifact()
+        self._model = None
+        self._module: Optional[nn.Module] = None
+        self._model_path = model_path
+        # Exported artifacts (ONNX, TorchScript, OpenVINO) run through their own runtime
+        self._exported = not model_path.endswith(".pt")
+        self._device = get_device()
+        self._load_model()
+        imgsz = imgsz or artifact_imgsz or settings.MODEL_IMGSZ or self._trained_imgsz() or 640
+        self._imgsz = int(math.ceil(imgsz / self._stride) * self._stride)
+        self._runner: Optional[CompiledRunner] = None
+        if settings.MODEL_COMPILE != "off" and not self._exported:
+            self._compile()
+
+    def _compile(self):
+        """Build the compiled path; stay on the eager module if it fails."""
+        try:
+            self._runner = CompiledRunner(
+                self._module,
+                self._model_path,
+                self._imgsz,
+                self._stride,
+                self._device,
+                mode=settings.MODEL_COMPILE,
+                cache_dir=settings.MODEL_COMPILE_CACHE_DIR,
+                frame_sizes=parse_frame_sizes(settings.MODEL_COMPILE_FRAME_SIZES),
+            )
+        except Exception as e:
+            logger.warning(
+                "Model compilation (%s) failed, using eager mode: %s", settings.MODEL_COMPILE, e
+            )
+            self._runner = None
 
     def _load_model(self):
         """Load YOLO model.
@@ -54,79 +98,156 @@ class ModelWrapper:
                 # If this fails, we still try to load; error will surface below
                 pass
 
-            # Load model on the configured device
-            self._model = YOLO(settings.MODEL_PATH)
-            self._model.to(self._device)
+            if self._exported:
+                from ultralytics.nn.autobackend import AutoBackend
+
+                self._model = AutoBackend(
+                    self._model_path, device=torch.device(self._device), fp16=False, fuse=False,
+                    verbose=False,
+                )
+                self._stride = int(max(np.atleast_1d(self._model.stride)))
+                # Only dynamic-shape exports accept the tighter rect letterbox
+                self._rect = bool(getattr(self._model, "dynamic", False))
+            else:
+                self._model = YOLO(self._model_path, task="detect")
+                module = self._model.model.float().eval()
+                module = module.fuse(verbose=False) if hasattr(module, "fuse") else module
+                self._module = module.to(self._device).to(memory_format=torch.channels_last)
+                self._stride = int(max(self._module.stride))
+                self._rect = True
         except Exception as e:
             raise RuntimeError(f"Failed to load model: {e}")
 
-    def predict(self, image, **kwargs):
+    def _trained_imgsz(self) -> Optional[int]:
+        """Image size stored in the checkpoint's training arguments or export metadata."""
+        if self._exported:
+            imgsz = (getattr(self._model, "metadata", None) or {}).get("imgsz")
+        else:
+            ckpt = getattr(self._model, "ckpt", None) or {}
+            imgsz = (ckpt.get("train_args") or {}).get("imgsz")
+        if isinstance(imgsz, (list, tuple)):
+            imgsz = max(imgsz)
+        return int(imgsz) if imgsz else None
+
+    @staticmethod
+    def _to_hwc(image: np.ndarray) -> np.ndarray:
+        """Accept preprocessed (B)CHW float input as well as HWC uint8 frames."""
+        if len(image.shape) == 4:  # Batch dimension
+            image = image[0]
+        if len(image.shape) == 3 and image.shape[0] == 3:  # CHW format
+            image = image.transpose(1, 2, 0)
+        if image.dtype == np.float32 and image.max() <= 1.0:
+            image = (image * 255).astype(np.uint8)
+        if len(image.shape) != 3 or image.shape[2] != 3:
+            raise ValueError(f"Unexpected image shape: {image.shape}")
+        return image
+
+    def _forward(self, x: torch.Tensor):
+        if self._exported:
+            return self._model(x)
+        if self._runner is not None:
+            try:
+                return self._runner(x)
+            except Exception as e:
+                logger.warning("Compiled inference failed, switching to eager mode: %s", e)
+                self._runner = None
+        return self._module(x)
+
+    def predict(self, image, **kwargs) -> List[np.ndarray]:
         """
         Run inference on image.
 
         Args:
             image: Preprocessed image array
-            **kwargs: Additional arguments for YOLO predict
+            **kwargs: conf, iou and max_det, as for `predict_batch`
 
         Returns:
-            YOLO results object
+            One-element list with the image's (N, 6) detection array
         """
-        if self._model is None:
-            raise RuntimeError("Model not loaded")
-
-        # YOLO's predict() handles preprocessing internally
-        # It expects: numpy array (HWC, uint8), PIL Image, or file path
-        # Convert from our preprocessed format back to what YOLO expects
-        import numpy as np
-
-        # If we have preprocessed format (CHW normalized), convert back
-        if len(image.shape) == 4:  # Batch dimension
-            image = image[0]  # Remove batch dimension
-
-        if len(image.shape) == 3 and image.shape[0] == 3:  # CHW format
-            image = image.transpose(1, 2, 0)  # Convert to HWC
-
-        # Denormalize if needed
-        if image.dtype == np.float32 and image.max() <= 1.0:
-            image = (image * 255).astype(np.uint8)
+        return self.predict_batch([image], **kwargs)
+
+    def predict_batch(
+        self,
+        images: Sequence[np.ndarray],
+        conf: Optional[float] = None,
+        iou: float = 0.7,
+        max_det: int = 300,
+    ) -> List[np.ndarray]:
+        """
+        Run inference on several frames in one forward pass.
 
-        # Ensure it's HWC uint8
-        if len(image.shape) == 3 and image.shape[2] == 3:
-            # Already in correct format
-            pass
-        else:
-            # Fallback: use original image if preprocessing went wrong
-            import logging
+        Args:
+            images: HWC uint8 RGB frames (or preprocessed CHW arrays)
+            conf: Confidence threshold. Uses config default if None.
+            iou: NMS IoU threshold
+            max_det: Maximum detections per image
 
-            logger = logging.getLogger(__name__)
-            logger.warning(f"Unexpected image shape: {image.shape}, using as-is")
+        Returns:
+            Per image, an (N, 6) float32 array of x1, y1, x2, y2, confidence,
+            class in frame pixels, sorted by confidence
+        """
+        if self._model is None:
+            raise RuntimeError("Model not loaded")
+        if conf is None:
+            conf = settings.CONFIDENCE_THRESHOLD
+
+        frames = [self._to_hwc(image) for image in images]
+        shapes = {input_shape(*f.shape[:2], self._imgsz, self._stride) for f in frames}
+        # Like Ultralytics: rect letterbox only when the whole batch shares a shape
+        shape = shapes.pop() if self._rect and len(shapes) == 1 else (self._imgsz, self._imgsz)
+
+        logger.debug("Inference on %d frame(s) at %s, conf %s", len(frames), shape, conf)
+        x = to_tensor([letterbox(f, shape) for f in frames], self._device)
+        if not self._exported:
+            x = x.contiguous(memory_format=torch.channels_last)
+        with torch.inference_mode():
+            preds = self._forward(x)
+            detections = decode(preds, conf=conf, iou=iou, max_det=max_det)
+            return [
+                scale_boxes(det, shape, f.shape).cpu().numpy()
+                for det, f in zip(detections, frames)
+            ]
 
-        # Run inference - YOLO will handle resizing internally
-        import logging
+    @property
+    def model(self):
+        """Get the underlying model (YOLO for checkpoints, AutoBackend for exports)."""
+        return self._model
 
-        logger = logging.getLogger(__name__)
-        logger.debug(
-            f"Running inference with conf threshold: {settings.CONFIDENCE_THRESHOLD}, image shape: {image.shape}"
-        )
+    @property
+    def model_path(self) -> str:
+        """Get the path the model was loaded from."""
+        return self._model_path
 
-        results = self._model.predict(
-            image,
-            imgsz=640,  # YOLO standard size
-            conf=settings.CONFIDENCE_THRESHOLD,
-            verbose=False,
-            **kwargs,
-        )
+    @property
+    def imgsz(self) -> int:
+        """Get the inference image size."""
+        return self._imgsz
 
-        logger.debug(
-            f"Inference completed, results type: {type(results)}, num results: {len(results)}"
-        )
+    @property
+    def stride(self) -> int:
+        """Get the model stride input shapes are aligned to."""
+        return self._stride
 
-        return results
+    @property
+    def memory_bytes(self) -> int:
+        """Get the resident size of the weights (artifact size on disk for exports)."""
+        if self._module is not None:
+            tensors = list(self._module.parameters()) + list(self._module.buffers())
+            return sum(t.numel() * t.element_size() for t in tensors)
+        if os.path.isdir(self._model_path):
+            return sum(
+                os.path.getsize(os.path.join(root, name))
+                for root, _, names in os.walk(self._model_path)
+                for name in names
+            )
+        return os.path.getsize(self._model_path)
 
     @property
-    def model(self) -> YOLO:
-        """Get the underlying YOLO model."""
-        return self._model
+    def execution_mode(self) -> str:
+        """Get how inference runs: "eager", "trace", "compile" or "exported"."""
+        if self._exported:
+            return "exported"
+        return self._runner.mode if self._runner is not None else "eager"
 
     @property
     def device(self) -> str:
@@ -0,0 +1,222 @@
+"""
+Per-site model pool. `get_model_pool()` holds the process-wide instance.
+
+Requests pick a model by ID (`X-Model-Id` header or `/v1/models/{id}/predict`).
+The ID names a file under `MODEL_POOL_DIR`: `<id>.pt`, `<id>.onnx`,
+`<id>.torchscript` or an `<id>_openvino_model` directory.
+
+- Models load lazily on first use. Concurrent requests for a model that is
+  still loading wait for that one load instead of starting their own.
+- Loaded models are kept in LRU order. After each load, least recently used
+  models are evicted until the pool fits `MODEL_POOL_MEMORY_MB`.
+- Models unused for `MODEL_POOL_IDLE_TTL_S` are evicted by `evict_idle()`,
+  which the app runs periodically.
+
+The default model (`MODEL_PATH`, used when no ID is given) is not part of the
+pool and is never evicted.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.inference.model import ModelWrapper
+
+logger = logging.getLogger(__name__)
+
+MODEL_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+ARTIFACT_SUFFIXES = (".pt", ".onnx", ".torchscript", "_openvino_model")
+
+
+class UnknownModelError(KeyError):
+    """Raised for a model ID with no artifact in the pool directory."""
+
+
+class _Entry:
+    def __init__(self, wrapper, memory_bytes: int):
+        self.wrapper = wrapper
+        self.memory_bytes = memory_bytes
+        self.last_used = time.monotonic()
+
+
+class ModelPool:
+    """Lazily loaded, memory-budgeted LRU of `ModelWrapper`s keyed by model ID."""
+
+    def __init__(
+        self,
+        model_dir: str,
+        memory_budget_bytes: int,
+        idle_ttl_s: Optional[float] = None,
+        loader: Callable[[str], ModelWrapper] = ModelWrapper,
+    ):
+        """
+        Args:
+            model_dir: Directory holding one artifact per model ID
+            memory_budget_bytes: Total resident weight size to keep loaded
+            idle_ttl_s: Evict models unused for this long; None disables
+            loader: Builds a model from an artifact path
+        """
+        self.model_dir = model_dir
+        self.memory_budget_bytes = memory_budget_bytes
+        self.idle_ttl_s = idle_ttl_s
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._models: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._loading: Dict[str, Future] = {}
+        self._stats: Dict[str, dict] = {}
+        self.evictions = 0
+
+    def resolve(self, model_id: str) -> str:
+        """Artifact path for `model_id`. Raises UnknownModelError if there is none."""
+        if not MODEL_ID_PATTERN.match(model_id):
+            raise UnknownModelError(f"Invalid model ID: {model_id!r}")
+        for suffix in ARTIFACT_SUFFIXES:
+            path = os.path.join(self.model_dir, model_id + suffix)
+            if os.path.exists(path):
+                return path
+        raise UnknownModelError(f"Unknown model: {model_id}")
+
+    def _record(self, model_id: str) -> dict:
+        return self._stats.setdefault(
+            model_id, {"hits": 0, "misses": 0, "loads": 0, "evictions": 0, "load_ms": None}
+        )
+
+    def _hit(self, model_id: str) -> Optional[ModelWrapper]:
+        """The loaded model, marked as used, or None (lock held)."""
+        entry = self._models.get(model_id)
+        if entry is None:
+            return None
+        self._models.move_to_end(model_id)
+        entry.last_used = time.monotonic()
+        self._record(model_id)["hits"] += 1
+        return entry.wrapper
+
+    def get(self, model_id: str) -> ModelWrapper:
+        """
+        Get a loaded model, loading it (once, however many callers) if needed.
+
+        Raises:
+            UnknownModelError: If `model_id` has no artifact
+        """
+        with self._lock:
+            wrapper = self._hit(model_id)
+        if wrapper is not None:
+            return wrapper
+        # Unknown IDs are rejected before any bookkeeping
+        path = self.resolve(model_id)
+
+        with self._lock:
+            wrapper = self._hit(model_id)
+            if wrapper is not None:
+                return wrapper
+            future = self._loading.get(model_id)
+            owner = future is None
+            if owner:
+                future = self._loading[model_id] = Future()
+            self._record(model_id)["misses"] += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            start = time.perf_counter()
+            wrapper = self._loader(path)
+            load_ms = (time.perf_counter() - start) * 1000
+        except Exception as e:
+            with self._lock:
+                del self._loading[model_id]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._models[model_id] = _Entry(wrapper, int(wrapper.memory_bytes))
+            del self._loading[model_id]
+            stats = self._record(model_id)
+            stats["loads"] += 1
+            stats["load_ms"] = load_ms
+            self._evict_over_budget(keep=model_id)
+        logger.info("Loaded model %s from %s in %.0f ms", model_id, path, load_ms)
+        future.set_result(wrapper)
+        return wrapper
+
+    def _evict(self, model_id: str) -> None:
+        del self._models[model_id]
+        self._record(model_id)["evictions"] += 1
+        self.evictions += 1
+
+    def _evict_over_budget(self, keep: str) -> None:
+        """Evict least recently used models until within budget (lock held)."""
+        for model_id in list(self._models):
+            if self.resident_bytes <= self.memory_budget_bytes:
+                return
+            if model_id != keep:
+                logger.info("Evicting model %s (memory budget)", model_id)
+                self._evict(model_id)
+        if self.resident_bytes > self.memory_budget_bytes:
+            logger.warning("Model %s alone exceeds the pool memory budget", keep)
+
+    def evict_idle(self) -> List[str]:
+        """Evict models unused for longer than the idle TTL. Returns their IDs."""
+        if self.idle_ttl_s is None:
+            return []
+        cutoff = time.monotonic() - self.idle_ttl_s
+        with self._lock:
+            idle = [model_id for model_id, e in self._models.items() if e.last_used < cutoff]
+            for model_id in idle:
+                self._evict(model_id)
+        if idle:
+            logger.info("Evicted idle models: %s", ", ".join(idle))
+        return idle
+
+    @property
+    def resident_bytes(self) -> int:
+        """Total weight size of loaded models."""
+        return sum(e.memory_bytes for e in self._models.values())
+
+    def stats(self) -> dict:
+        """Snapshot of pool and per-model state for the metrics endpoint."""
+        now = time.monotonic()
+        with self._lock:
+            models = []
+            for model_id, stats in sorted(self._stats.items()):
+                entry = self._models.get(model_id)
+                requests = stats["hits"] + stats["misses"]
+                models.append(
+                    {
+                        "model_id": model_id,
+                        "loaded": entry is not None,
+                        "resident_mb": entry.memory_bytes / 2**20 if entry else 0.0,
+                        "idle_s": now - entry.last_used if entry else None,
+                        "hit_rate": stats["hits"] / requests if requests else None,
+                        **stats,
+                    }
+                )
+            return {
+                "budget_mb": self.memory_budget_bytes / 2**20,
+                "resident_mb": self.resident_bytes / 2**20,
+                "loaded": len(self._models),
+                "evictions": self.evictions,
+                "models": models,
+            }
+
+
+# Global pool instance
+_pool: Optional[ModelPool] = None
+
+
+def get_model_pool() -> ModelPool:
+    """Get the global model pool."""
+    global _pool
+    if _pool is None:
+        _pool = ModelPool(
+            settings.MODEL_POOL_DIR,
+            int(settings.MODEL_POOL_MEMORY_MB * 2**20),
+            idle_ttl_s=settings.MODEL_POOL_IDLE_TTL_S,
+        )
+    return _pool
@@ -2,11 +2,16 @@
 Post-processing of YOLO model outputs.
 """
 
+import logging
 from typing import Any, Dict, List
 
+import numpy as np
+
 from app.core.config import settings
 from app.schemas.response import BoundingBox, FaceDetection
 
+logger = logging.getLogger(__name__)
+
 # Class name mapping (0=real, 1=fake) - model outputs are inverted
 CLASS_NAMES = {0: "real", 1: "fake"}
 
@@ -16,7 +21,8 @@ def postprocess_results(results: Any, confidence_threshold: float = None) -> Lis
     Post-process YOLO results into standardized format.
 
     Args:
-        results: YOLO model results object
+        results: Per image (N, 6) detection arrays from `ModelWrapper.predict`,
+            or Ultralytics Results objects
         confidence_threshold: Minimum confidence. Uses config default if None.
 
     Returns:
@@ -27,20 +33,21 @@ def postprocess_results(results: Any, confidence_threshold: float = None) -> Lis
 
     detections = []
 
-    # Extract boxes from YOLO results
-    import logging
-
-    logger = logging.getLogger(__name__)
-
     for result in results:
+        if isinstance(result, np.ndarray):
+            detections.extend(_array_detections(result, confidence_threshold))
+            continue
+
         boxes = result.boxes
 
         if boxes is None or len(boxes) == 0:
-            logger.info("No boxes found in result - model did not detect any faces")
+            logger.debug("No boxes found in result - model did not detect any faces")
             continue
 
-        logger.info(
-            f"Found {len(boxes)} boxes before filtering (confidence threshold: {confidence_threshold})"
+        logger.debug(
+            "Found %d boxes before filtering (confidence threshold: %s)",
+            len(boxes),
+            confidence_threshold,
         )
 
         for box in boxes:
@@ -48,13 +55,12 @@ def postprocess_results(results: Any, confidence_threshold: float = None) -> Lis
             conf = float(box.conf[0])
             cls = int(box.cls[0])
 
-            logger.info(
-                f"Box detected: class={cls}, confidence={conf:.3f}, threshold={confidence_threshold}"
-            )
-
             if conf < confidence_threshold:
-                logger.info(
-                    f"Box filtered out: confidence {conf:.3f} < threshold {confidence_threshold}"
+                logger.debug(
+                    "Box filtered out: class=%d, confidence %.3f < threshold %s",
+                    cls,
+                    conf,
+                    confidence_threshold,
                 )
                 continue
 
@@ -80,6 +86,24 @@ def postprocess_results(results: Any, confidence_threshold: float = None) -> Lis
     return detections
 
 
+def _array_detections(result: np.ndarray, confidence_threshold: float) -> List[Dict[str, Any]]:
+    """Detections from one (N, 6) array of x1, y1, x2, y2, confidence, class."""
+    total = len(result)
+    result = result[result[:, 4] >= confidence_threshold]
+    logger.debug(
+        "Kept %d of %d boxes (confidence threshold: %s)", len(result), total, confidence_threshold
+    )
+    boxes = result[:, :4].astype(int)
+    return [
+        {
+            "label": CLASS_NAMES.get(int(cls), "unknown"),
+            "confidence": float(conf),
+            "bbox": {"x": int(x1), "y": int(y1), "w": int(x2 - x1), "h": int(y2 - y1)},
+        }
+        for (x1, y1, x2, y2), conf, cls in zip(boxes.tolist(), result[:, 4], result[:, 5])
+    ]
+
+
 def format_detections(detections: List[Dict[str, Any]]) -> List[FaceDetection]:
     """
     Format detections into Pydantic models.
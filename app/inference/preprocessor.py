@@ -2,14 +2,71 @@
 Image preprocessing for YOLO inference.
 """
 
+import io
+import struct
 from typing import Tuple
 
 import cv2
 import numpy as np
+from PIL import Image
 
 from app.core.config import settings
 
 
+class ImageTooLargeError(ValueError):
+    """Image dimensions or pixel count over the configured limits."""
+
+
+def _header_size(image_bytes: bytes) -> Tuple[int, int]:
+    """
+    Identify the format and read (width, height) without decoding pixels.
+
+    Walks PIL's format registry like `Image.open` does. `Image.open` itself is
+    avoided because Ultralytics patches it to install HEIF support whenever
+    opening fails, which would make rejecting junk uploads expensive.
+    """
+    Image.init()
+    fp = io.BytesIO(image_bytes)
+    prefix = image_bytes[:16]
+    for fmt in Image.ID:
+        factory, accept = Image.OPEN[fmt]
+        result = accept(prefix) if accept else True
+        if not result or isinstance(result, (str, bytes)):
+            continue
+        fp.seek(0)
+        try:
+            return factory(fp, "").size
+        except (SyntaxError, IndexError, TypeError, ValueError, OSError, struct.error):
+            continue
+    raise ValueError("Failed to decode image")
+
+
+def check_image_header(image_bytes: bytes) -> Tuple[int, int]:
+    """
+    Read the image size from its header and check it against the limits.
+
+    Only the header is parsed, so a small file declaring huge dimensions is
+    rejected without allocating pixel data.
+
+    Args:
+        image_bytes: Raw image bytes (JPEG/PNG)
+
+    Returns:
+        (width, height)
+    """
+    width, height = _header_size(image_bytes)
+
+    if max(width, height) > settings.MAX_IMAGE_DIMENSION:
+        raise ImageTooLargeError(
+            f"Image dimensions {width}x{height} exceed {settings.MAX_IMAGE_DIMENSION}px"
+        )
+    if width * height > settings.MAX_IMAGE_PIXELS:
+        raise ImageTooLargeError(
+            f"Image has {width * height} pixels, max {settings.MAX_IMAGE_PIXELS}"
+        )
+    return width, height
+
+
 def decode_image(image_bytes: bytes) -> np.ndarray:
     """
     Decode image bytes to numpy array.
@@ -19,7 +76,12 @@ def decode_image(image_bytes: bytes) -> np.ndarray:
 
     Returns:
         BGR image array
+
+    Raises:
+        ImageTooLargeError: If the header declares a too large image
+        ValueError: If the bytes are not a readable image
     """
+    check_image_header(image_bytes)
     nparr = np.frombuffer(image_bytes, np.uint8)
     img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
 
@@ -26,16 +26,25 @@ except Exception:
     # If this fails, YOLO load will still raise a clear error later.
     pass
 
+import asyncio
 import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.v1 import health, predict
+from app.api import debug
+from app.api.v1 import health, jobs, metrics, predict
+from app.core.audit import close_audit_log, get_audit_log
 from app.core.config import settings
+from app.core.jobs import close_job_manager, get_job_manager
+from app.core.limits import MULTIPART_OVERHEAD, BodySizeLimitMiddleware
 from app.core.logging import setup_logging
+from app.inference.autotune import configure_runtime
+from app.inference.cascade import get_cascade
+from app.inference.crops import get_crop_pipeline
 from app.inference.model import get_model
+from app.inference.pool import get_model_pool
 
 # Setup logging
 logger = setup_logging()
@@ -50,21 +59,58 @@ async def lifespan(app: FastAPI):
     global _start_time
     _start_time = time.time()
 
+    # Startup: Fix thread pools before the model allocates any
+    runtime = configure_runtime()
+    logger.info(
+        f"Runtime threads: torch={runtime.torch_threads}, "
+        f"interop={runtime.interop_threads}, cv2={runtime.cv2_threads}"
+    )
+
     # Startup: Load model
     logger.info("Loading YOLO model...")
     try:
         model = get_model()
         logger.info(f"Model loaded successfully on device: {model.device}")
         app.state.model = model
+        cascade = get_cascade()
+        if cascade is not None:
+            logger.info(f"Cascade enabled, fast model: {cascade.fast.model_path}")
+        crops = get_crop_pipeline()
+        if crops is not None:
+            logger.info(
+                f"Crop mode enabled: {crops.classifier.model_path} at {crops.classifier.imgsz}px, "
+                f"{settings.CROP_LOCALISER} localiser"
+            )
+        audit = get_audit_log()
+        if audit is not None:
+            logger.info(f"Audit log enabled: {settings.AUDIT_BACKEND} at {settings.AUDIT_PATH}")
+        job_manager = get_job_manager()
+        if job_manager is not None:
+            logger.info(f"Bulk jobs enabled, spooled to {settings.JOBS_DIR}")
         app.state.start_time = _start_time
     except Exception as e:
         logger.error(f"Failed to load model: {e}")
         raise
 
+    idle_eviction = asyncio.create_task(_evict_idle_models())
+
     yield
 
     # Shutdown: Cleanup
     logger.info("Shutting down...")
+    idle_eviction.cancel()
+    close_job_manager()
+    close_audit_log()
+
+
+async def _evict_idle_models():
+    """Periodically drop pooled models idle for longer than MODEL_POOL_IDLE_TTL_S."""
+    pool = get_model_pool()
+    if pool.idle_ttl_s is None:
+        return
+    while True:
+        await asyncio.sleep(min(60.0, pool.idle_ttl_s))
+        pool.evict_idle()
 
 
 # Create FastAPI app
@@ -79,9 +125,24 @@ app.add_middleware(
     allow_headers=settings.CORS_ALLOW_HEADERS,
 )
 
+# Reject oversized uploads while they stream in
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_size=settings.MAX_IMAGE_SIZE + MULTIPART_OVERHEAD,
+    paths=["/v1/predict", "/v1/models/"],
+)
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_size=int(settings.JOBS_MAX_ARCHIVE_MB * 1024 * 1024) + MULTIPART_OVERHEAD,
+    paths=["/v1/jobs"],
+)
+
 # Register routers
 app.include_router(predict.router, prefix="/v1", tags=["prediction"])
 app.include_router(health.router, prefix="/v1", tags=["health"])
+app.include_router(metrics.router, prefix="/v1", tags=["metrics"])
+app.include_router(jobs.router, prefix="/v1", tags=["jobs"])
+app.include_router(debug.router, prefix="/debug", tags=["debug"])
 
 
 @app.get("/")
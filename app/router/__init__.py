@@ -0,0 +1,3 @@
+"""
+Sticky-session front router for running several `app.main` workers.
+"""
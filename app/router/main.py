@@ -0,0 +1,245 @@
+"""
+Sticky-session front router.
+
+Runs in front of several `app.main` worker processes and sends every request
+of a session (the `X-Session-Id` header, or a `session_id` query parameter)
+to the same worker, so per-session state held by a worker stays valid.
+Requests without a session go to the least loaded worker.
+
+    python -m app.router.main --workers 4 --port 8080
+    uvicorn app.router.main:create_app --factory --port 8080  # settings from env
+
+Endpoints of the router itself:
+
+- `GET /router/stats`: per-worker state, load, latency and pinned sessions
+- `POST /router/workers`: start one more worker (needs X-Router-Token)
+- `DELETE /router/workers/{worker_id}`: drain and stop a worker (needs X-Router-Token)
+
+Everything else is proxied to a worker. Request and response bodies are
+streamed through, never buffered, so the router's memory does not grow with
+upload or download size.
+"""
+
+import argparse
+import asyncio
+import hmac
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import httpx
+from fastapi import FastAPI, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.core.config import settings
+from app.core.limits import MULTIPART_OVERHEAD, BodySizeLimitMiddleware
+from app.core.logging import setup_logging
+from app.router.sticky import NoWorkerError, StickyRouter
+from app.router.workers import WorkerSupervisor
+from app.schemas.response import RouterStats
+
+logger = logging.getLogger(__name__)
+
+# Not forwarded in either direction
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+    "host",
+}
+PROXY_METHODS = ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "HEAD"]
+# Archive uploads, result downloads and profile captures can take longer than
+# ROUTER_TIMEOUT_S; only connecting is time-limited for these.
+UNTIMED_PATHS = ("v1/jobs", "debug/")
+
+
+def _forward_headers(headers) -> dict:
+    return {k: v for k, v in headers.items() if k.lower() not in HOP_BY_HOP_HEADERS}
+
+
+def _timeout(path: str) -> httpx.Timeout:
+    if path.startswith(UNTIMED_PATHS):
+        return httpx.Timeout(None, connect=2.0)
+    return httpx.Timeout(settings.ROUTER_TIMEOUT_S, connect=2.0)
+
+
+def _worker_urls() -> list:
+    return [url.strip() for url in settings.ROUTER_WORKER_URLS.split(",") if url.strip()]
+
+
+def create_app(
+    router: Optional[StickyRouter] = None,
+    client: Optional[httpx.AsyncClient] = None,
+    supervisor: Optional[WorkerSupervisor] = None,
+) -> FastAPI:
+    """
+    Build the router application.
+
+    Args:
+        router: Session router; built from settings if omitted
+        client: HTTP client for the workers; built if omitted
+        supervisor: Worker supervisor; built from settings if omitted
+
+    Returns:
+        FastAPI app that starts its workers on startup and stops them on shutdown
+    """
+    router = router or StickyRouter(
+        vnodes=settings.ROUTER_VNODES, session_ttl_s=settings.ROUTER_SESSION_TTL_S
+    )
+    client = client or httpx.AsyncClient(timeout=_timeout(""))
+    supervisor = supervisor or WorkerSupervisor(
+        router,
+        client,
+        base_port=settings.ROUTER_WORKER_BASE_PORT,
+        health_interval_s=settings.ROUTER_HEALTH_INTERVAL_S,
+        unhealthy_after=settings.ROUTER_UNHEALTHY_AFTER,
+        startup_timeout_s=settings.ROUTER_STARTUP_TIMEOUT_S,
+        # Each worker takes its share of the cores (see app.inference.autotune)
+        env={"WEB_CONCURRENCY": str(max(1, settings.ROUTER_WORKERS))},
+    )
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        await supervisor.start(settings.ROUTER_WORKERS, _worker_urls())
+        supervision = asyncio.create_task(supervisor.run())
+        yield
+        supervision.cancel()
+        await supervisor.stop()
+        await client.aclose()
+
+    app = FastAPI(
+        title=f"{settings.APP_NAME} (router)", version=settings.APP_VERSION, lifespan=lifespan
+    )
+    # Reject oversized uploads here, like the workers do, before they reach one
+    app.add_middleware(
+        BodySizeLimitMiddleware,
+        max_body_size=settings.MAX_IMAGE_SIZE + MULTIPART_OVERHEAD,
+        paths=["/v1/predict", "/v1/models/"],
+    )
+    app.add_middleware(
+        BodySizeLimitMiddleware,
+        max_body_size=int(settings.JOBS_MAX_ARCHIVE_MB * 1024 * 1024) + MULTIPART_OVERHEAD,
+        paths=["/v1/jobs"],
+    )
+    app.state.router = router
+    app.state.supervisor = supervisor
+
+    def check_token(token: Optional[str]) -> None:
+        # Compared as bytes: compare_digest rejects non-ASCII str with a TypeError
+        if not settings.ROUTER_ADMIN_TOKEN or not hmac.compare_digest(
+            (token or "").encode(), settings.ROUTER_ADMIN_TOKEN.encode()
+        ):
+            raise HTTPException(status_code=403, detail="Invalid or missing X-Router-Token")
+
+    @app.get("/router/stats", response_model=RouterStats)
+    async def stats():
+        """Per-worker load and session placement."""
+        return RouterStats(**router.stats())
+
+    @app.post("/router/workers")
+    async def add_worker(x_router_token: Optional[str] = Header(None)):
+        """Start one more worker; it takes new sessions once healthy."""
+        check_token(x_router_token)
+        worker = supervisor.spawn()
+        return worker.stats()
+
+    @app.delete("/router/workers/{worker_id}")
+    async def drain_worker(worker_id: str, x_router_token: Optional[str] = Header(None)):
+        """Stop placing sessions on a worker and stop it once they have expired."""
+        check_token(x_router_token)
+        if worker_id not in router.workers:
+            raise HTTPException(status_code=404, detail=f"Unknown worker: {worker_id}")
+        supervisor.drain(worker_id)
+        return router.workers[worker_id].stats()
+
+    @app.api_route("/{path:path}", methods=PROXY_METHODS, include_in_schema=False)
+    async def proxy(request: Request, path: str):
+        session_id = request.headers.get(settings.ROUTER_SESSION_HEADER)
+        session_id = session_id or request.query_params.get("session_id")
+        headers = _forward_headers(request.headers)
+        body_started = False
+
+        async def body():
+            nonlocal body_started
+            body_started = True
+            async for chunk in request.stream():
+                yield chunk
+
+        has_body = "content-length" in request.headers or "transfer-encoding" in request.headers
+
+        # A worker that refuses the connection never saw the request, so the
+        # request is retried once on the session's next worker (unless part of
+        # the streamed body was already consumed).
+        for _ in range(2):
+            try:
+                worker = router.route(session_id)
+            except NoWorkerError as e:
+                raise HTTPException(status_code=503, detail=str(e))
+
+            worker.in_flight += 1
+            start = time.perf_counter()
+            try:
+                upstream = await client.send(
+                    client.build_request(
+                        request.method,
+                        f"{worker.url}/{path}",
+                        params=request.query_params,
+                        content=body() if has_body else None,
+                        headers=headers,
+                        timeout=_timeout(path),
+                    ),
+                    stream=True,
+                )
+            except httpx.ConnectError as e:
+                worker.observe((time.perf_counter() - start) * 1000, ok=False)
+                logger.warning("%s refused a connection; taking it out", worker.worker_id)
+                router.mark_dead(worker.worker_id)
+                if body_started:
+                    raise HTTPException(status_code=502, detail=f"{worker.worker_id}: {e!r}")
+                continue
+            except httpx.HTTPError as e:
+                worker.observe((time.perf_counter() - start) * 1000, ok=False)
+                raise HTTPException(status_code=502, detail=f"{worker.worker_id}: {e!r}")
+            finally:
+                worker.in_flight -= 1
+
+            # Latency up to the response headers; the body streams after this
+            worker.observe((time.perf_counter() - start) * 1000, ok=upstream.status_code < 500)
+            response_headers = _forward_headers(upstream.headers)
+            response_headers["X-Worker-Id"] = worker.worker_id
+            return StreamingResponse(
+                upstream.aiter_raw(),
+                status_code=upstream.status_code,
+                headers=response_headers,
+                background=BackgroundTask(upstream.aclose),
+            )
+        raise HTTPException(status_code=503, detail="No reachable workers")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sticky-session router for app.main workers")
+    parser.add_argument("--workers", type=int, default=settings.ROUTER_WORKERS)
+    parser.add_argument("--host", default=settings.ROUTER_HOST)
+    parser.add_argument("--port", type=int, default=settings.ROUTER_PORT)
+    parser.add_argument("--worker-base-port", type=int, default=settings.ROUTER_WORKER_BASE_PORT)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    settings.ROUTER_WORKERS = args.workers
+    settings.ROUTER_WORKER_BASE_PORT = args.worker_base_port
+    setup_logging()
+    uvicorn.run(create_app(), host=args.host, port=args.port, log_config=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Consistent hash ring.
+
+Each node is placed on the ring at `vnodes` pseudo-random points; a key
+belongs to the first point clockwise from its own hash. Adding or removing a
+node therefore only moves the keys between that node's points and their
+neighbours (about 1/N of them), and every other key keeps its node.
+"""
+
+import hashlib
+from bisect import bisect
+from typing import Dict, Iterable, List, Optional
+
+RING_SIZE = 2**64
+
+
+def _hash(key: str) -> int:
+    # Stable across processes, unlike hash()
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Maps keys to nodes with consistent hashing."""
+
+    def __init__(self, nodes: Iterable[str] = (), vnodes: int = 64):
+        """
+        Args:
+            nodes: Initial node names
+            vnodes: Points per node; more points give a more even split
+        """
+        self.vnodes = vnodes
+        self._nodes: set = set()
+        self._points: List[int] = []
+        self._owners: List[str] = []
+        for node in nodes:
+            self.add(node)
+
+    @property
+    def nodes(self) -> List[str]:
+        return sorted(self._nodes)
+
+    def __contains__(self, node: str) -> bool:
+        return node in self._nodes
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def _rebuild(self) -> None:
+        points = sorted(
+            (_hash(f"{node}#{i}"), node) for node in self._nodes for i in range(self.vnodes)
+        )
+        self._points = [point for point, _ in points]
+        self._owners = [node for _, node in points]
+
+    def add(self, node: str) -> None:
+        if node not in self._nodes:
+            self._nodes.add(node)
+            self._rebuild()
+
+    def remove(self, node: str) -> None:
+        if node in self._nodes:
+            self._nodes.discard(node)
+            self._rebuild()
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Node owning `key`, or None if the ring is empty."""
+        if not self._points:
+            return None
+        index = bisect(self._points, _hash(key)) % len(self._points)
+        return self._owners[index]
+
+    def shares(self) -> Dict[str, float]:
+        """Fraction of the key space owned by each node."""
+        shares = dict.fromkeys(self._nodes, 0.0)
+        previous = self._points[-1] - RING_SIZE if self._points else 0
+        for point, node in zip(self._points, self._owners):
+            shares[node] += (point - previous) / RING_SIZE
+            previous = point
+        return shares
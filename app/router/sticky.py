@@ -0,0 +1,136 @@
+"""
+Session-to-worker routing.
+
+New sessions are placed on the consistent hash ring of healthy workers.
+Once placed, a session stays pinned to its worker until it has been idle for
+the session TTL, so a worker joining the ring only receives new sessions and
+never takes over live ones. When a worker dies, only its own sessions move,
+each to its next worker on the ring, and they stay pinned there even after
+the dead worker comes back. A draining worker takes no new sessions but
+keeps serving the ones it has.
+
+All methods must be called from the event loop thread; the router itself
+does no locking.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.router.ring import HashRing
+from app.router.workers import DEAD, DRAINING, HEALTHY, Worker
+
+
+class NoWorkerError(Exception):
+    """Raised when no healthy worker can take a request."""
+
+
+class StickyRouter:
+    """Routes requests to workers by session ID."""
+
+    def __init__(self, vnodes: int = 64, session_ttl_s: float = 300.0):
+        """
+        Args:
+            vnodes: Ring points per worker
+            session_ttl_s: Forget a session's worker after this long without requests
+        """
+        self.ring = HashRing(vnodes=vnodes)
+        self.session_ttl_s = session_ttl_s
+        self.workers: Dict[str, Worker] = {}
+        # session ID -> (worker ID, last seen), least recently seen first
+        self._sessions: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.moved_sessions = 0
+
+    def add_worker(self, worker: Worker) -> None:
+        """Register a worker. It joins the ring once marked healthy."""
+        self.workers[worker.worker_id] = worker
+        if worker.state == HEALTHY:
+            self.ring.add(worker.worker_id)
+
+    def mark_healthy(self, worker_id: str) -> None:
+        worker = self.workers[worker_id]
+        if worker.state != DRAINING:
+            worker.state = HEALTHY
+            self.ring.add(worker_id)
+
+    def mark_dead(self, worker_id: str) -> None:
+        """Take a worker out of the ring; its sessions move on their next request."""
+        self.workers[worker_id].state = DEAD
+        self.ring.remove(worker_id)
+
+    def drain(self, worker_id: str) -> None:
+        """Stop sending new sessions to a worker; pinned sessions stay."""
+        self.workers[worker_id].state = DRAINING
+        self.ring.remove(worker_id)
+
+    def drained(self, worker_id: str) -> bool:
+        """Whether a draining worker has no live sessions or requests left."""
+        self._expire(time.monotonic())
+        worker = self.workers[worker_id]
+        return worker.in_flight == 0 and self.session_counts().get(worker_id, 0) == 0
+
+    def remove_worker(self, worker_id: str) -> None:
+        self.ring.remove(worker_id)
+        del self.workers[worker_id]
+
+    def _expire(self, now: float) -> None:
+        cutoff = now - self.session_ttl_s
+        while self._sessions:
+            session_id, (_, last_seen) = next(iter(self._sessions.items()))
+            if last_seen >= cutoff:
+                break
+            del self._sessions[session_id]
+
+    def route(self, session_id: Optional[str]) -> Worker:
+        """
+        Pick the worker for a request.
+
+        Requests without a session go to the least loaded healthy worker.
+
+        Raises:
+            NoWorkerError: If no healthy worker is available
+        """
+        if not session_id:
+            healthy = [w for w in self.workers.values() if w.state == HEALTHY]
+            if not healthy:
+                raise NoWorkerError("No healthy workers")
+            return min(healthy, key=lambda w: w.in_flight)
+
+        now = time.monotonic()
+        self._expire(now)
+        pinned = self._sessions.pop(session_id, None)
+        worker = self.workers.get(pinned[0]) if pinned else None
+        if worker is None or worker.state not in (HEALTHY, DRAINING):
+            worker_id = self.ring.lookup(session_id)
+            if worker_id is None:
+                raise NoWorkerError("No healthy workers")
+            if pinned:
+                self.moved_sessions += 1
+            worker = self.workers[worker_id]
+        self._sessions[session_id] = (worker.worker_id, now)
+        return worker
+
+    def session_counts(self) -> Dict[str, int]:
+        """Live sessions pinned to each worker."""
+        counts: Dict[str, int] = {}
+        for worker_id, _ in self._sessions.values():
+            counts[worker_id] = counts.get(worker_id, 0) + 1
+        return counts
+
+    def stats(self) -> dict:
+        """Snapshot of routing and per-worker state for the stats endpoint."""
+        self._expire(time.monotonic())
+        sessions = self.session_counts()
+        shares = self.ring.shares()
+        return {
+            "sessions": len(self._sessions),
+            "moved_sessions": self.moved_sessions,
+            "workers": [
+                {
+                    **worker.stats(),
+                    "sessions": sessions.get(worker_id, 0),
+                    "ring_share": shares.get(worker_id, 0.0),
+                }
+                for worker_id, worker in sorted(self.workers.items())
+            ],
+        }
@@ -0,0 +1,255 @@
+"""
+Worker processes behind the sticky-session router.
+
+`WorkerSupervisor` starts `app.main` under uvicorn on consecutive local
+ports (or attaches to workers already running elsewhere), health-checks them
+through `/v1/health`, takes dead or unresponsive workers out of the ring,
+restarts the ones it spawned with exponential backoff, and stops drained
+workers.
+"""
+
+import asyncio
+import logging
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+STARTING = "starting"
+HEALTHY = "healthy"
+DRAINING = "draining"
+DEAD = "dead"
+
+MAX_RESTART_BACKOFF_S = 30.0
+
+
+class Worker:
+    """One `app.main` worker and its load counters."""
+
+    def __init__(
+        self,
+        worker_id: str,
+        url: str,
+        process: Optional[subprocess.Popen] = None,
+        port: Optional[int] = None,
+    ):
+        self.worker_id = worker_id
+        self.url = url.rstrip("/")
+        self.process = process
+        self.port = port
+        self.state = STARTING
+        self.started_at = time.monotonic()
+        self.failed_checks = 0
+        self.restarts = 0
+        self.restart_at: Optional[float] = None
+        self.retiring = False
+
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.latency_ewma_ms: Optional[float] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process is not None else None
+
+    def observe(self, latency_ms: float, ok: bool, alpha: float = 0.2) -> None:
+        """Record a proxied request."""
+        self.requests += 1
+        if not ok:
+            self.errors += 1
+        if self.latency_ewma_ms is None:
+            self.latency_ewma_ms = latency_ms
+        else:
+            self.latency_ewma_ms += alpha * (latency_ms - self.latency_ewma_ms)
+
+    def stats(self) -> dict:
+        return {
+            "worker_id": self.worker_id,
+            "url": self.url,
+            "pid": self.pid,
+            "state": self.state,
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "errors": self.errors,
+            "latency_ewma_ms": self.latency_ewma_ms,
+            "restarts": self.restarts,
+        }
+
+
+class WorkerSupervisor:
+    """Starts, health-checks, restarts and retires workers for a `StickyRouter`."""
+
+    def __init__(
+        self,
+        router,
+        client: httpx.AsyncClient,
+        host: str = "127.0.0.1",
+        base_port: int = 8101,
+        health_interval_s: float = 2.0,
+        unhealthy_after: int = 3,
+        startup_timeout_s: float = 120.0,
+        env: Optional[Dict[str, str]] = None,
+    ):
+        """
+        Args:
+            router: StickyRouter the workers are registered with
+            client: HTTP client used for health checks
+            host: Interface spawned workers listen on
+            base_port: Port of the first spawned worker; later ones count up
+            health_interval_s: Time between health check rounds
+            unhealthy_after: Consecutive failed checks before a worker is taken out
+            startup_timeout_s: Time a new worker has to become healthy
+            env: Extra environment for spawned workers
+        """
+        self.router = router
+        self.client = client
+        self.host = host
+        self.health_interval_s = health_interval_s
+        self.unhealthy_after = unhealthy_after
+        self.startup_timeout_s = startup_timeout_s
+        self.env = env or {}
+        self._next_port = base_port
+        self._count = 0
+
+    def _next_id(self) -> str:
+        self._count += 1
+        return f"worker-{self._count}"
+
+    def _launch(self, worker: Worker) -> None:
+        command = [sys.executable, "-m", "uvicorn", "app.main:app"]
+        # One process per worker; uvicorn would otherwise fork WEB_CONCURRENCY of them
+        command += ["--host", self.host, "--port", str(worker.port), "--workers", "1"]
+        worker.process = subprocess.Popen(command, env={**os.environ, **self.env})
+        worker.state = STARTING
+        worker.started_at = time.monotonic()
+        worker.failed_checks = 0
+        logger.info("Started %s (pid %s) on port %s", worker.worker_id, worker.pid, worker.port)
+
+    def spawn(self) -> Worker:
+        """Start a new local worker. It joins the ring once healthy."""
+        port = self._next_port
+        self._next_port += 1
+        worker = Worker(self._next_id(), f"http://{self.host}:{port}", port=port)
+        self._launch(worker)
+        self.router.add_worker(worker)
+        return worker
+
+    def attach(self, url: str) -> Worker:
+        """Route to a worker started outside the router. It is never restarted."""
+        worker = Worker(self._next_id(), url)
+        self.router.add_worker(worker)
+        return worker
+
+    async def start(self, count: int, urls: List[str] = ()) -> None:
+        """Spawn `count` workers, attach `urls`, and wait for them to become healthy."""
+        for _ in range(count):
+            self.spawn()
+        for url in urls:
+            self.attach(url)
+        while True:
+            await self.tick()
+            if not any(w.state == STARTING for w in self.router.workers.values()):
+                break
+            await asyncio.sleep(min(0.5, self.health_interval_s))
+        healthy = sum(w.state == HEALTHY for w in self.router.workers.values())
+        logger.info("%d of %d workers healthy", healthy, len(self.router.workers))
+
+    async def check(self, worker: Worker) -> None:
+        """Health-check one worker and update its state."""
+        if worker.process is not None and worker.process.poll() is not None:
+            # Reported once, including when a refused connection marked it dead first
+            if worker.state != DEAD or worker.restart_at is None:
+                logger.warning(
+                    "%s (pid %s) exited with code %s",
+                    worker.worker_id,
+                    worker.pid,
+                    worker.process.returncode,
+                )
+                self.router.mark_dead(worker.worker_id)
+            return
+
+        try:
+            response = await self.client.get(f"{worker.url}/v1/health", timeout=5.0)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+
+        if ok:
+            worker.failed_checks = 0
+            if worker.state in (STARTING, DEAD):
+                logger.info("%s is healthy", worker.worker_id)
+                self.router.mark_healthy(worker.worker_id)
+            return
+
+        worker.failed_checks += 1
+        if worker.state == STARTING:
+            if time.monotonic() - worker.started_at > self.startup_timeout_s:
+                logger.error("%s did not become healthy in time", worker.worker_id)
+                self.router.mark_dead(worker.worker_id)
+        elif worker.state != DEAD and worker.failed_checks >= self.unhealthy_after:
+            logger.warning("%s failed %d health checks", worker.worker_id, worker.failed_checks)
+            self.router.mark_dead(worker.worker_id)
+
+    async def _stop_process(self, worker: Worker) -> None:
+        if worker.process is None or worker.process.poll() is not None:
+            return
+        worker.process.terminate()
+        try:
+            await asyncio.to_thread(worker.process.wait, 10)
+        except subprocess.TimeoutExpired:
+            worker.process.kill()
+            await asyncio.to_thread(worker.process.wait)
+
+    async def _restart(self, worker: Worker) -> None:
+        now = time.monotonic()
+        if worker.restart_at is None:
+            worker.restart_at = now + min(MAX_RESTART_BACKOFF_S, 2.0**worker.restarts)
+            return
+        if now < worker.restart_at:
+            return
+        await self._stop_process(worker)
+        worker.restarts += 1
+        worker.restart_at = None
+        self._launch(worker)
+
+    def drain(self, worker_id: str) -> None:
+        """Retire a worker once its pinned sessions have expired."""
+        worker = self.router.workers[worker_id]
+        worker.retiring = True
+        if worker.state != DEAD:
+            self.router.drain(worker_id)
+
+    async def _retire(self, worker: Worker) -> None:
+        await self._stop_process(worker)
+        self.router.remove_worker(worker.worker_id)
+        logger.info("Retired %s", worker.worker_id)
+
+    async def tick(self) -> None:
+        """One round of health checks, restarts and retirements."""
+        workers = list(self.router.workers.values())
+        await asyncio.gather(*(self.check(worker) for worker in workers))
+        for worker in workers:
+            if worker.retiring:
+                if worker.state == DEAD or self.router.drained(worker.worker_id):
+                    await self._retire(worker)
+            elif worker.state == DEAD and worker.port is not None:
+                await self._restart(worker)
+
+    async def run(self) -> None:
+        """Supervise workers until cancelled."""
+        while True:
+            await asyncio.sleep(self.health_interval_s)
+            try:
+                await self.tick()
+            except Exception:
+                logger.exception("Worker supervision round failed")
+
+    async def stop(self) -> None:
+        """Stop every spawned worker."""
+        await asyncio.gather(*(self._stop_process(w) for w in self.router.workers.values()))
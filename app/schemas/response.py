@@ -24,11 +24,29 @@ class FaceDetection(BaseModel):
     bbox: BoundingBox
 
 
+class PacingHint(BaseModel):
+    """When and how the client should send its next frame."""
+
+    next_frame_ms: int
+    max_width: int
+    max_height: int
+    jpeg_quality: int
+
+
 class PredictionResponse(BaseModel):
     """Response from prediction endpoint."""
 
+    # Avoid protected namespace warning for `model_id`
+    model_config = ConfigDict(protected_namespaces=())
+
     faces: List[FaceDetection]
     latency_ms: float
+    # Tier whose detections were returned: "fast" or "full" (cascade), or "crop"
+    tier: str = "full"
+    # Pooled model that served the request; None for the default model
+    model_id: Optional[str] = None
+    # None when PACING_ENABLED is off
+    pacing: Optional[PacingHint] = None
 
 
 class HealthResponse(BaseModel):
@@ -42,6 +60,187 @@ class HealthResponse(BaseModel):
     device: str
     version: str
     uptime_seconds: Optional[float] = None
+    # eager, trace or compile
+    execution_mode: Optional[str] = None
+
+
+class AdmissionStats(BaseModel):
+    """Admission controller state."""
+
+    limit: int
+    in_flight: int
+    queue_depth: int
+    latency_ewma_ms: Optional[float] = None
+    admitted_count: int
+    shed_count: int
+    expired_count: int
+
+
+class CascadeStats(BaseModel):
+    """Confidence cascade hit counts and rates."""
+
+    frames: int
+    fast_decided: int
+    escalated_uncertain: int
+    escalated_no_face: int
+    fast_hit_rate: Optional[float] = None
+    full_hit_rate: Optional[float] = None
+    uncertainty_band: List[float]
+
+
+class CropModeStats(BaseModel):
+    """Crop mode localiser and classifier counters."""
+
+    frames: int
+    faces: int
+    localised: int
+    reused: int
+    reuse_rate: Optional[float] = None
+    sessions: int
+
+
+class PooledModelStats(BaseModel):
+    """Load and usage statistics of one pooled model."""
+
+    # Avoid protected namespace warning for `model_id`
+    model_config = ConfigDict(protected_namespaces=())
+
+    model_id: str
+    loaded: bool
+    resident_mb: float
+    idle_s: Optional[float] = None
+    hits: int
+    misses: int
+    hit_rate: Optional[float] = None
+    loads: int
+    evictions: int
+    load_ms: Optional[float] = None
+
+
+class ModelPoolStats(BaseModel):
+    """Model pool state."""
+
+    budget_mb: float
+    resident_mb: float
+    loaded: int
+    evictions: int
+    models: List[PooledModelStats]
+
+
+class PacingStats(BaseModel):
+    """Client pacing control loop state."""
+
+    next_frame_ms: int
+    max_width: int
+    max_height: int
+    jpeg_quality: int
+    level: int
+    target_utilization: float
+    utilization: float
+    decode_utilization: float
+    inference_utilization: float
+    frame_rate: float
+    updates: int
+
+
+class AuditStats(BaseModel):
+    """Audit log queue and writer counters."""
+
+    queue_depth: int
+    submitted: int
+    written: int
+    dropped: int
+    unhashed: int
+    write_errors: int
+    batches: int
+    last_write_ms: Optional[float] = None
+
+
+class JobsStats(BaseModel):
+    """Bulk job counts and worker counters."""
+
+    workers: int
+    queued: int
+    running: int
+    completed: int
+    failed: int
+    cancelled: int
+    images_processed: int
+    batches: int
+    # Time workers waited for interactive requests before starting a batch
+    yield_s: float
+
+
+class LoggingStats(BaseModel):
+    """Log queue counters."""
+
+    queue_depth: int
+    # Records discarded because the queue was full
+    dropped: int
+
+
+class MetricsResponse(BaseModel):
+    """Runtime metrics response."""
+
+    admission: AdmissionStats
+    cascade: Optional[CascadeStats] = None
+    crops: Optional[CropModeStats] = None
+    model_pool: Optional[ModelPoolStats] = None
+    pacing: Optional[PacingStats] = None
+    audit: Optional[AuditStats] = None
+    jobs: Optional[JobsStats] = None
+    logging: Optional[LoggingStats] = None
+
+
+class RouterWorkerStats(BaseModel):
+    """Load and session placement of one worker behind the router."""
+
+    worker_id: str
+    url: str
+    pid: Optional[int] = None
+    # starting, healthy, draining or dead
+    state: str
+    in_flight: int
+    requests: int
+    errors: int
+    latency_ewma_ms: Optional[float] = None
+    restarts: int
+    sessions: int
+    ring_share: float
+
+
+class RouterStats(BaseModel):
+    """Sticky-session router state."""
+
+    sessions: int
+    moved_sessions: int
+    workers: List[RouterWorkerStats]
+
+
+class JobStatus(BaseModel):
+    """State and progress of a bulk job."""
+
+    job_id: str
+    state: str  # queued, running, completed, failed or cancelled
+    source: str  # "directory" or "archive"
+    name: str  # directory path or uploaded file name
+    total: int
+    processed: int
+    # Images that could not be read or decoded (recorded with an "error")
+    failed: int
+    faces: int
+    progress: float
+    images_per_s: Optional[float] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+
+
+class JobListResponse(BaseModel):
+    """All bulk jobs, newest first."""
+
+    jobs: List[JobStatus]
 
 
 class ErrorResponse(BaseModel):
@@ -0,0 +1,126 @@
+"""
+Reference camera client that follows the server's pacing hints.
+
+Each prediction response carries `pacing`: the interval to wait before the
+next frame and the largest size and JPEG quality to upload it at. The client
+resizes and encodes every frame accordingly and schedules the next one from
+the start of the previous request, so a slow response eats into the wait
+instead of adding to it. A 503 is retried after its Retry-After.
+
+Usage:
+    python clients/paced_client.py --source 0                # webcam
+    python clients/paced_client.py --source clip.mp4 --frames 200
+    python clients/paced_client.py --source images/ --url http://localhost:8080
+"""
+
+import argparse
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import cv2
+import requests
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp"}
+# Used until the first response arrives
+DEFAULT_HINT = {"next_frame_ms": 333, "max_width": 640, "max_height": 480, "jpeg_quality": 90}
+
+
+def frames(source: str):
+    """Yield BGR frames from a camera index, a video file or a directory of images."""
+    if os.path.isdir(source):
+        paths = sorted(p for p in Path(source).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        if not paths:
+            raise ValueError(f"No images in {source}")
+        while True:
+            for path in paths:
+                frame = cv2.imread(str(path))
+                if frame is not None:
+                    yield frame
+
+    capture = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    if not capture.isOpened():
+        raise ValueError(f"Cannot open {source}")
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                return
+            yield frame
+    finally:
+        capture.release()
+
+
+def encode(frame, hint: dict) -> bytes:
+    """Downscale `frame` to fit the hinted size and JPEG-encode it at the hinted quality."""
+    height, width = frame.shape[:2]
+    scale = min(1.0, hint["max_width"] / width, hint["max_height"] / height)
+    if scale < 1.0:
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+    ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, hint["jpeg_quality"]])
+    if not ok:
+        raise ValueError("JPEG encoding failed")
+    return buffer.tobytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Camera client that follows pacing hints")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--source", default="0", help="Camera index, video file or image dir")
+    parser.add_argument("--frames", type=int, default=None, help="Stop after this many frames")
+    parser.add_argument("--session-id", default=None, help="X-Session-Id (default: random)")
+    args = parser.parse_args()
+
+    session = requests.Session()
+    session.headers["X-Session-Id"] = args.session_id or uuid.uuid4().hex
+    hint = dict(DEFAULT_HINT)
+    sent = 0
+    start = time.perf_counter()
+
+    for frame in frames(args.source):
+        if args.frames is not None and sent >= args.frames:
+            break
+        sent_at = time.perf_counter()
+        body = encode(frame, hint)
+        try:
+            response = session.post(
+                f"{args.url}/v1/predict",
+                files={"file": ("frame.jpg", body, "image/jpeg")},
+                timeout=30,
+            )
+        except requests.RequestException as e:
+            print(f"Request failed: {e}", file=sys.stderr)
+            time.sleep(1.0)
+            continue
+        sent += 1
+
+        if response.status_code == 503:
+            wait_s = float(response.headers.get("Retry-After", 1))
+            print(f"Server overloaded, waiting {wait_s:.1f}s")
+            time.sleep(wait_s)
+            continue
+        if response.status_code != 200:
+            print(f"HTTP {response.status_code}: {response.text[:200]}", file=sys.stderr)
+        else:
+            data = response.json()
+            hint = data.get("pacing") or hint
+            labels = ", ".join(f"{f['label']} {f['confidence']:.2f}" for f in data["faces"])
+            print(
+                f"{len(body) / 1024:6.1f} KiB  {data['latency_ms']:6.1f} ms  "
+                f"next {hint['next_frame_ms']} ms @ {hint['max_width']}x{hint['max_height']} "
+                f"q{hint['jpeg_quality']}  [{labels or 'no faces'}]"
+            )
+
+        elapsed_ms = (time.perf_counter() - sent_at) * 1000
+        time.sleep(max(0.0, hint["next_frame_ms"] - elapsed_ms) / 1000)
+
+    total_s = time.perf_counter() - start
+    if sent:
+        print(f"Sent {sent} frames in {total_s:.1f}s ({sent / total_s:.2f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
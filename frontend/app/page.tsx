@@ -6,11 +6,12 @@ import FrameCapture from '@/components/camera/FrameCapture'
 import FaceBoxes from '@/components/overlay/FaceBoxes'
 import StatusBadge from '@/components/overlay/StatusBadge'
 import Scene from '@/components/three/Scene'
-import { FaceDetection } from '@/lib/types'
+import { FaceDetection, PacingHint } from '@/lib/types'
 import { checkHealth } from '@/lib/api'
 
 const VIDEO_WIDTH = 640
 const VIDEO_HEIGHT = 480
+const DEFAULT_FPS = 3
 
 export default function Home() {
   const [detections, setDetections] = useState<FaceDetection[]>([])
@@ -18,6 +19,8 @@ export default function Home() {
   const [error, setError] = useState<string | null>(null)
   const [latency, setLatency] = useState<number | undefined>(undefined)
   const [isHealthy, setIsHealthy] = useState<boolean | null>(null)
+  // Capture rate, following the server's pacing hints
+  const [fps, setFps] = useState<number>(DEFAULT_FPS)
   const webcamRef = useRef<{ getScreenshot: () => string | null } | null>(null)
 
   // Health check: initial + periodic polling so banner reflects real status
@@ -56,10 +59,10 @@ export default function Home() {
           setCurrentFrame(screenshot)
         }
       }
-    }, 1000 / 3) // 3 FPS
+    }, 1000 / fps)
 
     return () => clearInterval(interval)
-  }, [])
+  }, [fps])
 
   const handleFrameCapture = useCallback((imageSrc: string) => {
     setCurrentFrame(imageSrc)
@@ -78,6 +81,11 @@ export default function Home() {
     []
   )
 
+  const handlePacing = useCallback((hint: PacingHint) => {
+    // Round to avoid restarting the capture timers on every small change
+    setFps(Math.max(0.5, Math.round(10000 / hint.next_frame_ms) / 10))
+  }, [])
+
   const handleError = useCallback((errorMessage: string) => {
     // Only set error if it's a real connection issue, not just "no faces detected"
     if (errorMessage.includes('No response from server') || 
@@ -145,6 +153,7 @@ export default function Home() {
               onFrameCapture={handleFrameCapture}
               width={VIDEO_WIDTH}
               height={VIDEO_HEIGHT}
+              fps={fps}
             />
           </div>
 
@@ -160,7 +169,8 @@ export default function Home() {
             imageSrc={currentFrame}
             onDetection={handleDetection}
             onError={handleError}
-            fps={3}
+            onPacing={handlePacing}
+            fps={DEFAULT_FPS}
           />
         </div>
 
@@ -41,7 +41,8 @@ export default function CameraFeed({
     }
   }, [onFrameCapture])
 
-  // Capture frames at a controlled FPS (client-side sampling)
+  // Capture frames at a controlled FPS (client-side sampling; the page follows
+  // the server's pacing hint)
   useEffect(() => {
     if (!isStreaming || !onFrameCapture) return
     const interval = setInterval(() => {
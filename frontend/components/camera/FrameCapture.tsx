@@ -2,25 +2,29 @@
 
 import { useRef, useCallback, useEffect } from 'react'
 import { predictImage } from '@/lib/api'
-import { FaceDetection, PredictionResponse } from '@/lib/types'
+import { FaceDetection, PacingHint, PredictionResponse } from '@/lib/types'
 
 interface FrameCaptureProps {
   imageSrc: string | null
   onDetection: (detections: FaceDetection[], latency?: number) => void
   onError: (error: string) => void
-  fps?: number // Frames per second for capture
+  onPacing?: (hint: PacingHint) => void
+  fps?: number // Frames per second for capture, until the server sends a pacing hint
 }
 
 export default function FrameCapture({
   imageSrc,
   onDetection,
   onError,
+  onPacing,
   fps = 3, // Default 3 FPS
 }: FrameCaptureProps) {
   const canvasRef = useRef<HTMLCanvasElement>(null)
   const intervalRef = useRef<NodeJS.Timeout | null>(null)
   const lastCaptureTimeRef = useRef<number>(0)
   const requestInFlightRef = useRef<boolean>(false)
+  // Latest server pacing hint: next-frame interval, upload size and JPEG quality
+  const pacingRef = useRef<PacingHint | null>(null)
 
   const captureAndPredict = useCallback(async (src: string) => {
     if (!canvasRef.current) return
@@ -41,12 +45,16 @@ export default function FrameCapture({
     img.crossOrigin = 'anonymous'
     
     img.onload = async () => {
-      // Set canvas size
-      canvas.width = img.width
-      canvas.height = img.height
+      // Set canvas size, downscaled to the size the server asked for
+      const pacing = pacingRef.current
+      const scale = pacing
+        ? Math.min(1, pacing.max_width / img.width, pacing.max_height / img.height)
+        : 1
+      canvas.width = Math.round(img.width * scale)
+      canvas.height = Math.round(img.height * scale)
       
       // Draw image to canvas
-      ctx.drawImage(img, 0, 0)
+      ctx.drawImage(img, 0, 0, canvas.width, canvas.height)
       
       // Convert to blob
       canvas.toBlob(async (blob) => {
@@ -61,6 +69,10 @@ export default function FrameCapture({
 
         try {
           const response: PredictionResponse = await predictImage(file)
+          if (response.pacing) {
+            pacingRef.current = response.pacing
+            onPacing?.(response.pacing)
+          }
           // Pass both faces and latency, and clear any previous errors
           onDetection(response.faces, response.latency_ms)
         } catch (error) {
@@ -68,7 +80,7 @@ export default function FrameCapture({
         } finally {
           requestInFlightRef.current = false
         }
-      }, 'image/jpeg', 0.9)
+      }, 'image/jpeg', pacing ? pacing.jpeg_quality / 100 : 0.9)
     }
 
     img.onerror = () => {
@@ -77,12 +89,13 @@ export default function FrameCapture({
     }
 
     img.src = src
-  }, [onDetection, onError])
+  }, [onDetection, onError, onPacing])
 
   useEffect(() => {
     if (!imageSrc) return
 
-    const minInterval = 1000 / fps // Minimum time between captures in ms
+    // Minimum time between captures in ms; the server's hint wins once received
+    const minInterval = pacingRef.current ? pacingRef.current.next_frame_ms : 1000 / fps
     const now = Date.now()
 
     if (now - lastCaptureTimeRef.current >= minInterval) {
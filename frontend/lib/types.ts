@@ -15,9 +15,18 @@ export interface FaceDetection {
   bbox: BoundingBox
 }
 
+// Server-computed pacing for the next frame
+export interface PacingHint {
+  next_frame_ms: number
+  max_width: number
+  max_height: number
+  jpeg_quality: number
+}
+
 export interface PredictionResponse {
   faces: FaceDetection[]
   latency_ms: number
+  pacing?: PacingHint
 }
 
 export interface HealthResponse {
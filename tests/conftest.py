@@ -0,0 +1,17 @@
+"""
+Shared test fixtures.
+"""
+import pytest
+import torch
+
+
+@pytest.fixture(scope="session")
+def tiny_checkpoint(tmp_path_factory):
+    """An untrained two-class YOLOv8n checkpoint."""
+    from ultralytics.nn.tasks import DetectionModel
+
+    path = tmp_path_factory.mktemp("model") / "tiny.pt"
+    model = DetectionModel("yolov8n.yaml", nc=2, verbose=False)
+    model.names = {0: "fake", 1: "real"}
+    torch.save({"model": model, "train_args": {"imgsz": 160}}, path)
+    return str(path)
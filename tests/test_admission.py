@@ -0,0 +1,86 @@
+"""
+Unit tests for the admission controller.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.core.admission import (
+    AdmissionController,
+    DeadlineExceededError,
+    OverloadedError,
+)
+
+
+def test_admits_up_to_limit_and_sheds_when_queue_full():
+    """Requests beyond limit + queue are shed."""
+    async def scenario():
+        controller = AdmissionController(initial_limit=1, max_queue=1)
+        await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0)
+        assert controller.queue_depth == 1
+
+        with pytest.raises(OverloadedError):
+            await controller.acquire()
+
+        controller.release(latency_ms=10)
+        await waiter
+        assert controller.in_flight == 1
+        assert controller.shed_count == 1
+
+    asyncio.run(scenario())
+
+
+def test_queued_request_expires_at_deadline():
+    """A queued request is dropped once its deadline passes."""
+    async def scenario():
+        controller = AdmissionController(initial_limit=1)
+        await controller.acquire()
+
+        with pytest.raises(DeadlineExceededError):
+            await controller.acquire(deadline=time.monotonic() + 0.01)
+
+        assert controller.queue_depth == 0
+        assert controller.expired_count == 1
+
+    asyncio.run(scenario())
+
+
+def test_past_deadline_rejected_without_queueing():
+    """A request whose deadline already passed never takes a slot."""
+    async def scenario():
+        controller = AdmissionController(initial_limit=4)
+        with pytest.raises(DeadlineExceededError):
+            await controller.acquire(deadline=time.monotonic() - 1)
+        assert controller.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_limit_adapts_to_latency():
+    """Limit backs off on slow requests and grows on fast ones."""
+    async def scenario():
+        controller = AdmissionController(initial_limit=8, target_latency_ms=100)
+        start = controller.limit
+        await controller.acquire()
+        controller.release(latency_ms=500)
+        backed_off = controller.limit
+        assert backed_off < start
+
+        # Fast requests that keep the limit in use grow it additively
+        for _ in range(3):
+            for _ in range(controller.limit):
+                await controller.acquire()
+            for _ in range(controller.in_flight):
+                controller.release(latency_ms=10)
+        grown = controller.limit
+        assert grown > backed_off
+
+        for _ in range(3):
+            await controller.acquire()
+            controller.release(latency_ms=500)
+        assert controller.limit < grown
+
+    asyncio.run(scenario())
@@ -58,3 +58,25 @@ def test_predict_endpoint_valid_image():
         assert "faces" in data
         assert "latency_ms" in data
         assert isinstance(data["faces"], list)
+        assert data["pacing"]["next_frame_ms"] > 0
+
+
+def test_metrics_endpoint():
+    """Test runtime metrics endpoint."""
+    response = client.get("/v1/metrics")
+    assert response.status_code == 200
+    data = response.json()
+    assert "limit" in data["admission"]
+    assert "shed_count" in data["admission"]
+    assert "expired_count" in data["admission"]
+    assert "next_frame_ms" in data["pacing"]
+
+
+def test_predict_endpoint_invalid_deadline():
+    """Test predict endpoint rejects a non-positive deadline."""
+    response = client.post(
+        "/v1/predict",
+        files={"file": ("test.jpg", b"\xff\xd8", "image/jpeg")},
+        headers={"X-Request-Deadline-Ms": "0"},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,118 @@
+"""
+Unit tests for the asynchronous audit log.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app.core.audit import AuditLog, JsonlSink, SqliteSink
+
+
+def _record(i):
+    face = {"label": "real", "confidence": 0.9, "bbox": {"x": i, "y": 0, "w": 5, "h": 5}}
+    return {"ts": time.time(), "model": "m.pt", "tier": "full", "latency_ms": 12.5, "faces": [face]}
+
+
+class StalledSink:
+    """Blocks every write until released, like a stuck disk."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.records = []
+
+    def write(self, records):
+        self.release.wait()
+        self.records.extend(records)
+
+    def close(self):
+        pass
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_jsonl_batches_and_rotation(tmp_path):
+    path = tmp_path / "audit.jsonl"
+    audit = AuditLog(JsonlSink(str(path), max_bytes=2000, backup_count=2), batch_size=10)
+    for i in range(50):
+        assert audit.submit(_record(i))
+    audit.close()
+
+    assert audit.stats()["written"] == 50
+    assert audit.stats()["batches"] >= 5
+    files = sorted(tmp_path.iterdir())
+    assert [f.name for f in files] == ["audit.jsonl", "audit.jsonl.1", "audit.jsonl.2"]
+    assert all(f.stat().st_size <= 2000 for f in files)
+    # Oldest rotated files are dropped; the newest records survive in order
+    xs = [r["faces"][0]["bbox"]["x"] for f in reversed(files) for r in _lines(f)]
+    assert xs == list(range(50 - len(xs), 50))
+
+
+def test_sqlite_sink_uses_wal(tmp_path):
+    path = tmp_path / "audit.db"
+    audit = AuditLog(SqliteSink(str(path)), flush_interval_s=0.05)
+    for i in range(20):
+        audit.submit(_record(i))
+    audit.close()
+
+    db = sqlite3.connect(path)
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert db.execute("SELECT COUNT(*), SUM(face_count) FROM predictions").fetchone() == (20, 20)
+    faces = json.loads(db.execute("SELECT faces FROM predictions WHERE id = 3").fetchone()[0])
+    assert faces[0]["bbox"]["x"] == 2
+
+
+@pytest.mark.parametrize("policy, kept", [("drop_newest", [0, 1, 2]), ("drop_oldest", [7, 8, 9])])
+def test_full_queue_drops_without_blocking(policy, kept):
+    sink = StalledSink()
+    audit = AuditLog(sink, max_queue=3, batch_size=100, flush_interval_s=60, drop_policy=policy)
+
+    start = time.perf_counter()
+    accepted = [audit.submit(_record(i)) for i in range(10)]
+    assert time.perf_counter() - start < 0.05
+    assert accepted.count(True) == (3 if policy == "drop_newest" else 10)
+    assert audit.stats()["dropped"] == 7
+
+    sink.release.set()
+    audit.close()
+    assert [r["faces"][0]["bbox"]["x"] for r in sink.records] == kept
+
+
+def test_stalled_writer_does_not_block_submit():
+    sink = StalledSink()
+    audit = AuditLog(sink, batch_size=1, flush_interval_s=0.01)
+    audit.submit(_record(0))
+    time.sleep(0.05)  # the writer is now stuck inside sink.write
+
+    start = time.perf_counter()
+    for i in range(1000):
+        audit.submit(_record(i))
+    assert time.perf_counter() - start < 0.5
+    assert audit.stats()["queue_depth"] == 1000
+
+    sink.release.set()
+    audit.close()
+    assert len(sink.records) == 1001
+
+
+def test_image_hash_computed_by_writer():
+    sink = StalledSink()
+    sink.release.set()
+    audit = AuditLog(sink, hash_images=True, max_pending_image_bytes=10, flush_interval_s=60)
+    audit.submit(_record(0), b"image-one")
+    audit.submit(_record(1), b"image-two")  # over the pending-bytes cap
+    audit.close()
+
+    assert sink.records[0]["image_sha256"] == hashlib.sha256(b"image-one").hexdigest()
+    assert "image_sha256" not in sink.records[1]
+    assert audit.stats()["unhashed"] == 1
+
+
+def test_invalid_drop_policy():
+    with pytest.raises(ValueError):
+        AuditLog(StalledSink(), drop_policy="block")
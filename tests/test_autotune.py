@@ -0,0 +1,93 @@
+"""
+Unit tests for runtime auto-tuning helpers.
+"""
+from app.core.config import settings
+from app.inference import autotune
+from app.inference.autotune import (
+    RuntimeConfig,
+    candidate_configs,
+    configure_runtime,
+    load_cached,
+    save_cached,
+    select_best,
+)
+
+
+def test_candidate_configs_split_threads_for_worker_count():
+    """Candidates vary the thread split for the running worker count, never oversubscribing."""
+    candidates = candidate_configs(cores=8, workers=2)
+    assert all(c.workers == 2 for c in candidates)
+    first = candidates[0]
+    assert (first.torch_threads, first.interop_threads, first.cv2_threads) == (4, 1, 4)
+    assert {c.torch_threads for c in candidates} == {4, 2, 1}
+    assert {c.interop_threads for c in candidates} == {1, 2}
+    assert {c.cv2_threads for c in candidates} == {4, 1}
+    assert len({(c.torch_threads, c.interop_threads, c.cv2_threads) for c in candidates}) == 12
+
+
+def test_select_best_respects_objective_and_budget():
+    """Throughput wins unless it breaks the latency budget."""
+    fast = RuntimeConfig(torch_threads=8, measured={"images_per_s": 20, "p95_latency_ms": 60})
+    wide = RuntimeConfig(
+        torch_threads=1, workers=8, measured={"images_per_s": 50, "p95_latency_ms": 300}
+    )
+    assert select_best([fast, wide], "throughput") is wide
+    assert select_best([fast, wide], "latency") is fast
+    assert select_best([fast, wide], "throughput", target_latency_ms=100) is fast
+
+
+def test_cache_roundtrip(tmp_path):
+    """Tuned configs persist per fingerprint."""
+    path = str(tmp_path / "autotune.json")
+    config = RuntimeConfig(torch_threads=4, workers=2)
+    save_cached(path, "host-a", config, "throughput")
+
+    assert load_cached(path, "host-a") == config
+    assert load_cached(path, "host-b") is None
+
+
+def _runtime_settings(tmp_path, monkeypatch, applied):
+    monkeypatch.setattr(settings, "AUTOTUNE_CACHE_PATH", str(tmp_path / "autotune.json"))
+    monkeypatch.setattr(settings, "AUTOTUNE_ENABLED", True)
+    monkeypatch.setattr(settings, "AUTOTUNE_OBJECTIVE", "throughput")
+    monkeypatch.setattr(settings, "AUTOTUNE_TARGET_LATENCY_MS", None)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 2)
+    monkeypatch.setattr(autotune, "available_cores", lambda: 8)
+    monkeypatch.setattr(autotune, "apply_config", applied.append)
+
+
+def test_tuned_thread_split_applied_and_cached_per_worker_count(tmp_path, monkeypatch):
+    """The fastest split is applied and reused; another worker count is tuned separately."""
+    applied, measured = [], []
+    _runtime_settings(tmp_path, monkeypatch, applied)
+
+    def benchmark(config, duration_s):
+        measured.append(config)
+        best = (config.torch_threads, config.interop_threads, config.cv2_threads) == (2, 2, 1)
+        return {"images_per_s": 30.0 if best else 10.0, "p95_latency_ms": 50.0}
+
+    monkeypatch.setattr(autotune, "benchmark_config", benchmark)
+    config = configure_runtime()
+    assert (config.torch_threads, config.interop_threads, config.cv2_threads) == (2, 2, 1)
+    assert applied[-1] is config and len(measured) == 12
+
+    cached = configure_runtime()
+    assert (cached.torch_threads, cached.interop_threads, cached.cv2_threads) == (2, 2, 1)
+    assert len(measured) == 12
+
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    assert configure_runtime().workers == 4
+    assert {c.workers for c in measured[12:]} == {4}
+
+
+def test_tune_lock_timeout_falls_back_to_defaults(tmp_path, monkeypatch):
+    """A worker that gives up waiting for another's tune still starts, on the even split."""
+    applied = []
+    _runtime_settings(tmp_path, monkeypatch, applied)
+
+    def timed_out(lock_path, timeout=600.0):
+        raise TimeoutError(f"Timed out waiting for {lock_path}")
+
+    monkeypatch.setattr(autotune, "_exclusive", timed_out)
+    config = configure_runtime()
+    assert (config.workers, config.torch_threads, config.cv2_threads) == (2, 4, 4)
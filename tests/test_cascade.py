@@ -0,0 +1,55 @@
+"""
+Unit tests for the confidence cascade.
+"""
+import numpy as np
+import pytest
+
+from app.inference.cascade import FAST_TIER, FULL_TIER, ModelCascade
+
+
+class StubModel:
+    """Model returning fixed detections and counting calls."""
+
+    def __init__(self, confidences):
+        self.detections = np.array(
+            [[10, 10, 50, 50, c, 0] for c in confidences], dtype=np.float32
+        ).reshape(-1, 6)
+        self.calls = 0
+
+    def predict(self, image, **kwargs):
+        self.calls += 1
+        return [self.detections]
+
+
+def _run(fast_confidences):
+    fast, full = StubModel(fast_confidences), StubModel([0.95])
+    cascade = ModelCascade(fast, full, low=0.4, high=0.8)
+    results, tier = cascade.predict(np.zeros((48, 64, 3), dtype=np.uint8))
+    return cascade, full, results, tier
+
+
+def test_confident_faces_stay_on_fast_tier():
+    cascade, full, results, tier = _run([0.9, 0.85, 0.1])
+    assert tier == FAST_TIER
+    assert full.calls == 0
+    assert len(results[0]) == 3
+    assert cascade.stats()["fast_hit_rate"] == 1.0
+
+
+@pytest.mark.parametrize(
+    "confidences, reason",
+    [([0.9, 0.6], "escalated_uncertain"), ([], "escalated_no_face"), ([0.3], "escalated_no_face")],
+)
+def test_uncertain_or_missing_faces_escalate(confidences, reason):
+    cascade, full, results, tier = _run(confidences)
+    assert tier == FULL_TIER
+    assert full.calls == 1
+    assert results[0] is full.detections
+    stats = cascade.stats()
+    assert stats[reason] == 1
+    assert stats["full_hit_rate"] == 1.0
+
+
+def test_invalid_band_rejected():
+    with pytest.raises(ValueError):
+        ModelCascade(StubModel([]), StubModel([]), low=0.8, high=0.4)
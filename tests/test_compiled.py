@@ -0,0 +1,52 @@
+"""
+Unit tests for the compiled PyTorch execution path.
+"""
+import numpy as np
+import pytest
+import torch
+
+from app.core.config import settings
+from app.inference.compiled import parse_frame_sizes
+from app.inference.model import ModelWrapper
+
+
+@pytest.fixture
+def compile_settings(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "MODEL_COMPILE_CACHE_DIR", str(tmp_path / "compiled"))
+    monkeypatch.setattr(settings, "MODEL_COMPILE_FRAME_SIZES", "320x240")
+    return monkeypatch
+
+
+def test_parse_frame_sizes():
+    assert parse_frame_sizes("640x480, 1280X720") == [(640, 480), (1280, 720)]
+    assert parse_frame_sizes("") == []
+
+
+def test_trace_matches_eager(tiny_checkpoint, compile_settings):
+    """Traced inference returns the same detections as the eager module."""
+    image = np.random.default_rng(0).integers(0, 255, (240, 320, 3), dtype=np.uint8)
+
+    compile_settings.setattr(settings, "MODEL_COMPILE", "off")
+    eager = ModelWrapper(tiny_checkpoint).predict(image, conf=0.001)[0]
+
+    compile_settings.setattr(settings, "MODEL_COMPILE", "trace")
+    wrapper = ModelWrapper(tiny_checkpoint)
+    assert wrapper.execution_mode == "trace"
+    traced = wrapper.predict(image, conf=0.001)[0]
+
+    assert traced.shape == eager.shape
+    assert np.allclose(traced, eager, atol=1e-3)
+
+
+def test_compile_failure_falls_back_to_eager(tiny_checkpoint, compile_settings):
+    """A model that cannot be compiled is served eagerly."""
+
+    def broken_trace(*args, **kwargs):
+        raise RuntimeError("unsupported op")
+
+    compile_settings.setattr(settings, "MODEL_COMPILE", "trace")
+    compile_settings.setattr(torch.jit, "trace", broken_trace)
+    wrapper = ModelWrapper(tiny_checkpoint)
+
+    assert wrapper.execution_mode == "eager"
+    assert len(wrapper.predict(np.zeros((240, 320, 3), dtype=np.uint8))) == 1
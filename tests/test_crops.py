@@ -0,0 +1,88 @@
+"""
+Unit tests for crop-level liveness mode.
+"""
+import numpy as np
+import pytest
+import torch
+
+from app.inference.crops import PAD_VALUE, CropClassifier, CropPipeline, crop_faces
+from app.inference.postprocessor import CLASS_NAMES
+
+
+class StubClassifier:
+    """Classifier scoring every crop as the dataset's class 1 ("real")."""
+
+    names = {0: "fake", 1: "real"}
+    imgsz = 32
+
+    def __init__(self):
+        self.batches = []
+
+    def classify(self, crops):
+        self.batches.append(crops.shape)
+        return np.tile(np.array([[0.1, 0.9]], dtype=np.float32), (len(crops), 1))
+
+
+class StubLocaliser:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, image):
+        self.calls += 1
+        return np.array([[10, 10, 30, 40]], dtype=np.float64)
+
+
+def test_crop_faces_is_square_resized_and_padded():
+    image = np.full((60, 80, 3), 7, dtype=np.uint8)
+    # Centred on the top-left corner: three quarters of the square are outside the frame
+    crops = crop_faces(image, np.array([[-10, -10, 10, 10]]), imgsz=16, margin=1.0)
+    assert crops.shape == (1, 16, 16, 3)
+    assert (crops[0, :8, :8] == PAD_VALUE).all()
+    assert (crops[0, 8:, 8:] == 7).all()
+    assert crop_faces(image, np.zeros((0, 4)), imgsz=16, margin=1.3).shape == (0, 16, 16, 3)
+
+
+def test_labels_map_onto_serving_classes():
+    pipeline = CropPipeline(StubClassifier(), StubLocaliser())
+    (result,) = pipeline.predict(np.zeros((48, 64, 3), dtype=np.uint8))
+    assert result.shape == (1, 6)
+    np.testing.assert_allclose(result[0, :4], [10, 10, 30, 40])
+    assert result[0, 4] == pytest.approx(0.9)
+    assert CLASS_NAMES[int(result[0, 5])] == "real"
+
+
+def test_classifier_without_both_labels_rejected():
+    classifier = StubClassifier()
+    classifier.names = {0: "live", 1: "spoof"}
+    with pytest.raises(ValueError):
+        CropPipeline(classifier, StubLocaliser())
+
+
+def test_session_reuses_boxes_for_configured_frames():
+    localiser = StubLocaliser()
+    pipeline = CropPipeline(StubClassifier(), localiser, reuse_frames=2)
+    image = np.zeros((48, 64, 3), dtype=np.uint8)
+    for _ in range(6):
+        pipeline.predict(image, session_id="a")
+    pipeline.predict(image)
+    assert localiser.calls == 3
+    stats = pipeline.stats()
+    assert (stats["frames"], stats["localised"], stats["reused"]) == (7, 3, 4)
+    assert stats["sessions"] == 1
+
+
+def test_classifier_checkpoint_uses_trained_imgsz(tmp_path):
+    from ultralytics.nn.tasks import ClassificationModel
+
+    path = tmp_path / "cls.pt"
+    model = ClassificationModel("yolov8n-cls.yaml", nc=2, verbose=False)
+    model.names = {0: "FAKE", 1: "REAL"}
+    model.args = {"imgsz": 64}
+    torch.save({"model": model, "train_args": {"imgsz": 64}}, path)
+
+    classifier = CropClassifier(str(path))
+    assert classifier.imgsz == 64
+    assert classifier.names == {0: "fake", 1: "real"}
+    probs = classifier.classify(np.zeros((3, 64, 64, 3), dtype=np.uint8))
+    assert probs.shape == (3, 2)
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0, rtol=1e-5)
@@ -0,0 +1,39 @@
+"""
+Unit tests for the data collection writer.
+"""
+import threading
+
+import numpy as np
+
+from training.data_collection import AsyncWriter, PipelineStats
+
+
+def test_writer_counts_failures_instead_of_hanging(tmp_path):
+    stats = PipelineStats()
+    # Missing output folder: every image and label write fails
+    writer = AsyncWriter(str(tmp_path / "missing"), stats, batch_size=2, queue_size=2)
+    writer.start()
+    img = np.zeros((8, 8, 3), dtype=np.uint8)
+
+    def capture():
+        for i in range(10):
+            writer.submit(f"s_{i:07d}", img, ["0 0.5 0.5 0.1 0.1\n"])
+        writer.close()
+
+    thread = threading.Thread(target=capture, daemon=True)
+    thread.start()
+    thread.join(10)
+    assert not thread.is_alive()
+    assert (stats.written, stats.write_errors) == (0, 10)
+    assert "write errors 10" in stats.report()
+
+
+def test_writer_writes_images_and_labels(tmp_path):
+    stats = PipelineStats()
+    writer = AsyncWriter(str(tmp_path), stats, batch_size=2)
+    writer.start()
+    writer.submit("s_0000000", np.zeros((8, 8, 3), dtype=np.uint8), ["1 0.5 0.5 0.1 0.1\n"])
+    writer.close()
+    assert stats.written == 1 and stats.write_errors == 0
+    assert (tmp_path / "s_0000000.txt").read_text() == "1 0.5 0.5 0.1 0.1\n"
+    assert (tmp_path / "s_0000000.jpg").exists()
@@ -0,0 +1,104 @@
+"""
+Unit tests for the native decoder, checked against Ultralytics.
+"""
+import numpy as np
+import pytest
+import torch
+
+from app.inference.decoder import decode, input_shape, scale_boxes
+from app.inference.model import ModelWrapper
+
+
+def _random_preds(batch=3, nc=2, anchors=2100, size=320, seed=0):
+    """Raw (B, 4 + nc, anchors) head output with clustered, overlapping boxes."""
+    g = torch.Generator().manual_seed(seed)
+    centres = torch.rand(batch, 2, anchors, generator=g) * size
+    sizes = 10 + torch.rand(batch, 2, anchors, generator=g) * 60
+    scores = torch.rand(batch, nc, anchors, generator=g) ** 4
+    return torch.cat([centres, sizes, scores], dim=1)
+
+
+def test_decode_matches_ultralytics_nms():
+    """Batched decode keeps the same boxes as Ultralytics' non_max_suppression."""
+    try:
+        from ultralytics.utils.nms import non_max_suppression
+    except ImportError:  # ultralytics < 8.3
+        from ultralytics.utils.ops import non_max_suppression
+
+    preds = _random_preds()
+    expected = non_max_suppression(preds.clone(), conf_thres=0.25, iou_thres=0.7, max_det=300)
+    decoded = decode(preds, conf=0.25, iou=0.7, max_det=300)
+
+    assert len(decoded) == len(expected)
+    for ours, theirs in zip(decoded, expected):
+        assert ours.shape == theirs.shape
+        assert torch.allclose(ours, theirs, atol=1e-4)
+
+
+def test_decode_handles_empty_and_max_det():
+    preds = _random_preds(batch=2)
+    preds[0, 4:] = 0.0
+    decoded = decode(preds, conf=0.25, max_det=5)
+    assert decoded[0].shape == (0, 6)
+    assert len(decoded[1]) == 5
+    assert torch.all(decoded[1][:-1, 4] >= decoded[1][1:, 4])
+
+
+@pytest.mark.skipif(not torch.cuda.is_available(), reason="needs CUDA")
+def test_decode_keeps_tensors_on_device(monkeypatch):
+    """The fallback NMS and the MAX_NMS cap build their index tensors on the input's device."""
+    import builtins
+
+    import app.inference.decoder as decoder
+
+    real_import = builtins.__import__
+
+    def no_torchvision(name, *args, **kwargs):
+        if name == "torchvision":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "__import__", no_torchvision)
+    monkeypatch.setattr(decoder, "MAX_NMS", 50)
+    preds = _random_preds()
+    expected = decode(preds, conf=0.25, iou=0.7)
+    decoded = decode(preds.cuda(), conf=0.25, iou=0.7)
+    for ours, theirs in zip(decoded, expected):
+        assert ours.device.type == "cuda"
+        assert torch.allclose(ours.cpu(), theirs, atol=1e-4)
+
+
+def test_scale_boxes_matches_ultralytics():
+    from ultralytics.utils.ops import scale_boxes as ultralytics_scale_boxes
+
+    shape = input_shape(480, 640, 320)
+    detections = torch.tensor([[5.0, 30.0, 200.0, 220.0, 0.9, 1.0], [-4.0, 0.0, 330.0, 250.0, 0.5, 0.0]])
+    expected = ultralytics_scale_boxes(shape, detections[:, :4].clone(), (480, 640))
+    assert torch.allclose(scale_boxes(detections.clone(), shape, (480, 640))[:, :4], expected)
+
+
+def test_wrapper_matches_ultralytics_predict(tiny_checkpoint):
+    """End-to-end detections equal `YOLO.predict` on the same checkpoint."""
+    from ultralytics import YOLO
+
+    image = np.random.default_rng(0).integers(0, 255, (240, 320, 3), dtype=np.uint8)
+    expected = YOLO(tiny_checkpoint).predict(image, imgsz=160, conf=0.001, verbose=False)
+    expected = expected[0].boxes.data.cpu().numpy()
+
+    detections = ModelWrapper(tiny_checkpoint).predict(image, conf=0.001)[0]
+    assert detections.shape == expected.shape
+    assert np.allclose(detections, expected, atol=1e-3)
+
+
+def test_predict_batch_matches_single_images(tiny_checkpoint):
+    """Batched inference, including mixed frame sizes, equals per-image inference."""
+    rng = np.random.default_rng(1)
+    wrapper = ModelWrapper(tiny_checkpoint, imgsz=160)
+    same = [rng.integers(0, 255, (240, 320, 3), dtype=np.uint8) for _ in range(3)]
+
+    batched = wrapper.predict_batch(same, conf=0.001)
+    for image, detections in zip(same, batched):
+        assert np.allclose(detections, wrapper.predict(image, conf=0.001)[0], atol=1e-3)
+
+    mixed = same[:1] + [rng.integers(0, 255, (200, 150, 3), dtype=np.uint8)]
+    assert [d.shape[1] for d in wrapper.predict_batch(mixed, conf=0.001)] == [6, 6]
@@ -0,0 +1,33 @@
+"""
+Unit tests for the distillation loss.
+"""
+import pytest
+import torch
+
+from training.distill import DistillationLoss
+
+
+def test_kd_term_counted_once_in_summed_loss():
+    from ultralytics.cfg import get_cfg
+    from ultralytics.nn.tasks import DetectionModel
+
+    torch.manual_seed(0)
+    student = DetectionModel("yolov8n.yaml", nc=2, verbose=False)
+    student.args = get_cfg()
+    teacher = DetectionModel("yolov8n.yaml", nc=2, verbose=False).eval()
+    criterion = DistillationLoss(student, teacher)
+
+    images = torch.rand(2, 3, 64, 64)
+    batch = {
+        "img": images,
+        "batch_idx": torch.tensor([0.0, 1.0]),
+        "cls": torch.tensor([[0.0], [1.0]]),
+        "bboxes": torch.tensor([[0.5, 0.5, 0.3, 0.3], [0.4, 0.4, 0.2, 0.2]]),
+    }
+    preds = student.train()(images)
+    loss, _ = criterion(preds, batch)
+    base, _ = criterion.base(preds, batch)
+    kd = criterion.distill_terms(preds, images)
+
+    # The trainer back-propagates loss.sum()
+    assert loss.sum().item() == pytest.approx(base.sum().item() + kd.item() * 2, rel=1e-5)
@@ -0,0 +1,10 @@
+"""
+Unit tests for offline evaluation helpers.
+"""
+from training.evaluate import report_thresholds
+
+
+def test_configured_threshold_below_requested_sets_the_floor():
+    thresholds = report_thresholds([0.7, 0.5, 0.5], configured=0.3)
+    assert thresholds == [0.3, 0.5, 0.7]
+    assert report_thresholds([0.2, 0.6], configured=0.6) == [0.2, 0.6]
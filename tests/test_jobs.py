@@ -0,0 +1,277 @@
+"""
+Unit tests for bulk jobs.
+"""
+import io
+import json
+import os
+import tarfile
+import threading
+import time
+import zipfile
+
+import cv2
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import jobs as jobs_module
+from app.core.jobs import (
+    CANCELLED,
+    COMPLETED,
+    QUEUED,
+    DirectoryNotAllowedError,
+    JobError,
+    JobManager,
+    JobStateError,
+)
+
+
+def _jpeg(width=64, height=48):
+    ok, data = cv2.imencode(".jpg", np.full((height, width, 3), 128, dtype=np.uint8))
+    return data.tobytes()
+
+
+class StubModel:
+    """One REAL face per frame; optionally blocks before each batch until released."""
+
+    def __init__(self, gate=False):
+        self.batches = []
+        self.gate = threading.Event()
+        if not gate:
+            self.gate.set()
+        self.started = threading.Event()
+
+    def predict_batch(self, frames):
+        self.started.set()
+        self.gate.wait()
+        self.batches.append(len(frames))
+        return [np.array([[1, 2, 11, 22, 0.9, 0]], dtype=np.float32) for _ in frames]
+
+
+def _manager(tmp_path, model, **kwargs):
+    kwargs.setdefault("batch_size", 2)
+    kwargs.setdefault("allowed_dirs", [str(tmp_path / "data")])
+    return JobManager(str(tmp_path / "spool"), model=model, nice=0, **kwargs)
+
+
+def _wait(manager, job_id, states=(COMPLETED,), timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = manager.status(job_id)
+        if status["state"] in states:
+            return status
+        time.sleep(0.01)
+    raise AssertionError(f"job stuck in {manager.status(job_id)['state']}")
+
+
+def _results(manager, job_id):
+    return [json.loads(line) for line in b"".join(manager.iter_results(job_id)).splitlines()]
+
+
+@pytest.fixture
+def image_dir(tmp_path):
+    root = tmp_path / "data" / "batch"
+    (root / "sub").mkdir(parents=True)
+    for name in ("a.jpg", "b.jpg", "sub/c.png", "e.jpg"):
+        (root / name).write_bytes(_jpeg())
+    (root / "d.jpg").write_bytes(b"not an image")
+    (root / "notes.txt").write_text("skipped")
+    return root
+
+
+def test_directory_job_writes_ndjson_results(tmp_path, image_dir):
+    model = StubModel()
+    manager = _manager(tmp_path, model)
+    try:
+        job = manager.submit_directory(str(image_dir))
+        assert job["total"] == 5
+        status = _wait(manager, job["job_id"])
+        results = _results(manager, job["job_id"])
+    finally:
+        manager.close()
+
+    assert [r["item"] for r in results] == ["a.jpg", "b.jpg", "d.jpg", "e.jpg", "sub/c.png"]
+    assert [r["index"] for r in results] == list(range(5))
+    assert "error" in results[2]
+    (face,) = results[0]["faces"]
+    assert face["label"] == "real" and face["confidence"] == pytest.approx(0.9)
+    assert face["bbox"] == {"x": 1, "y": 2, "w": 10, "h": 20}
+    assert (status["processed"], status["failed"], status["faces"]) == (5, 1, 4)
+    assert status["progress"] == 1.0
+    # Batches of 2; the undecodable image never reaches the model
+    assert model.batches == [2, 1, 1]
+
+
+def test_directories_outside_allowed_dirs_rejected(tmp_path, image_dir):
+    outside = tmp_path / "private"
+    outside.mkdir()
+    (outside / "secret.jpg").write_bytes(_jpeg())
+    os.symlink(outside / "secret.jpg", image_dir / "link.jpg")
+    manager = _manager(tmp_path, StubModel())
+    try:
+        with pytest.raises(DirectoryNotAllowedError):
+            manager.submit_directory(str(outside))
+        with pytest.raises(DirectoryNotAllowedError):
+            manager.submit_directory(str(image_dir / ".." / ".." / "private"))
+        job = manager.submit_directory(str(image_dir))
+        assert job["total"] == 5  # the symlink out of the directory is not listed
+    finally:
+        manager.close()
+
+
+@pytest.mark.parametrize("kind", ["zip", "tar.gz"])
+def test_archive_job(tmp_path, kind):
+    buffer = io.BytesIO()
+    members = {"x/1.jpg": _jpeg(), "x/2.jpg": _jpeg(), "readme.md": b"skipped"}
+    if kind == "zip":
+        with zipfile.ZipFile(buffer, "w") as archive:
+            for name, data in members.items():
+                archive.writestr(name, data)
+    else:
+        with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+            for name, data in members.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+    buffer.seek(0)
+
+    manager = _manager(tmp_path, StubModel())
+    try:
+        job = manager.submit_archive(buffer, f"images.{kind}", max_bytes=10 * 2**20)
+        _wait(manager, job["job_id"])
+        assert [r["item"] for r in _results(manager, job["job_id"])] == ["x/1.jpg", "x/2.jpg"]
+        with pytest.raises(JobError):
+            manager.submit_archive(io.BytesIO(b"plain bytes"), "bad.zip", max_bytes=1024)
+        assert len(manager.list_jobs()) == 1
+    finally:
+        manager.close()
+
+
+def test_interrupted_job_resumes_after_restart(tmp_path, image_dir):
+    model = StubModel(gate=True)
+    manager = _manager(tmp_path, model)
+    job_id = manager.submit_directory(str(image_dir))["job_id"]
+    assert model.started.wait(5)
+    # Shut down mid-batch: that batch is finished and recorded, the rest waits for a restart
+    closer = threading.Thread(target=manager.close)
+    closer.start()
+    model.gate.set()
+    closer.join(5)
+    assert manager.status(job_id)["state"] == QUEUED
+    assert manager.status(job_id)["processed"] == 2
+
+    # Bytes past the last recorded batch are discarded on resume
+    with open(tmp_path / "spool" / job_id / "results.ndjson", "ab") as f:
+        f.write(b'{"index": 2, "item": "partial')
+
+    restarted = _manager(tmp_path, StubModel())
+    try:
+        status = _wait(restarted, job_id)
+        assert status["processed"] == 5
+        assert [r["index"] for r in _results(restarted, job_id)] == list(range(5))
+    finally:
+        restarted.close()
+
+
+def test_cancel_resume_and_delete(tmp_path, image_dir):
+    model = StubModel(gate=True)
+    manager = _manager(tmp_path, model)
+    try:
+        running = manager.submit_directory(str(image_dir))["job_id"]
+        assert model.started.wait(5)
+        queued = manager.submit_directory(str(image_dir))["job_id"]
+        assert manager.cancel(queued)["state"] == CANCELLED
+        manager.cancel(running)
+        model.gate.set()
+        status = _wait(manager, running, states=(CANCELLED,))
+        assert status["processed"] == 2
+        with pytest.raises(JobStateError):
+            manager.cancel(running)
+        with pytest.raises(JobStateError):
+            manager.delete(manager.resume(running)["job_id"])
+        assert _wait(manager, running)["processed"] == 5
+        manager.delete(running)
+        assert not (tmp_path / "spool" / running).exists()
+        assert [j["job_id"] for j in manager.list_jobs()] == [queued]
+    finally:
+        manager.close()
+
+
+def test_managers_share_one_spool(tmp_path, image_dir):
+    # Two worker processes on one JOBS_DIR: every job runs once, and either answers for it
+    first, second = StubModel(gate=True), StubModel(gate=True)
+    a = _manager(tmp_path, first, poll_interval_s=0.02)
+    b = _manager(tmp_path, second, poll_interval_s=0.02)
+    try:
+        job_ids = [a.submit_directory(str(image_dir))["job_id"] for _ in range(3)]
+        assert first.started.wait(5) and second.started.wait(5)
+        running = [j for j in job_ids if b.status(j)["state"] == "running"]
+        assert len(running) == 2
+        b.cancel(running[0])
+        first.gate.set()
+        second.gate.set()
+        assert _wait(a, running[0], states=(CANCELLED,))["processed"] == 2
+        for job_id in set(job_ids) - {running[0]}:
+            assert _wait(b, job_id)["processed"] == 5
+            assert [r["index"] for r in _results(b, job_id)] == list(range(5))
+        # 2 + 5 + 5 images between both models: no job ran twice
+        assert sum(first.batches) + sum(second.batches) == 2 + 4 + 4
+        b.resume(running[0])
+        assert _wait(a, running[0])["processed"] == 5
+        assert b.stats()["completed"] == 3
+        with pytest.raises(jobs_module.UnknownJobError):
+            b.status("../" + job_ids[0])
+    finally:
+        a.close()
+        b.close()
+
+
+def test_batches_wait_for_interactive_traffic(tmp_path, image_dir):
+    busy = threading.Event()
+    busy.set()
+    manager = _manager(tmp_path, StubModel(), max_yield_s=0.05, busy=busy.is_set)
+    try:
+        job_id = manager.submit_directory(str(image_dir))["job_id"]
+        _wait(manager, job_id)
+        # Three batches, each held back for the full yield limit
+        assert manager.stats()["yield_s"] >= 0.15
+        assert manager.stats()["completed"] == 1
+    finally:
+        manager.close()
+
+
+def test_jobs_api(tmp_path, image_dir, monkeypatch):
+    from app.main import app
+
+    client = TestClient(app)
+    assert client.get("/v1/jobs").status_code == 404
+
+    manager = _manager(tmp_path, StubModel())
+    monkeypatch.setattr(jobs_module, "_job_manager", manager)
+    try:
+        assert client.post("/v1/jobs").status_code == 400
+        assert client.post("/v1/jobs", data={"path": str(tmp_path)}).status_code == 403
+
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("1.jpg", _jpeg())
+        response = client.post(
+            "/v1/jobs", files={"file": ("batch.zip", buffer.getvalue(), "application/zip")}
+        )
+        assert response.status_code == 202
+        job_id = response.json()["job_id"]
+        _wait(manager, job_id)
+
+        status = client.get(f"/v1/jobs/{job_id}").json()
+        assert (status["state"], status["name"], status["total"]) == (COMPLETED, "batch.zip", 1)
+        assert "path" not in status
+        results = client.get(f"/v1/jobs/{job_id}/results")
+        assert results.headers["content-type"] == "application/x-ndjson"
+        assert json.loads(results.text)["item"] == "1.jpg"
+        assert client.post(f"/v1/jobs/{job_id}/cancel").status_code == 409
+        assert client.get("/v1/metrics").json()["jobs"]["completed"] == 1
+        assert client.delete(f"/v1/jobs/{job_id}").status_code == 204
+        assert client.get(f"/v1/jobs/{job_id}").status_code == 404
+    finally:
+        monkeypatch.setattr(jobs_module, "_job_manager", None)
+        manager.close()
@@ -0,0 +1,87 @@
+"""
+Unit tests for upload size and image dimension limits.
+"""
+import io
+import struct
+import zlib
+
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.core.limits import BodySizeLimitMiddleware, read_upload
+from app.inference.preprocessor import ImageTooLargeError, check_image_header, decode_image
+from app.main import app
+
+
+def _png_header(width, height):
+    """A tiny PNG whose header declares `width` x `height` pixels."""
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", ihdr)
+        + chunk(b"IDAT", zlib.compress(b"\x00" * 64))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _jpeg(width=64, height=48):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), color="red").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def limited_client():
+    test_app = FastAPI()
+
+    @test_app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await read_upload(file, 10_000))}
+
+    test_app.add_middleware(BodySizeLimitMiddleware, max_body_size=2_000, paths=["/upload"])
+    return TestClient(test_app)
+
+
+def test_header_check_rejects_before_decode():
+    assert check_image_header(_jpeg()) == (64, 48)
+    with pytest.raises(ImageTooLargeError):
+        check_image_header(_png_header(30000, 30000))
+    with pytest.raises(ImageTooLargeError):
+        decode_image(_png_header(9000, 100))
+    with pytest.raises(ValueError):
+        decode_image(b"not an image")
+
+
+def test_declared_content_length_over_limit(limited_client):
+    response = limited_client.post("/upload", files={"file": ("a.jpg", b"x" * 5_000, "image/jpeg")})
+    assert response.status_code == 413
+
+
+def test_streamed_body_over_limit(limited_client):
+    def body():
+        for _ in range(10):
+            yield b"x" * 500
+
+    response = limited_client.post(
+        "/upload", content=body(), headers={"Content-Type": "multipart/form-data; boundary=b"}
+    )
+    assert response.status_code == 413
+
+
+def test_small_upload_passes(limited_client):
+    response = limited_client.post("/upload", files={"file": ("a.jpg", b"x" * 500, "image/jpeg")})
+    assert response.status_code == 200
+    assert response.json() == {"size": 500}
+
+
+def test_predict_rejects_decompression_bomb():
+    response = TestClient(app).post(
+        "/v1/predict", files={"file": ("bomb.png", _png_header(30000, 30000), "image/png")}
+    )
+    assert response.status_code == 413
@@ -0,0 +1,80 @@
+"""
+Unit tests for logging configuration.
+"""
+import atexit
+import json
+import logging
+import queue
+
+from app.core.logging import (
+    HotPathFilter,
+    JsonFormatter,
+    _DroppingQueueHandler,
+    parse_rate_limits,
+    setup_logging,
+    stop_logging,
+)
+
+
+def _record(name="app.inference.postprocessor", level=logging.DEBUG, msg="kept %d", args=(3,)):
+    return logging.LogRecord(name, level, __file__, 1, msg, args, None)
+
+
+def test_json_formatter_includes_extras():
+    record = _record()
+    record.suppressed = 4
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "kept 3"
+    assert entry["level"] == "DEBUG"
+    assert entry["logger"] == "app.inference.postprocessor"
+    assert entry["suppressed"] == 4
+
+
+def test_parse_rate_limits():
+    assert parse_rate_limits("app.inference=20, app.api=0.5") == {
+        "app.inference": 20.0,
+        "app.api": 0.5,
+    }
+    assert parse_rate_limits("") == {}
+
+
+def test_rate_limit_suppresses_burst_and_reports_count(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.core.logging.time.monotonic", lambda: now[0])
+    log_filter = HotPathFilter({"app.inference": 2})
+
+    passed = [log_filter.filter(_record()) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    # Warnings and other loggers are never limited
+    assert log_filter.filter(_record(level=logging.WARNING))
+    assert log_filter.filter(_record(name="app.main"))
+
+    now[0] += 1.0
+    record = _record()
+    assert log_filter.filter(record)
+    assert record.suppressed == 3
+
+
+def test_sampling_keeps_one_in_n():
+    log_filter = HotPathFilter({"app": 1e9}, sample_every=4)
+    assert sum(log_filter.filter(_record()) for _ in range(12)) == 3
+
+
+def test_queue_handler_leaves_formatting_to_listener_and_counts_drops():
+    handler = _DroppingQueueHandler(queue.Queue(1))
+    first, second = _record(), _record()
+    handler.emit(first)
+    handler.emit(second)
+    queued = handler.queue.get_nowait()
+    # Not formatted on the calling thread: message and args are untouched
+    assert queued is first and queued.args == (3,) and not hasattr(queued, "message")
+    assert handler.dropped == 1
+
+
+def test_repeated_setup_registers_one_exit_handler(monkeypatch):
+    registered = []
+    monkeypatch.setattr("app.core.logging._atexit_registered", False)
+    monkeypatch.setattr(atexit, "register", registered.append)
+    setup_logging()
+    setup_logging()
+    assert registered == [stop_logging]
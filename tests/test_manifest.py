@@ -0,0 +1,71 @@
+"""
+Unit tests for the export manifest.
+"""
+from app.inference.manifest import resolve_artifact, select_fastest, write_manifest
+
+
+def _artifact(path, median_ms, passed=True, imgsz=640):
+    return {
+        "variant": "onnx",
+        "imgsz": imgsz,
+        "path": str(path),
+        "status": "ok",
+        "parity": {"passed": passed},
+        "latency": {"median_ms": median_ms, "p95_ms": median_ms},
+    }
+
+
+def test_select_fastest_requires_parity():
+    """An artifact that failed parity is never selected, however fast."""
+    slow = _artifact("a.onnx", 30.0)
+    fast_but_wrong = _artifact("b.onnx", 5.0, passed=False)
+    failed = {"variant": "openvino", "imgsz": 640, "path": "c", "status": "failed"}
+    assert select_fastest([slow, fast_but_wrong, failed]) is slow
+    assert select_fastest([fast_but_wrong]) is None
+
+
+def test_resolve_selected_artifact(tmp_path):
+    """The selected artifact and its size are served for the matching checkpoint."""
+    source = tmp_path / "model.pt"
+    source.write_bytes(b"weights")
+    artifact = tmp_path / "exports" / "model_320_onnx.onnx"
+    artifact.parent.mkdir()
+    artifact.write_bytes(b"onnx")
+    manifest = str(tmp_path / "export_manifest.json")
+
+    write_manifest(manifest, str(source), [_artifact(source, 40.0), _artifact(artifact, 20.0, imgsz=320)])
+
+    path, imgsz = resolve_artifact(str(source), manifest)
+    assert path == str(artifact)
+    assert imgsz == 320
+
+
+def test_resolve_ignores_stale_or_missing_manifest(tmp_path):
+    """A manifest built from other weights falls back to the checkpoint."""
+    source = tmp_path / "model.pt"
+    source.write_bytes(b"weights")
+    artifact = tmp_path / "model.onnx"
+    artifact.write_bytes(b"onnx")
+    manifest = str(tmp_path / "export_manifest.json")
+    write_manifest(manifest, str(source), [_artifact(artifact, 10.0)])
+
+    source.write_bytes(b"retrained weights")
+    assert resolve_artifact(str(source), manifest) == (str(source), None)
+    assert resolve_artifact(str(source), str(tmp_path / "missing.json")) == (str(source), None)
+    assert resolve_artifact(str(source), "") == (str(source), None)
+
+
+def test_fp16_onnx_skipped_without_cuda(monkeypatch):
+    import torch
+
+    from training.export_models import precision_skip_reason
+
+    monkeypatch.setattr(torch.cuda, "is_available", lambda: False)
+    assert "CUDA" in precision_skip_reason("onnx-fp16")
+    # OpenVINO compresses to FP16 on CPU; FP32 variants never need CUDA
+    assert precision_skip_reason("openvino-fp16") is None
+    assert precision_skip_reason("onnx") is None
+
+    monkeypatch.setattr(torch.cuda, "is_available", lambda: True)
+    assert precision_skip_reason("onnx-fp16") is None
+    assert precision_skip_reason("onnx-fp16", device="cpu") is not None
@@ -0,0 +1,66 @@
+"""
+Unit tests for the client pacing control loop.
+"""
+import pytest
+
+from app.core.pacing import PacingController, QualityLevel, parse_levels
+
+LEVELS = parse_levels("640x480@90,480x360@80,320x240@70")
+
+
+def _run(controller, seconds, decode_ms, inference_ms, frame_rate, capacity=1, queue_depth=0):
+    """Feed `seconds` one-second windows of frames arriving at `frame_rate`."""
+    now = controller._window_start
+    for _ in range(seconds):
+        for _ in range(frame_rate):
+            controller.record(decode_ms, inference_ms)
+        now += 1.0
+        controller.update(capacity, queue_depth, now=now)
+
+
+def test_parse_levels():
+    assert LEVELS[1] == QualityLevel(480, 360, 80)
+    with pytest.raises(ValueError):
+        parse_levels("640x480")
+
+
+def test_overload_slows_clients_down():
+    controller = PacingController(LEVELS, target_utilization=0.7, initial_interval_ms=100)
+    # 10 frames/s at 100 ms of inference each saturates one slot
+    _run(controller, 3, decode_ms=5, inference_ms=100, frame_rate=10, queue_depth=3)
+    assert controller.interval_ms > 200
+    assert controller.level == 0
+    assert controller.hint()["jpeg_quality"] == 90
+
+
+def test_control_loop_settles_near_target():
+    controller = PacingController(LEVELS, target_utilization=0.5, initial_interval_ms=100)
+    clients = 4
+    for _ in range(30):
+        # Each client sends one frame per suggested interval
+        frame_rate = round(clients * 1000 / controller.interval_ms)
+        _run(controller, 1, decode_ms=2, inference_ms=50, frame_rate=frame_rate)
+    assert controller.utilization == pytest.approx(0.5, abs=0.1)
+    assert controller.interval_ms == pytest.approx(400, rel=0.25)
+
+
+def test_idle_server_speeds_up_and_restores_quality():
+    controller = PacingController(LEVELS, initial_interval_ms=1000)
+    controller.level = 2
+    _run(controller, 10, decode_ms=1, inference_ms=10, frame_rate=1)
+    assert controller.interval_ms == controller.min_interval_ms
+    assert controller.level == 0
+
+
+def test_decode_bound_load_lowers_upload_quality_first():
+    controller = PacingController(LEVELS, initial_interval_ms=200)
+    _run(controller, 1, decode_ms=100, inference_ms=20, frame_rate=10, capacity=4)
+    assert controller.level == 1
+    assert controller.interval_ms == 200
+    assert controller.hint()["max_width"] == 480
+
+
+def test_saturated_interval_lowers_upload_quality():
+    controller = PacingController(LEVELS, max_interval_ms=500, initial_interval_ms=500)
+    _run(controller, 1, decode_ms=1, inference_ms=200, frame_rate=10)
+    assert controller.level == 1
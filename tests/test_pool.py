@@ -0,0 +1,103 @@
+"""
+Unit tests for the per-site model pool.
+"""
+import shutil
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.inference.pool import ModelPool, UnknownModelError
+
+MB = 2**20
+
+
+class FakeModel:
+    """Stands in for ModelWrapper; size is encoded in the file name (<id>-<MB>.pt)."""
+
+    loads = 0
+
+    def __init__(self, path):
+        FakeModel.loads += 1
+        time.sleep(0.05)
+        self.path = path
+        self.memory_bytes = int(path.rsplit("-", 1)[1].split(".")[0]) * MB
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    for name in ["a-40", "b-40", "c-40", "huge-500"]:
+        (tmp_path / f"{name}.pt").write_bytes(b"weights")
+    return tmp_path
+
+
+def _pool(model_dir, budget_mb=100, idle_ttl_s=None):
+    FakeModel.loads = 0
+    return ModelPool(str(model_dir), budget_mb * MB, idle_ttl_s=idle_ttl_s, loader=FakeModel)
+
+
+def test_lazy_load_and_hits(model_dir):
+    pool = _pool(model_dir)
+    assert pool.stats()["loaded"] == 0
+    first = pool.get("a-40")
+    assert pool.get("a-40") is first
+    assert FakeModel.loads == 1
+
+    (stats,) = pool.stats()["models"]
+    assert (stats["hits"], stats["misses"], stats["loads"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+    assert stats["resident_mb"] == 40
+    assert stats["load_ms"] >= 50
+
+
+def test_lru_eviction_under_memory_budget(model_dir):
+    pool = _pool(model_dir, budget_mb=100)
+    pool.get("a-40")
+    pool.get("b-40")
+    pool.get("a-40")  # b is now least recently used
+    pool.get("c-40")
+
+    stats = {m["model_id"]: m for m in pool.stats()["models"]}
+    assert [m for m in stats if stats[m]["loaded"]] == ["a-40", "c-40"]
+    assert stats["b-40"]["evictions"] == 1
+    assert pool.stats()["resident_mb"] == 80
+
+    # A model larger than the budget still loads, alone
+    pool.get("huge-500")
+    assert pool.stats()["loaded"] == 1
+
+
+def test_idle_eviction(model_dir):
+    pool = _pool(model_dir, idle_ttl_s=0.05)
+    pool.get("a-40")
+    assert pool.evict_idle() == []
+    time.sleep(0.1)
+    assert pool.evict_idle() == ["a-40"]
+    assert pool.stats()["loaded"] == 0
+
+
+def test_concurrent_requests_share_one_load(model_dir):
+    pool = _pool(model_dir)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.get("a-40"))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert FakeModel.loads == 1
+    assert all(r is results[0] for r in results)
+
+
+@pytest.mark.parametrize("model_id", ["missing", "../a-40", "a-40/../b-40", ""])
+def test_unknown_or_invalid_ids(model_dir, model_id):
+    with pytest.raises(UnknownModelError):
+        _pool(model_dir).get(model_id)
+
+
+def test_pool_serves_real_checkpoint(tmp_path, tiny_checkpoint):
+    shutil.copy(tiny_checkpoint, tmp_path / "site-a.pt")
+    pool = ModelPool(str(tmp_path), 100 * MB)
+    wrapper = pool.get("site-a")
+    assert wrapper.memory_bytes > 0
+    assert wrapper.predict(np.zeros((240, 320, 3), dtype=np.uint8))[0].shape[1] == 6
@@ -0,0 +1,61 @@
+"""
+Unit tests for on-demand profiling.
+"""
+import io
+import json
+import zipfile
+
+import pytest
+import torch
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.profiling import (
+    ProfilerBusyError,
+    finish_session,
+    get_profile_session,
+    start_session,
+)
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_session_records_cpu_and_torch_profiles():
+    model = torch.nn.Conv2d(3, 8, 3)
+    session = start_session(max_requests=3, duration_s=30, interval_ms=1)
+    assert get_profile_session() is session
+    with pytest.raises(ProfilerBusyError):
+        start_session(max_requests=1, duration_s=1)
+
+    for _ in range(3):
+        assert not session.done
+        session.run(model, torch.randn(1, 3, 64, 64))
+    assert session.done
+
+    bundle = zipfile.ZipFile(io.BytesIO(finish_session(session)))
+    assert get_profile_session() is None
+    assert set(bundle.namelist()) == {"cpu.folded", "torch_trace.json", "summary.json"}
+    assert json.loads(bundle.read("summary.json"))["requests"] == 3
+    trace = json.loads(bundle.read("torch_trace.json"))
+    assert any("conv" in event.get("name", "") for event in trace["traceEvents"])
+
+
+def test_profile_endpoint_disabled_by_default():
+    assert client.post("/debug/profile").status_code == 404
+
+
+def test_profile_endpoint_requires_token(monkeypatch):
+    monkeypatch.setattr(settings, "DEBUG_PROFILE_ENABLED", True)
+    monkeypatch.setattr(settings, "DEBUG_PROFILE_TOKEN", "secret")
+    assert client.post("/debug/profile").status_code == 403
+    assert client.post("/debug/profile", headers={"X-Debug-Token": "wrong"}).status_code == 403
+    non_ascii = {"X-Debug-Token": "é".encode()}
+    assert client.post("/debug/profile", headers=non_ascii).status_code == 403
+
+    response = client.post(
+        "/debug/profile?requests=1&seconds=0.2", headers={"X-Debug-Token": "secret"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    assert "cpu.folded" in zipfile.ZipFile(io.BytesIO(response.content)).namelist()
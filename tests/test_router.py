@@ -0,0 +1,171 @@
+"""
+Unit tests for the sticky-session router.
+"""
+import json
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.router.main import _timeout, create_app
+from app.router.ring import HashRing
+from app.router.sticky import NoWorkerError, StickyRouter
+from app.router.workers import DEAD, HEALTHY, Worker
+
+SESSIONS = [f"session-{i}" for i in range(2000)]
+
+
+def _router(*worker_ids):
+    router = StickyRouter(vnodes=64)
+    for worker_id in worker_ids:
+        worker = Worker(worker_id, f"http://{worker_id}")
+        worker.state = HEALTHY
+        router.add_worker(worker)
+    return router
+
+
+def test_ring_moves_only_keys_of_changed_node():
+    ring = HashRing(["a", "b", "c"], vnodes=64)
+    before = {key: ring.lookup(key) for key in SESSIONS}
+    assert all(0.2 < share < 0.45 for share in ring.shares().values())
+
+    ring.add("d")
+    after = {key: ring.lookup(key) for key in SESSIONS}
+    moved = [key for key in SESSIONS if before[key] != after[key]]
+    assert all(after[key] == "d" for key in moved)
+    assert 0.15 < len(moved) / len(SESSIONS) < 0.35
+
+    ring.remove("d")
+    assert {key: ring.lookup(key) for key in SESSIONS} == before
+    assert HashRing().lookup("x") is None
+
+
+def test_sessions_stay_pinned_when_worker_joins():
+    router = _router("w1", "w2")
+    placed = {s: router.route(s).worker_id for s in SESSIONS[:200]}
+
+    worker = Worker("w3", "http://w3")
+    worker.state = HEALTHY
+    router.add_worker(worker)
+    assert all(router.route(s).worker_id == placed[s] for s in SESSIONS[:200])
+    assert router.moved_sessions == 0
+    # New sessions do land on the new worker
+    assert any(router.route(s).worker_id == "w3" for s in SESSIONS[200:400])
+
+
+def test_only_dead_workers_sessions_move():
+    router = _router("w1", "w2", "w3")
+    placed = {s: router.route(s).worker_id for s in SESSIONS[:300]}
+    router.mark_dead("w2")
+
+    for s in SESSIONS[:300]:
+        worker_id = router.route(s).worker_id
+        assert worker_id != "w2"
+        if placed[s] != "w2":
+            assert worker_id == placed[s]
+    assert router.moved_sessions == sum(w == "w2" for w in placed.values())
+
+    # Failed-over sessions stay put when the worker comes back
+    moved = {s: router.route(s).worker_id for s in SESSIONS[:300]}
+    router.mark_healthy("w2")
+    assert all(router.route(s).worker_id == moved[s] for s in SESSIONS[:300])
+
+
+def test_drain_keeps_sessions_and_expiry_unpins():
+    router = _router("w1", "w2")
+    session = next(s for s in SESSIONS if router.ring.lookup(s) == "w1")
+    router.route(session)
+    router.drain("w1")
+    assert router.route(session).worker_id == "w1"
+    assert not router.drained("w1")
+    assert router.route("new-session").worker_id == "w2"
+
+    router.session_ttl_s = 0.0
+    assert router.drained("w1")
+    assert router.route(session).worker_id == "w2"
+
+    router.mark_dead("w2")
+    with pytest.raises(NoWorkerError):
+        router.route(session)
+
+
+def _fake_workers(down=()):
+    def handler(request):
+        worker = request.url.host
+        if worker in down:
+            raise httpx.ConnectError("refused", request=request)
+        body = {"worker": worker, "path": request.url.path, "received": len(request.content)}
+        # Streamed like a real worker connection, not pre-read
+        return httpx.Response(
+            200,
+            headers={"content-type": "application/json"},
+            stream=httpx.ByteStream(json.dumps(body).encode()),
+        )
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+@pytest.fixture
+def router_settings(monkeypatch):
+    monkeypatch.setattr(settings, "ROUTER_WORKERS", 0)
+    monkeypatch.setattr(settings, "ROUTER_WORKER_URLS", "http://w1,http://w2,http://w3")
+    monkeypatch.setattr(settings, "ROUTER_ADMIN_TOKEN", "secret")
+
+
+def test_proxy_routes_by_session_and_fails_over(router_settings):
+    down = set()
+    with TestClient(create_app(client=_fake_workers(down))) as client:
+        first = client.get("/v1/health", headers={"X-Session-Id": "abc"})
+        assert first.status_code == 200
+        worker_id = first.headers["X-Worker-Id"]
+        for _ in range(5):
+            response = client.get("/v1/health", params={"session_id": "abc"})
+            assert response.headers["X-Worker-Id"] == worker_id
+        assert first.json()["path"] == "/v1/health"
+
+        host = first.json()["worker"]
+        down.add(host)
+        failed_over = client.get("/v1/health", headers={"X-Session-Id": "abc"})
+        assert failed_over.status_code == 200
+        assert failed_over.json()["worker"] != host
+
+        stats = client.get("/router/stats").json()
+        states = {w["worker_id"]: w["state"] for w in stats["workers"]}
+        assert states[worker_id] == DEAD
+        assert stats["moved_sessions"] == 1
+        assert sum(w["requests"] for w in stats["workers"]) == 8
+
+
+def test_admin_endpoints_need_token(router_settings):
+    with TestClient(create_app(client=_fake_workers())) as client:
+        assert client.delete("/router/workers/worker-1").status_code == 403
+        non_ascii = {"X-Router-Token": "é".encode()}
+        assert client.delete("/router/workers/worker-1", headers=non_ascii).status_code == 403
+        response = client.delete("/router/workers/worker-1", headers={"X-Router-Token": "secret"})
+        assert response.json()["state"] == "draining"
+        missing = client.delete("/router/workers/nope", headers={"X-Router-Token": "secret"})
+        assert missing.status_code == 404
+
+
+def test_proxy_streams_bodies_and_caps_job_uploads(router_settings, monkeypatch):
+    monkeypatch.setattr(settings, "JOBS_MAX_ARCHIVE_MB", 1)
+    with TestClient(create_app(client=_fake_workers())) as client:
+        archive = b"x" * 300_000
+
+        def chunks():
+            for i in range(0, len(archive), 65536):
+                yield archive[i : i + 65536]
+
+        response = client.post("/v1/jobs", content=chunks())
+        assert response.status_code == 200
+        assert response.json()["received"] == len(archive)
+
+        too_large = client.post("/v1/jobs", content=b"x" * (2 * 1024 * 1024))
+        assert too_large.status_code == 413
+
+
+def test_long_running_paths_have_no_read_timeout():
+    assert _timeout("v1/jobs/abc/results").read is None
+    assert _timeout("debug/profile").read is None
+    assert _timeout("v1/predict").read == settings.ROUTER_TIMEOUT_S
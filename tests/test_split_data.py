@@ -0,0 +1,81 @@
+"""
+Unit tests for dataset splitting.
+"""
+from collections import Counter
+
+import pytest
+
+from training import split_data
+from training.split_data import assign_splits, split_dataset, stratum_targets
+
+RATIOS = {"train": 0.7, "val": 0.2, "test": 0.1}
+
+
+def _short_sessions(sessions=30, per_session=4):
+    """Class x session strata far smaller than 1 / test ratio."""
+    return {
+        f"s{s:02d}_{i}": (str(i % 2), f"s{s:02d}")
+        for s in range(sessions)
+        for i in range(per_session)
+    }
+
+
+def test_small_strata_still_reach_the_requested_ratios():
+    strata = _short_sessions()
+    counts = Counter(assign_splits(strata, RATIOS, seed=0).values())
+    assert counts == {"train": 84, "val": 24, "test": 12}
+
+
+def test_stratum_targets_add_up_and_never_exceed_a_stratum():
+    totals = {("a",): 1, ("b",): 3, ("c",): 7, ("d",): 1}
+    targets = stratum_targets(totals, RATIOS, seed=0)
+    assert sum(t["val"] for t in targets.values()) == 2
+    assert sum(t["test"] for t in targets.values()) == 1
+    for key, target in targets.items():
+        assert min(target.values()) >= 0 and sum(target.values()) == totals[key]
+
+
+def test_assignment_is_deterministic_per_seed():
+    strata = _short_sessions()
+    first = assign_splits(strata, RATIOS, seed=3)
+    assert assign_splits(dict(reversed(list(strata.items()))), RATIOS, seed=3) == first
+    assert assign_splits(strata, RATIOS, seed=4) != first
+
+
+def _write_pairs(folder, stems):
+    folder.mkdir(parents=True, exist_ok=True)
+    for stem in stems:
+        (folder / f"{stem}.jpg").write_bytes(b"jpeg")
+        (folder / f"{stem}.txt").write_text(f"{int(stem[-1]) % 2} 0.5 0.5 0.1 0.1\n")
+
+
+def test_incremental_places_only_new_files(tmp_path, monkeypatch):
+    source, output = tmp_path / "all", tmp_path / "split"
+    _write_pairs(source, [f"s0_{i}" for i in range(20)])
+    first = split_dataset(str(source), str(output), splitRatio=RATIOS, workers=2)
+
+    _write_pairs(source, [f"s1_{i}" for i in range(5)])
+    placed = []
+    monkeypatch.setattr(split_data, "place_file", lambda src, dst, mode: placed.append(dst))
+    second = split_dataset(
+        str(source), str(output), splitRatio=RATIOS, workers=2, incremental=True
+    )
+
+    assert {stem: second[stem] for stem in first} == first
+    new = sorted(set(second) - set(first))
+    assert len(new) == 5
+    assert sorted(placed) == sorted(
+        f"{output}/{second[stem]}/{kind}/{stem}.{ext}"
+        for stem in new
+        for kind, ext in (("images", "jpg"), ("labels", "txt"))
+    )
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_split_dataset_ratios_with_default_stratification(tmp_path, seed):
+    source = tmp_path / "all"
+    _write_pairs(source, [f"s{s:02d}_{i}" for s in range(25) for i in range(4)])
+    assignment = split_dataset(
+        str(source), str(tmp_path / "split"), splitRatio=RATIOS, seed=seed, mode="manifest"
+    )
+    assert Counter(assignment.values()) == {"train": 70, "val": 20, "test": 10}
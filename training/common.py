@@ -0,0 +1,61 @@
+"""
+Helpers shared by the training scripts.
+
+Scripts that use the serving code in `app/` import it as a package, so run
+them as modules from the repository root:
+
+    python -m training.distill --teacher model/anti_spoofing.pt --student yolov8n.pt
+"""
+
+import os
+import time
+from typing import Optional
+
+import numpy as np
+
+
+def measure_latency(
+    model_path: str, images, imgsz: Optional[int] = None, warmup: int = 3, runs: int = 50
+) -> dict:
+    """
+    CPU-side latency through the serving `ModelWrapper`.
+
+    Returns:
+        Dict with median_ms, p95_ms and imgsz
+    """
+    from app.inference.model import ModelWrapper
+    from app.inference.preprocessor import preprocess_image
+
+    wrapper = ModelWrapper(model_path, imgsz=imgsz)
+    frames = [preprocess_image(im) for im in images]
+    for i in range(warmup):
+        wrapper.predict(frames[i % len(frames)])
+
+    latencies = []
+    for i in range(runs):
+        start = time.perf_counter()
+        wrapper.predict(frames[i % len(frames)])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": float(np.median(latencies)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "imgsz": wrapper.imgsz,
+    }
+
+
+def load_split_images(data_yaml: str, count: int = 16):
+    """
+    Read up to `count` images of the test split (val if there is none).
+
+    Returns:
+        (split name, list of BGR images)
+    """
+    import cv2
+    from ultralytics.data.utils import check_det_dataset
+
+    data = check_det_dataset(data_yaml)
+    split = "test" if data.get("test") else "val"
+    split_path = data[split]
+    image_dir = split_path if os.path.isdir(split_path) else os.path.dirname(split_path)
+    names = sorted(n for n in os.listdir(image_dir) if n.lower().endswith((".jpg", ".png")))
+    return split, [cv2.imread(os.path.join(image_dir, n)) for n in names[:count]]
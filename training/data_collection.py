@@ -1,130 +1,453 @@
 """
 Automated data collection script for anti-spoofing detection.
-Ports code from transcript with MediaPipe face detection and YOLO format labeling.
+Detects faces with MediaPipe (cvzone), filters blurry faces and writes images
+with YOLO format labels.
+
+The work is split into a pipeline so capture, detection and disk I/O overlap:
+
+    capture thread -> detection + blur scoring (main thread) -> async writer
+
+Sources can be a webcam index, a video file or a folder of images. Use
+`--headless` to run without preview windows, e.g. on recorded footage.
+
+Examples:
+    python -m training.data_collection --class-id 0 --source 1
+    python -m training.data_collection --class-id 1 --source clips/real.mp4 --headless
+    python -m training.data_collection --class-id 0 --source photos/ --headless
 """
 
-from time import time
+import argparse
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
 import cv2
-import cvzone
-from cvzone.FaceDetectionModule import FaceDetector
-
-####################################
-classID = 0  # 0 is fake and 1 is real
-outputFolderPath = "Dataset/DataCollect"
-confidence = 0.8
-save = True
-blurThreshold = 35  # Larger is more focus
-
-debug = False
-offsetPercentageW = 10
-offsetPercentageH = 20
-camWidth, camHeight = 640, 480
-floatingPoint = 6
-####################################
-
-
-cap = cv2.VideoCapture(1)
-cap.set(3, camWidth)
-cap.set(4, camHeight)
-
-detector = FaceDetector()
-while True:
-    success, img = cap.read()
-    imgOut = img.copy()
-    img, bboxs = detector.findFaces(img, draw=False)
-
-    listBlur = []  # True False values indicating if the faces are blur or not
-    listInfo = []  # The normalized values and the class name for the label txt file
-    if bboxs:
-        # bboxInfo - "id","bbox","score","center"
-        for bbox in bboxs:
-            x, y, w, h = bbox["bbox"]
-            score = bbox["score"][0]
-            # print(x, y, w, h)
-
-            # ------  Check the score --------
-            if score > confidence:
-
-                # ------  Adding an offset to the face Detected --------
-                offsetW = (offsetPercentageW / 100) * w
-                x = int(x - offsetW)
-                w = int(w + offsetW * 2)
-                offsetH = (offsetPercentageH / 100) * h
-                y = int(y - offsetH * 3)
-                h = int(h + offsetH * 3.5)
-
-                # ------  To avoid values below 0 --------
-                if x < 0:
-                    x = 0
-                if y < 0:
-                    y = 0
-                if w < 0:
-                    w = 0
-                if h < 0:
-                    h = 0
-
-                # ------  Find Blurriness --------
-                imgFace = img[y : y + h, x : x + w]
-                cv2.imshow("Face", imgFace)
-                blurValue = int(cv2.Laplacian(imgFace, cv2.CV_64F).var())
-                if blurValue > blurThreshold:
-                    listBlur.append(True)
-                else:
-                    listBlur.append(False)
-
-                # ------  Normalize Values  --------
-                ih, iw, _ = img.shape
-                xc, yc = x + w / 2, y + h / 2
-
-                xcn, ycn = round(xc / iw, floatingPoint), round(yc / ih, floatingPoint)
-                wn, hn = round(w / iw, floatingPoint), round(h / ih, floatingPoint)
-                # print(xcn, ycn, wn, hn)
-
-                # ------  To avoid values above 1 --------
-                if xcn > 1:
-                    xcn = 1
-                if ycn > 1:
-                    ycn = 1
-                if wn > 1:
-                    wn = 1
-                if hn > 1:
-                    hn = 1
-
-                listInfo.append(f"{classID} {xcn} {ycn} {wn} {hn}\n")
-
-                # ------  Drawing --------
-                cv2.rectangle(imgOut, (x, y, w, h), (255, 0, 0), 3)
-                cvzone.putTextRect(
-                    imgOut,
-                    f"Score: {int(score * 100)}% Blur: {blurValue}",
-                    (x, y - 0),
-                    scale=2,
-                    thickness=3,
-                )
-                if debug:
-                    cv2.rectangle(img, (x, y, w, h), (255, 0, 0), 3)
-                    cvzone.putTextRect(
-                        img,
-                        f"Score: {int(score * 100)}% Blur: {blurValue}",
-                        (x, y - 0),
-                        scale=2,
-                        thickness=3,
-                    )
-
-        # ------  To Save --------
-        if save:
-            if all(listBlur) and listBlur != []:
-                # ------  Save Image  --------
-                timeNow = time()
-                timeNow = str(timeNow).split(".")
-                timeNow = timeNow[0] + timeNow[1]
-                cv2.imwrite(f"{outputFolderPath}/{timeNow}.jpg", img)
-                # ------  Save Label Text File  --------
-                for info in listInfo:
-                    f = open(f"{outputFolderPath}/{timeNow}.txt", "a")
-                    f.write(info)
-                    f.close()
-
-    cv2.imshow("Image", imgOut)
-    cv2.waitKey(1)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+# Sentinel marking the end of a stream between pipeline stages
+_END = object()
+
+
+class FrameSource:
+    """Uniform reader over a webcam, a video file or a folder of images."""
+
+    def __init__(self, source: str, width: int = 640, height: int = 480):
+        self.is_live = source.isdigit()
+        self._files: Optional[List[str]] = None
+        self._cap = None
+
+        if os.path.isdir(source):
+            self._files = sorted(
+                os.path.join(source, name)
+                for name in os.listdir(source)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+            self._index = 0
+        else:
+            self._cap = cv2.VideoCapture(int(source) if self.is_live else source)
+            if not self._cap.isOpened():
+                raise RuntimeError(f"Could not open source: {source}")
+            if self.is_live:
+                self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+    def read(self):
+        """Return the next BGR frame, or None at end of stream."""
+        if self._files is not None:
+            while self._index < len(self._files):
+                img = cv2.imread(self._files[self._index])
+                self._index += 1
+                if img is not None:
+                    return img
+            return None
+
+        success, img = self._cap.read()
+        return img if success else None
+
+    def close(self):
+        if self._cap is not None:
+            self._cap.release()
+
+
+class PipelineStats:
+    """Thread-safe counters for the pipeline."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.captured = 0
+        self.dropped = 0
+        self.processed = 0
+        self.kept = 0
+        self.written = 0
+        self.write_errors = 0
+        self._lock = threading.Lock()
+
+    def add(self, name: str, n: int = 1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def report(self) -> str:
+        elapsed = max(time.perf_counter() - self.start, 1e-6)
+        return (
+            f"captured {self.captured} ({self.captured / elapsed:.1f} fps), "
+            f"kept {self.kept} ({self.kept / elapsed:.1f} fps), "
+            f"dropped {self.dropped}, written {self.written}"
+            + (f", write errors {self.write_errors}" if self.write_errors else "")
+        )
+
+
+def capture_loop(
+    source: FrameSource,
+    frames: queue.Queue,
+    stats: PipelineStats,
+    stop: threading.Event,
+    every: int = 1,
+    max_frames: Optional[int] = None,
+):
+    """
+    Producer: read frames and hand them to the detection stage.
+
+    Live cameras never block: when detection falls behind, the oldest queued
+    frame is dropped so the preview stays current. Files are read with
+    back-pressure so no frame is lost.
+    """
+    index = 0
+    try:
+        while not stop.is_set():
+            img = source.read()
+            if img is None:
+                break
+            index += 1
+            if (index - 1) % every:
+                continue
+            stats.add("captured")
+
+            if source.is_live:
+                try:
+                    frames.put_nowait(img)
+                except queue.Full:
+                    try:
+                        frames.get_nowait()
+                        stats.add("dropped")
+                    except queue.Empty:
+                        pass
+                    frames.put_nowait(img)
+            else:
+                frames.put(img)
+
+            if max_frames is not None and stats.captured >= max_frames:
+                break
+    finally:
+        source.close()
+        frames.put(_END)
+
+
+def blur_score(img_face, max_side: int = 0) -> int:
+    """
+    Laplacian variance of a face crop (larger is more in focus).
+
+    Args:
+        img_face: BGR face crop
+        max_side: Downscale the crop so its longest side is at most this many
+            pixels before scoring (0 keeps full resolution). Downscaling makes
+            scores larger, so re-check `--blur-threshold` when changing it.
+    """
+    if max_side:
+        h, w = img_face.shape[:2]
+        scale = max_side / max(h, w)
+        if scale < 1:
+            img_face = cv2.resize(
+                img_face, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA
+            )
+    return int(cv2.Laplacian(img_face, cv2.CV_64F).var())
+
+
+def analyse_faces(img, bboxs, args) -> Tuple[List[tuple], List[str], List[bool]]:
+    """
+    Expand, score and normalise detected faces.
+
+    Returns:
+        (boxes, label lines, blur flags) for faces above the confidence threshold,
+        where boxes are (x, y, w, h, score, blurValue)
+    """
+    ih, iw, _ = img.shape
+    boxes, listInfo, listBlur = [], [], []
+
+    # bboxInfo - "id","bbox","score","center"
+    for bbox in bboxs:
+        x, y, w, h = bbox["bbox"]
+        score = bbox["score"][0]
+
+        # ------  Check the score --------
+        if score <= args.confidence:
+            continue
+
+        # ------  Adding an offset to the face Detected --------
+        offsetW = (args.offset_w / 100) * w
+        x = max(0, int(x - offsetW))
+        w = max(0, int(w + offsetW * 2))
+        offsetH = (args.offset_h / 100) * h
+        y = max(0, int(y - offsetH * 3))
+        h = max(0, int(h + offsetH * 3.5))
+
+        # ------  Find Blurriness --------
+        imgFace = img[y : y + h, x : x + w]
+        if imgFace.size == 0:
+            listBlur.append(False)
+            continue
+        blurValue = blur_score(imgFace, args.blur_max_side)
+        listBlur.append(blurValue > args.blur_threshold)
+
+        # ------  Normalize Values (clipped to 1) --------
+        p = args.floating_point
+        xc, yc = x + w / 2, y + h / 2
+        xcn, ycn = min(round(xc / iw, p), 1), min(round(yc / ih, p), 1)
+        wn, hn = min(round(w / iw, p), 1), min(round(h / ih, p), 1)
+
+        listInfo.append(f"{args.class_id} {xcn} {ycn} {wn} {hn}\n")
+        boxes.append((x, y, w, h, score, blurValue))
+
+    return boxes, listInfo, listBlur
+
+
+class AsyncWriter(threading.Thread):
+    """
+    Consumer: batches accepted frames and writes JPEGs and labels off the
+    detection thread. Each batch is encoded and written by a small thread pool
+    (OpenCV releases the GIL while encoding), and each label file is written
+    with a single open.
+    """
+
+    def __init__(
+        self,
+        outputFolderPath: str,
+        stats: PipelineStats,
+        batch_size: int = 32,
+        flush_interval: float = 1.0,
+        io_workers: int = 4,
+        jpeg_quality: int = 95,
+        queue_size: int = 256,
+    ):
+        super().__init__(daemon=True)
+        self.outputFolderPath = outputFolderPath
+        self.stats = stats
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.jpeg_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        self.items: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._pool = ThreadPoolExecutor(max_workers=io_workers)
+
+    def submit(self, name: str, img, listInfo: List[str]):
+        """Queue one frame; blocks if the writer has fallen far behind."""
+        while True:
+            try:
+                self.items.put((name, img, listInfo), timeout=1.0)
+                return
+            except queue.Full:
+                # Never wait forever on a writer that is gone
+                if not self.is_alive():
+                    raise RuntimeError("Writer thread stopped; frames can no longer be saved")
+
+    def close(self):
+        """Flush remaining frames and wait for the writer to finish."""
+        self.items.put(_END)
+        self.join()
+        self._pool.shutdown(wait=True)
+
+    def _write_one(self, item) -> bool:
+        """Write one frame and its labels; failures (disk full, bad path) are counted."""
+        name, img, listInfo = item
+        try:
+            path = f"{self.outputFolderPath}/{name}.jpg"
+            if not cv2.imwrite(path, img, self.jpeg_params):
+                raise OSError(f"Could not write {path}")
+            with open(f"{self.outputFolderPath}/{name}.txt", "w") as f:
+                f.writelines(listInfo)
+        except (OSError, cv2.error) as e:
+            print(f"Failed to save {name}: {e}")
+            self.stats.add("write_errors")
+            return False
+        return True
+
+    def _flush(self, batch):
+        if batch:
+            written = sum(self._pool.map(self._write_one, batch))
+            self.stats.add("written", written)
+
+    def run(self):
+        batch = []
+        last_flush = time.monotonic()
+        while True:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                item = self.items.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _END:
+                self._flush(batch)
+                return
+            if item is not None:
+                batch.append(item)
+
+            if len(batch) >= self.batch_size or (
+                batch and time.monotonic() - last_flush >= self.flush_interval
+            ):
+                self._flush(batch)
+                batch = []
+                last_flush = time.monotonic()
+
+
+def draw_faces(imgOut, boxes):
+    """Draw boxes with score and blur value for the preview window."""
+    import cvzone
+
+    for x, y, w, h, score, blurValue in boxes:
+        cv2.rectangle(imgOut, (x, y, w, h), (255, 0, 0), 3)
+        cvzone.putTextRect(
+            imgOut,
+            f"Score: {int(score * 100)}% Blur: {blurValue}",
+            (x, y - 0),
+            scale=2,
+            thickness=3,
+        )
+
+
+def collect(args):
+    """Run the capture -> detect -> write pipeline until the source ends or 'q'."""
+    from cvzone.FaceDetectionModule import FaceDetector
+
+    os.makedirs(args.output, exist_ok=True)
+    session = args.session or time.strftime("%Y%m%d%H%M%S")
+
+    stats = PipelineStats()
+    stop = threading.Event()
+    source = FrameSource(args.source, args.cam_width, args.cam_height)
+    frames: queue.Queue = queue.Queue(maxsize=args.queue_size)
+    capture = threading.Thread(
+        target=capture_loop,
+        args=(source, frames, stats, stop, args.every, args.max_frames),
+        daemon=True,
+    )
+    writer = AsyncWriter(
+        args.output,
+        stats,
+        batch_size=args.write_batch,
+        flush_interval=args.flush_interval,
+        io_workers=args.io_workers,
+        jpeg_quality=args.jpeg_quality,
+    )
+
+    detector = FaceDetector()
+    capture.start()
+    writer.start()
+
+    last_report = time.perf_counter()
+    try:
+        while True:
+            img = frames.get()
+            if img is _END:
+                break
+
+            img, bboxs = detector.findFaces(img, draw=False)
+            stats.add("processed")
+            boxes, listInfo, listBlur = analyse_faces(img, bboxs or [], args)
+
+            # ------  To Save: every face must be in focus --------
+            if args.save and listBlur and all(listBlur):
+                writer.submit(f"{session}_{stats.kept:07d}", img, listInfo)
+                stats.add("kept")
+
+            if not args.headless:
+                imgOut = img.copy()
+                draw_faces(imgOut, boxes)
+                cv2.imshow("Image", imgOut)
+                if cv2.waitKey(1) & 0xFF == ord("q"):
+                    break
+
+            if time.perf_counter() - last_report >= args.report_interval:
+                print(stats.report())
+                last_report = time.perf_counter()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        # Unblock the producer if it is waiting on a full queue.
+        while capture.is_alive():
+            try:
+                frames.get_nowait()
+            except queue.Empty:
+                capture.join(timeout=0.1)
+        writer.close()
+        if not args.headless:
+            cv2.destroyAllWindows()
+
+    print(f"Done: {stats.report()}")
+    return stats
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Collect YOLO-labelled face images")
+    parser.add_argument(
+        "--class-id",
+        type=int,
+        required=True,
+        choices=[0, 1],
+        help="0 is fake, 1 is real",
+    )
+    parser.add_argument(
+        "--source",
+        type=str,
+        default="0",
+        help="Webcam index, video file or folder of images",
+    )
+    parser.add_argument("--output", type=str, default="Dataset/DataCollect")
+    parser.add_argument(
+        "--session",
+        type=str,
+        default=None,
+        help="File name prefix for this session (default: start timestamp)",
+    )
+    parser.add_argument("--confidence", type=float, default=0.8, help="Face detection score")
+    parser.add_argument(
+        "--blur-threshold", type=int, default=35, help="Larger is more focus"
+    )
+    parser.add_argument(
+        "--blur-max-side",
+        type=int,
+        default=0,
+        help="Downscale face crops to this size before blur scoring (0 = full resolution)",
+    )
+    parser.add_argument("--offset-w", type=float, default=10, help="Width offset percentage")
+    parser.add_argument("--offset-h", type=float, default=20, help="Height offset percentage")
+    parser.add_argument("--cam-width", type=int, default=640)
+    parser.add_argument("--cam-height", type=int, default=480)
+    parser.add_argument("--floating-point", type=int, default=6)
+    parser.add_argument(
+        "--every", type=int, default=1, help="Only process every Nth captured frame"
+    )
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--headless", action="store_true", help="No preview windows")
+    parser.add_argument(
+        "--no-save", dest="save", action="store_false", help="Preview only, write nothing"
+    )
+    parser.add_argument("--queue-size", type=int, default=8, help="Frames buffered for detection")
+    parser.add_argument("--write-batch", type=int, default=32, help="Frames per disk flush")
+    parser.add_argument("--flush-interval", type=float, default=1.0, help="Seconds between flushes")
+    parser.add_argument("--io-workers", type=int, default=4, help="Parallel JPEG writers")
+    parser.add_argument("--jpeg-quality", type=int, default=95)
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    return parser.parse_args(argv)
+
+
+def main():
+    """CLI entry point."""
+    collect(parse_args())
+
+
+if __name__ == "__main__":
+    main()
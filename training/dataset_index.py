@@ -0,0 +1,367 @@
+"""
+Near-duplicate and quality index over collected datasets.
+
+Computes a perceptual hash (64-bit DCT pHash) and quality scores (Laplacian
+blur, brightness) for every image once, and stores them in a SQLite index
+that is updated incrementally: only files whose size or mtime changed are
+re-hashed, across all cores.
+
+Near-duplicate clusters are found with multi-index hashing: the 64-bit hash
+is cut into `max_distance + 1` bands, so any two hashes within the Hamming
+radius share at least one band exactly (pigeonhole). Only images sharing a
+band bucket are compared, instead of all pairs.
+
+Examples:
+    python -m training.dataset_index update --input Dataset/all
+    python -m training.dataset_index clusters --input Dataset/all --max-distance 4
+    python -m training.dataset_index dedupe --input Dataset/all --move-to Dataset/duplicates
+    python -m training.split_data --groups Dataset/all/clusters.json
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    phash INTEGER,
+    blur REAL,
+    brightness REAL,
+    width INTEGER,
+    height INTEGER
+)
+"""
+
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def popcount64(values: np.ndarray) -> np.ndarray:
+    """Number of set bits per uint64 element."""
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    return _POPCOUNT8[values.view(np.uint8)].reshape(values.shape + (8,)).sum(axis=-1)
+
+
+def phash(gray: np.ndarray) -> int:
+    """
+    64-bit DCT perceptual hash of a grayscale image.
+
+    Returns:
+        Unsigned 64-bit hash as a Python int
+    """
+    small = cv2.resize(gray, (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    low = cv2.dct(small)[:8, :8].flatten()
+    # Exclude the DC term from the median so overall brightness does not matter.
+    bits = low > np.median(low[1:])
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def analyse_image(path: str) -> Optional[Tuple[int, float, float, int, int]]:
+    """
+    Hash and score one image.
+
+    Decodes at reduced resolution (JPEG DCT scaling) since neither the hash
+    nor the relative blur ranking needs full resolution.
+
+    Returns:
+        (phash, blur, brightness, width, height) or None if unreadable
+    """
+    gray = cv2.imread(path, cv2.IMREAD_REDUCED_GRAYSCALE_2)
+    if gray is None:
+        return None
+    blur = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    h, w = gray.shape
+    return phash(gray), blur, float(gray.mean()), w * 2, h * 2
+
+
+def _to_signed(value: int) -> int:
+    """SQLite integers are signed 64-bit."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def _to_unsigned(value: int) -> int:
+    return value + (1 << 64) if value < 0 else value
+
+
+def open_index(index_path: str) -> sqlite3.Connection:
+    """Open (and create if needed) the index database."""
+    os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+    conn = sqlite3.connect(index_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(SCHEMA)
+    return conn
+
+
+def update_index(
+    inputFolderPath: str, index_path: str, workers: int = None, commit_every: int = 2000
+) -> Dict[str, int]:
+    """
+    Bring the index in line with the folder contents.
+
+    Args:
+        inputFolderPath: Folder of images
+        index_path: SQLite index file
+        workers: Processes used for hashing (defaults to all cores)
+        commit_every: Rows written per transaction
+
+    Returns:
+        Counts of added/updated, removed, unchanged and unreadable files
+    """
+    conn = open_index(index_path)
+    known = {
+        name: (size, mtime)
+        for name, size, mtime in conn.execute("SELECT name, size, mtime FROM images")
+    }
+
+    present = {}
+    with os.scandir(inputFolderPath) as it:
+        for entry in it:
+            if entry.name.lower().endswith(IMAGE_EXTENSIONS):
+                stat = entry.stat()
+                present[entry.name] = (stat.st_size, stat.st_mtime)
+
+    removed = [name for name in known if name not in present]
+    todo = sorted(name for name, sig in present.items() if known.get(name) != sig)
+
+    conn.executemany("DELETE FROM images WHERE name = ?", [(n,) for n in removed])
+    conn.commit()
+
+    start = time.perf_counter()
+    unreadable = 0
+    rows = []
+    paths = [os.path.join(inputFolderPath, name) for name in todo]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for name, result in zip(todo, pool.map(analyse_image, paths, chunksize=64)):
+            if result is None:
+                unreadable += 1
+                continue
+            hash_value, blur, brightness, width, height = result
+            size, mtime = present[name]
+            rows.append(
+                (name, size, mtime, _to_signed(hash_value), blur, brightness, width, height)
+            )
+            if len(rows) >= commit_every:
+                conn.executemany("INSERT OR REPLACE INTO images VALUES (?,?,?,?,?,?,?,?)", rows)
+                conn.commit()
+                rows = []
+    if rows:
+        conn.executemany("INSERT OR REPLACE INTO images VALUES (?,?,?,?,?,?,?,?)", rows)
+        conn.commit()
+    conn.close()
+
+    elapsed = time.perf_counter() - start
+    if todo:
+        print(f"Indexed {len(todo)} images in {elapsed:.1f}s ({len(todo) / elapsed:.0f} img/s)")
+    return {
+        "indexed": len(todo) - unreadable,
+        "removed": len(removed),
+        "unchanged": len(present) - len(todo),
+        "unreadable": unreadable,
+    }
+
+
+def load_index(index_path: str) -> Tuple[List[str], np.ndarray, np.ndarray]:
+    """
+    Load names, hashes and blur scores from the index.
+
+    Returns:
+        (names, uint64 hashes, blur scores)
+    """
+    conn = open_index(index_path)
+    rows = conn.execute("SELECT name, phash, blur FROM images ORDER BY name").fetchall()
+    conn.close()
+    names = [r[0] for r in rows]
+    hashes = np.array([_to_unsigned(r[1]) for r in rows], dtype=np.uint64)
+    blur = np.array([r[2] for r in rows], dtype=np.float64)
+    return names, hashes, blur
+
+
+def _find(parent: np.ndarray, i: int) -> int:
+    while parent[i] != i:
+        parent[i] = parent[parent[i]]
+        i = parent[i]
+    return i
+
+
+def _near_pairs(block: np.ndarray, max_distance: int, rows: int = 1024):
+    """Yield (i, j) index pairs within a bucket, i < j, in bounded-memory chunks."""
+    for start in range(0, len(block), rows):
+        chunk = block[start : start + rows]
+        close = popcount64(chunk[:, None] ^ block[None, :]) <= max_distance
+        ii, jj = np.nonzero(close)
+        keep = jj > ii + start
+        yield from zip(ii[keep] + start, jj[keep])
+
+
+def find_clusters(hashes: np.ndarray, max_distance: int = 4) -> List[List[int]]:
+    """
+    Group hashes within `max_distance` bits of each other (transitively).
+
+    Identical hashes (common for consecutive webcam frames) are collapsed
+    first, so large runs of the same frame cost nothing extra.
+
+    Args:
+        hashes: uint64 perceptual hashes
+        max_distance: Maximum Hamming distance for a near-duplicate pair
+
+    Returns:
+        Clusters of indices with more than one member
+    """
+    unique, inverse = np.unique(hashes, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    n = len(unique)
+    parent = np.arange(n)
+    bands = max_distance + 1
+    bounds = np.linspace(0, 64, bands + 1).astype(int)
+
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        mask = np.uint64((1 << int(hi - lo)) - 1)
+        keys = (unique >> np.uint64(lo)) & mask
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        # Bucket boundaries where the band value changes.
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        ends = np.r_[starts[1:], n]
+
+        for s, e in zip(starts, ends):
+            if e - s < 2:
+                continue
+            members = order[s:e]
+            for i, j in _near_pairs(unique[members], max_distance):
+                ra, rb = _find(parent, members[i]), _find(parent, members[j])
+                if ra != rb:
+                    parent[rb] = ra
+
+    groups: Dict[int, List[int]] = {}
+    for i, u in enumerate(inverse):
+        groups.setdefault(_find(parent, u), []).append(i)
+    return [members for members in groups.values() if len(members) > 1]
+
+
+def write_clusters(
+    index_path: str, output_path: str, max_distance: int = 4
+) -> List[List[str]]:
+    """
+    Find near-duplicate clusters and save them as JSON.
+
+    Each cluster lists its members sharpest first. The file also carries a
+    `groups` mapping of file stem to cluster ID, which `split_data.py --groups`
+    uses to keep a cluster within one split.
+
+    Returns:
+        Clusters as lists of file names
+    """
+    names, hashes, blur = load_index(index_path)
+    start = time.perf_counter()
+    clusters = find_clusters(hashes, max_distance)
+    elapsed = time.perf_counter() - start
+
+    named = []
+    for members in clusters:
+        members = sorted(members, key=lambda i: -blur[i])
+        named.append([names[i] for i in members])
+    named.sort(key=lambda c: c[0])
+
+    groups = {}
+    for cluster_id, members in enumerate(named):
+        for name in members:
+            groups[os.path.splitext(name)[0]] = f"dup{cluster_id}"
+
+    with open(output_path, "w") as f:
+        json.dump({"max_distance": max_distance, "clusters": named, "groups": groups}, f)
+
+    duplicates = sum(len(c) - 1 for c in named)
+    print(
+        f"{len(names)} images, {len(named)} clusters, {duplicates} redundant "
+        f"({elapsed:.2f}s)"
+    )
+    return named
+
+
+def dedupe(
+    inputFolderPath: str,
+    clusters_path: str,
+    move_to: Optional[str] = None,
+    index_path: Optional[str] = None,
+    min_blur: Optional[float] = None,
+) -> List[str]:
+    """
+    Keep the sharpest image of each cluster and set the rest aside.
+
+    Args:
+        inputFolderPath: Folder of image/label pairs
+        clusters_path: Output of `write_clusters`
+        move_to: Folder to move rejected image/label pairs into; dry run if None
+        index_path: Index to read blur scores from (required with min_blur)
+        min_blur: Also reject images whose blur score is below this value
+
+    Returns:
+        Rejected image file names
+    """
+    with open(clusters_path, "r") as f:
+        clusters = json.load(f)["clusters"]
+    rejected = [name for members in clusters for name in members[1:]]
+
+    if min_blur is not None:
+        names, _, blur = load_index(index_path)
+        seen = set(rejected)
+        rejected += [n for n, b in zip(names, blur) if b < min_blur and n not in seen]
+
+    if move_to is None:
+        print(f"Would move {len(rejected)} images (dry run, pass --move-to)")
+        return rejected
+
+    os.makedirs(move_to, exist_ok=True)
+    for name in rejected:
+        stem = os.path.splitext(name)[0]
+        for file_name in (name, f"{stem}.txt"):
+            src = os.path.join(inputFolderPath, file_name)
+            if os.path.exists(src):
+                shutil.move(src, os.path.join(move_to, file_name))
+    print(f"Moved {len(rejected)} images to {move_to}")
+    return rejected
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Near-duplicate and quality index")
+    parser.add_argument("command", choices=["update", "clusters", "dedupe"])
+    parser.add_argument("--input", type=str, default="Dataset/all")
+    parser.add_argument(
+        "--index", type=str, default=None, help="Index file (default: <input>/index.sqlite)"
+    )
+    parser.add_argument(
+        "--clusters", type=str, default=None, help="Clusters file (default: <input>/clusters.json)"
+    )
+    parser.add_argument("--max-distance", type=int, default=4, help="Hamming radius in bits")
+    parser.add_argument("--workers", type=int, default=None, help="Hashing processes")
+    parser.add_argument("--move-to", type=str, default=None)
+    parser.add_argument("--min-blur", type=float, default=None)
+    args = parser.parse_args()
+
+    index_path = args.index or os.path.join(args.input, "index.sqlite")
+    clusters_path = args.clusters or os.path.join(args.input, "clusters.json")
+
+    if args.command == "update":
+        print(update_index(args.input, index_path, args.workers))
+    elif args.command == "clusters":
+        update_index(args.input, index_path, args.workers)
+        write_clusters(index_path, clusters_path, args.max_distance)
+    else:
+        dedupe(args.input, clusters_path, args.move_to, index_path, args.min_blur)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Knowledge distillation of the anti-spoofing detector into a cheaper student.
+
+The current serving model (teacher) supervises a smaller and/or lower
+resolution student. On every batch the teacher runs on the same images as the
+student and the student is trained on the usual YOLO detection loss plus:
+
+- a class-logit term: BCE between student and (temperature-softened) teacher
+  class probabilities at every anchor, and
+- a box term: KL divergence between student and teacher DFL box
+  distributions,
+
+both weighted by the teacher's per-anchor confidence so background anchors do
+not dominate. The saved checkpoint is a plain Ultralytics detection model, so
+it loads through `ModelWrapper` unchanged.
+
+After training, teacher and student are compared on the test split: accuracy
+from Ultralytics val, and CPU latency through `ModelWrapper.predict`.
+
+Example:
+    python -m training.distill --teacher model/anti_spoofing.pt --student yolov8n.pt --imgsz 320
+"""
+
+import argparse
+import json
+import os
+from typing import Optional
+
+import torch
+import torch.nn.functional as F
+from ultralytics import YOLO
+
+from training.common import load_split_images, measure_latency
+
+
+def split_head_outputs(preds, nc: int, reg_max: int):
+    """
+    Normalise raw Detect head training outputs across Ultralytics versions.
+
+    Returns:
+        (box distribution logits (B, 4 * reg_max, A), class logits (B, nc, A))
+    """
+    if isinstance(preds, tuple) and len(preds) == 2 and not torch.is_tensor(preds[1]):
+        preds = preds[1]  # eval mode returns (decoded, raw)
+    if isinstance(preds, dict):
+        preds = preds.get("one2many", preds)
+        return preds["boxes"], preds["scores"]
+    # Older releases: list of per-level maps (B, 4 * reg_max + nc, H, W)
+    bs = preds[0].shape[0]
+    flat = torch.cat([p.view(bs, 4 * reg_max + nc, -1) for p in preds], dim=2)
+    return flat.split((4 * reg_max, nc), dim=1)
+
+
+class DistillationLoss:
+    """Wraps the student's detection criterion and adds teacher matching terms."""
+
+    def __init__(
+        self,
+        student: torch.nn.Module,
+        teacher: torch.nn.Module,
+        cls_weight: float = 1.0,
+        box_weight: float = 0.5,
+        temperature: float = 2.0,
+    ):
+        self.base = student.init_criterion()
+        self.teacher = teacher
+        head = student.model[-1]
+        self.nc = head.nc
+        self.reg_max = head.reg_max
+        self.cls_weight = cls_weight
+        self.box_weight = box_weight
+        self.temperature = temperature
+
+    def __getattr__(self, name):
+        # Forward e.g. `update()` / `loss_names` to the wrapped criterion.
+        return getattr(self.base, name)
+
+    def distill_terms(self, student_preds, images: torch.Tensor) -> torch.Tensor:
+        with torch.no_grad():
+            teacher_preds = self.teacher(images)
+        s_box, s_cls = split_head_outputs(student_preds, self.nc, self.reg_max)
+        t_box, t_cls = split_head_outputs(teacher_preds, self.nc, self.reg_max)
+        s_box, s_cls, t_box, t_cls = (x.float() for x in (s_box, s_cls, t_box, t_cls))
+
+        T = self.temperature
+        t_prob = torch.sigmoid(t_cls / T)
+        # Teacher confidence per anchor focuses the loss on likely faces.
+        weight = torch.sigmoid(t_cls).amax(dim=1)  # (B, A)
+        norm = weight.sum().clamp(min=1.0)
+
+        cls_term = F.binary_cross_entropy_with_logits(s_cls / T, t_prob, reduction="none")
+        cls_term = (cls_term.mean(dim=1) * weight).sum() / norm * T * T
+
+        bs, _, anchors = s_box.shape
+        s_dist = s_box.view(bs, 4, self.reg_max, anchors)
+        t_dist = t_box.view(bs, 4, self.reg_max, anchors)
+        box_term = F.kl_div(
+            F.log_softmax(s_dist / T, dim=2), F.softmax(t_dist / T, dim=2), reduction="none"
+        ).sum(dim=2).mean(dim=1)
+        box_term = (box_term * weight).sum() / norm * T * T
+
+        return self.cls_weight * cls_term + self.box_weight * box_term
+
+    def __call__(self, preds, batch):
+        loss, items = self.base(preds, batch)
+        kd = self.distill_terms(preds, batch["img"])
+        batch_size = batch["img"].shape[0]
+        # `loss` may be a (box, cls, dfl) vector that the trainer sums: spread
+        # the KD term so it is counted once
+        loss = loss + kd * batch_size / loss.numel()
+        if isinstance(items, dict):
+            items = {**items, "kd_loss": kd.detach()}
+        else:
+            items = torch.cat([items, kd.detach().view(1)])
+        return loss, items
+
+
+def load_teacher(path: str, device) -> torch.nn.Module:
+    """Load the teacher detection model frozen, in eval mode."""
+    teacher = YOLO(path).model.float().to(device).eval()
+    for p in teacher.parameters():
+        p.requires_grad_(False)
+    return teacher
+
+
+def add_distillation(model: YOLO, teacher_path: str, **loss_kwargs) -> None:
+    """Install the distillation criterion on the student once training starts."""
+
+    def on_train_start(trainer):
+        student = trainer.model.module if hasattr(trainer.model, "module") else trainer.model
+        teacher = load_teacher(teacher_path, trainer.device)
+        if teacher.model[-1].nc != student.model[-1].nc:
+            raise ValueError("Teacher and student must have the same number of classes")
+        student.criterion = DistillationLoss(student, teacher, **loss_kwargs)
+
+    model.add_callback("on_train_start", on_train_start)
+
+
+def compare(
+    teacher_path: str,
+    student_path: str,
+    data_yaml: str,
+    teacher_imgsz: int,
+    student_imgsz: int,
+    runs: int = 50,
+    output: Optional[str] = None,
+) -> dict:
+    """
+    Accuracy vs. latency of teacher and student on the test split.
+
+    Returns:
+        Report dict (also written to `output` as JSON if given)
+    """
+    split, images = load_split_images(data_yaml)
+
+    report = {}
+    for role, path, imgsz in (
+        ("teacher", teacher_path, teacher_imgsz),
+        ("student", student_path, student_imgsz),
+    ):
+        metrics = YOLO(path).val(data=data_yaml, split=split, imgsz=imgsz, verbose=False)
+        report[role] = {
+            "path": path,
+            "map50": float(metrics.box.map50),
+            "map50_95": float(metrics.box.map),
+            "precision": float(metrics.box.mp),
+            "recall": float(metrics.box.mr),
+            **measure_latency(path, images, imgsz=imgsz, runs=runs),
+        }
+
+    t, s = report["teacher"], report["student"]
+    report["speedup"] = t["median_ms"] / s["median_ms"]
+    report["map50_delta"] = s["map50"] - t["map50"]
+
+    print(f"\n{'model':<8} {'imgsz':>5} {'mAP50':>7} {'P':>6} {'R':>6} {'median ms':>10} {'p95 ms':>8}")
+    for role in ("teacher", "student"):
+        r = report[role]
+        print(
+            f"{role:<8} {r['imgsz']:>5} {r['map50']:>7.3f} {r['precision']:>6.3f} "
+            f"{r['recall']:>6.3f} {r['median_ms']:>10.1f} {r['p95_ms']:>8.1f}"
+        )
+    print(f"Student is {report['speedup']:.2f}x faster, mAP50 {report['map50_delta']:+.3f}")
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Distill the anti-spoofing model into a student")
+    parser.add_argument("--teacher", type=str, default="model/anti_spoofing.pt")
+    parser.add_argument(
+        "--student", type=str, default="yolov8n.pt", help="Student weights or model yaml"
+    )
+    parser.add_argument("--data", type=str, default="Dataset/SplitData/data.yaml")
+    parser.add_argument("--imgsz", type=int, default=320, help="Student training/inference size")
+    parser.add_argument("--teacher-imgsz", type=int, default=640)
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--patience", type=int, default=25)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--device", type=str, default=None)
+    parser.add_argument("--cls-weight", type=float, default=1.0)
+    parser.add_argument("--box-weight", type=float, default=0.5)
+    parser.add_argument("--temperature", type=float, default=2.0)
+    parser.add_argument("--latency-runs", type=int, default=50)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        print(f"Error: {args.data} not found. Please run split_data.py first.")
+        return
+
+    student = YOLO(args.student)
+    add_distillation(
+        student,
+        args.teacher,
+        cls_weight=args.cls_weight,
+        box_weight=args.box_weight,
+        temperature=args.temperature,
+    )
+
+    print(f"Distilling {args.teacher} -> {args.student} at imgsz={args.imgsz}...")
+    results = student.train(
+        data=args.data,
+        epochs=args.epochs,
+        patience=args.patience,
+        batch=args.batch,
+        imgsz=args.imgsz,
+        workers=args.workers,
+        device=args.device,
+        project="runs",
+        name="distill",
+        exist_ok=True,
+    )
+    best = f"{results.save_dir}/weights/best.pt"
+    print(f"Student saved at: {best}")
+
+    compare(
+        args.teacher,
+        best,
+        args.data,
+        teacher_imgsz=args.teacher_imgsz,
+        student_imgsz=args.imgsz,
+        runs=args.latency_runs,
+        output=f"{results.save_dir}/comparison.json",
+    )
+
+
+if __name__ == "__main__":
+    # For Windows multiprocessing
+    import multiprocessing
+
+    multiprocessing.freeze_support()
+    main()
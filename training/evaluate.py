@@ -0,0 +1,382 @@
+"""
+Offline evaluation of a servable artifact on a labelled split.
+
+Images go through exactly what the backend does per request, so the scores
+describe what clients would see:
+`decode_image` -> `preprocess_image` -> `ModelWrapper` (any `.pt`, ONNX,
+TorchScript or OpenVINO artifact) -> `postprocess_results`. Decoding runs
+in a pool of worker threads ahead of batched inference.
+
+Every labelled face is matched to at most one detection (IoU >= 0.5, greedy
+by confidence, class-agnostic). The report gives, at several thresholds:
+
+- REAL and FAKE precision and recall,
+- APCER: share of FAKE faces accepted as REAL,
+- BPCER: share of REAL faces not accepted as REAL (called FAKE or missed),
+- ACER = (APCER + BPCER) / 2,
+
+plus the threshold with the lowest ACER as a `CONFIDENCE_THRESHOLD`
+suggestion, images/s and the time spent in each stage. Predicted labels come
+from the serving `CLASS_NAMES`; ground truth from the dataset's `names`.
+
+Example:
+    python -m training.evaluate --model model/anti_spoofing.pt --data Dataset/SplitData/data.yaml
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+
+LABELS = ("real", "fake")
+DEFAULT_THRESHOLDS = [round(0.05 * i, 2) for i in range(1, 20)]
+
+
+def split_files(data_yaml: str, split: Optional[str] = None):
+    """
+    Image and label paths of a split (test if present, else val).
+
+    Returns:
+        (split name, image paths, label paths, class names by id)
+    """
+    from ultralytics.data.utils import check_det_dataset, img2label_paths
+
+    data = check_det_dataset(data_yaml)
+    split = split or ("test" if data.get("test") else "val")
+    source = data[split]
+    if os.path.isdir(source):
+        images = [
+            os.path.join(source, n)
+            for n in sorted(os.listdir(source))
+            if n.lower().endswith((".jpg", ".jpeg", ".png", ".bmp"))
+        ]
+    else:  # manifest: one image path per line
+        with open(source) as f:
+            images = [line.strip() for line in f if line.strip()]
+    return split, images, img2label_paths(images), data["names"]
+
+
+def read_labels(label_path: str, width: int, height: int, names: Dict[int, str]) -> list:
+    """YOLO label file -> [(label, x1, y1, x2, y2)] in pixels."""
+    faces = []
+    if not os.path.exists(label_path):
+        return faces
+    with open(label_path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 5:
+                continue
+            cls, cx, cy, w, h = int(parts[0]), *map(float, parts[1:5])
+            faces.append(
+                (
+                    str(names[cls]).lower(),
+                    (cx - w / 2) * width,
+                    (cy - h / 2) * height,
+                    (cx + w / 2) * width,
+                    (cy + h / 2) * height,
+                )
+            )
+    return faces
+
+
+def _load(image_path: str, label_path: str, names: Dict[int, str]):
+    """Worker: read, decode and preprocess one image as the API does."""
+    from app.inference.preprocessor import decode_image, preprocess_image
+
+    start = time.perf_counter()
+    with open(image_path, "rb") as f:
+        image = decode_image(f.read())
+    preprocessed = preprocess_image(image)
+    faces = read_labels(label_path, image.shape[1], image.shape[0], names)
+    return preprocessed, faces, time.perf_counter() - start
+
+
+def _iou(box, boxes: np.ndarray) -> np.ndarray:
+    tl = np.maximum(box[:2], boxes[:, :2])
+    br = np.minimum(box[2:], boxes[:, 2:])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=1)
+    area = np.prod(box[2:] - box[:2]) + np.prod(boxes[:, 2:] - boxes[:, :2], axis=1)
+    return inter / (area - inter + 1e-9)
+
+
+def match_faces(detections: List[dict], faces: list, min_iou: float = 0.5):
+    """
+    Greedily match detections (descending confidence) to labelled faces.
+
+    Because matching is greedy in confidence order, the matches among
+    detections above any higher threshold are the same, so one pass serves
+    every threshold.
+
+    Returns:
+        (per detection: (confidence, predicted label, matched face label or None),
+         per face: (true label, matched confidence or None, predicted label or None))
+    """
+    gt_boxes = np.array([f[1:] for f in faces], dtype=np.float64).reshape(-1, 4)
+    taken = np.zeros(len(faces), dtype=bool)
+    face_match: List[Optional[tuple]] = [None] * len(faces)
+    det_rows = []
+    for det in sorted(detections, key=lambda d: -d["confidence"]):
+        b = det["bbox"]
+        box = np.array([b["x"], b["y"], b["x"] + b["w"], b["y"] + b["h"]], dtype=np.float64)
+        matched = None
+        if len(faces):
+            iou = np.where(taken, -1.0, _iou(box, gt_boxes))
+            j = int(np.argmax(iou))
+            if iou[j] >= min_iou:
+                taken[j] = True
+                face_match[j] = (det["confidence"], det["label"])
+                matched = faces[j][0]
+        det_rows.append((det["confidence"], det["label"], matched))
+
+    face_rows = [
+        (face[0], *(match if match is not None else (None, None)))
+        for face, match in zip(faces, face_match)
+    ]
+    return det_rows, face_rows
+
+
+def report_thresholds(thresholds: List[float], configured: float) -> List[float]:
+    """
+    Thresholds to score, ascending: the requested ones plus the configured one.
+
+    The first is the detection floor, so the configured row is never cut at
+    a higher requested threshold.
+    """
+    return sorted(set(thresholds) | {configured})
+
+
+def score(det_rows: list, face_rows: list, thresholds: List[float]) -> List[dict]:
+    """Precision/recall per class and APCER/BPCER/ACER at each threshold."""
+    det_conf = np.array([r[0] for r in det_rows], dtype=np.float64)
+    det_pred = np.array([r[1] for r in det_rows], dtype=object)
+    det_true = np.array([r[2] for r in det_rows], dtype=object)
+    face_true = np.array([r[0] for r in face_rows], dtype=object)
+    face_conf = np.array([r[1] if r[1] is not None else -1.0 for r in face_rows])
+    face_pred = np.array([r[2] for r in face_rows], dtype=object)
+
+    rows = []
+    for t in thresholds:
+        kept = det_conf >= t
+        accepted = face_conf >= t
+        row = {"threshold": t}
+        for label in LABELS:
+            predicted = kept & (det_pred == label)
+            correct = predicted & (det_true == label)
+            actual = face_true == label
+            found = actual & accepted & (face_pred == label)
+            row[f"{label}_precision"] = correct.sum() / predicted.sum() if predicted.any() else None
+            row[f"{label}_recall"] = found.sum() / actual.sum() if actual.any() else None
+
+        attacks = face_true == "fake"
+        bona_fide = face_true == "real"
+        accepted_real = accepted & (face_pred == "real")
+        row["apcer"] = (attacks & accepted_real).sum() / attacks.sum() if attacks.any() else None
+        row["bpcer"] = (
+            (bona_fide & ~accepted_real).sum() / bona_fide.sum() if bona_fide.any() else None
+        )
+        if row["apcer"] is not None and row["bpcer"] is not None:
+            row["acer"] = (row["apcer"] + row["bpcer"]) / 2
+        else:
+            row["acer"] = row["apcer"] if row["bpcer"] is None else row["bpcer"]
+        rows.append({k: float(v) if v is not None else None for k, v in row.items()})
+    return rows
+
+
+def evaluate(
+    model_path: str,
+    data_yaml: str,
+    split: Optional[str] = None,
+    imgsz: Optional[int] = None,
+    batch_size: int = 8,
+    workers: int = 4,
+    thresholds: List[float] = DEFAULT_THRESHOLDS,
+    min_iou: float = 0.5,
+    limit: Optional[int] = None,
+) -> dict:
+    """
+    Score `model_path` on a split through the serving pipeline.
+
+    Returns:
+        Report dict with per-threshold metrics, best threshold and timings
+    """
+    from app.core.config import settings
+    from app.inference.autotune import configure_runtime
+    from app.inference.model import ModelWrapper
+    from app.inference.postprocessor import postprocess_results
+
+    runtime = configure_runtime()
+    split, images, labels, names = split_files(data_yaml, split)
+    if limit:
+        images, labels = images[:limit], labels[:limit]
+    if not images:
+        raise ValueError(f"No images in the {split} split of {data_yaml}")
+    names = dict(enumerate(names)) if isinstance(names, list) else names
+
+    wrapper = ModelWrapper(model_path, imgsz=imgsz)
+    thresholds = report_thresholds(thresholds, settings.CONFIDENCE_THRESHOLD)
+    floor = thresholds[0]
+    # Warm up so one-off initialisation is not counted as inference time
+    wrapper.predict_batch([np.zeros((settings.IMAGE_HEIGHT, settings.IMAGE_WIDTH, 3), np.uint8)])
+
+    timings = {"decode_s": 0.0, "decode_wait_s": 0.0, "inference_s": 0.0, "postprocess_s": 0.0}
+    det_rows, face_rows = [], []
+
+    def run_batch(batch):
+        start = time.perf_counter()
+        results = wrapper.predict_batch([b[0] for b in batch], conf=floor)
+        timings["inference_s"] += time.perf_counter() - start
+        start = time.perf_counter()
+        for result, (_, faces) in zip(results, batch):
+            detections = postprocess_results([result], confidence_threshold=floor)
+            dets, matched = match_faces(detections, faces, min_iou)
+            det_rows.extend(dets)
+            face_rows.extend(matched)
+        timings["postprocess_s"] += time.perf_counter() - start
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        todo = iter(zip(images, labels))
+        batch = []
+        while True:
+            # Keep a bounded number of decodes in flight ahead of inference
+            while len(pending) < batch_size * 2 + workers:
+                item = next(todo, None)
+                if item is None:
+                    break
+                pending.append(pool.submit(_load, *item, names))
+            if not pending:
+                break
+            start = time.perf_counter()
+            preprocessed, faces, decode_s = pending.popleft().result()
+            timings["decode_wait_s"] += time.perf_counter() - start
+            timings["decode_s"] += decode_s
+            batch.append((preprocessed, faces))
+            if len(batch) == batch_size:
+                run_batch(batch)
+                batch = []
+        if batch:
+            run_batch(batch)
+    wall_s = time.perf_counter() - wall_start
+
+    rows = score(det_rows, face_rows, thresholds)
+    scored = [r for r in rows if r["acer"] is not None]
+    best = min(scored, key=lambda r: (r["acer"], -r["threshold"])) if scored else None
+    n = len(images)
+    return {
+        "model": model_path,
+        "data": data_yaml,
+        "split": split,
+        "imgsz": wrapper.imgsz,
+        "execution_mode": wrapper.execution_mode,
+        "images": n,
+        "faces": {label: sum(1 for r in face_rows if r[0] == label) for label in LABELS},
+        "batch_size": batch_size,
+        "workers": workers,
+        "torch_threads": runtime.torch_threads,
+        "throughput": {
+            "wall_s": wall_s,
+            "images_per_s": n / wall_s,
+            # decode runs in parallel workers; decode_wait_s is time inference waited for it
+            "decode_ms_per_image": timings["decode_s"] / n * 1000,
+            "decode_wait_ms_per_image": timings["decode_wait_s"] / n * 1000,
+            "inference_ms_per_image": timings["inference_s"] / n * 1000,
+            "postprocess_ms_per_image": timings["postprocess_s"] / n * 1000,
+        },
+        "configured_threshold": settings.CONFIDENCE_THRESHOLD,
+        "thresholds": rows,
+        "best_threshold": best["threshold"] if best else None,
+        "best": best,
+    }
+
+
+def _fmt(value) -> str:
+    return f"{value:.3f}" if value is not None else "-"
+
+
+def print_report(report: dict) -> None:
+    """Print the per-threshold table, best threshold and throughput."""
+    print(
+        f"\n{report['model']} on {report['split']} ({report['images']} images, "
+        f"{report['faces']['real']} real / {report['faces']['fake']} fake faces, "
+        f"imgsz {report['imgsz']}, {report['execution_mode']})"
+    )
+    header = ["thr", "REAL P", "REAL R", "FAKE P", "FAKE R", "APCER", "BPCER", "ACER"]
+    print(" ".join(f"{h:>7}" for h in header))
+    for row in report["thresholds"]:
+        marks = ""
+        if row["threshold"] == report["best_threshold"]:
+            marks += " <- best"
+        if row["threshold"] == report["configured_threshold"]:
+            marks += " (configured)"
+        values = [
+            row["real_precision"], row["real_recall"], row["fake_precision"],
+            row["fake_recall"], row["apcer"], row["bpcer"], row["acer"],
+        ]
+        print(f"{row['threshold']:>7g} " + " ".join(f"{_fmt(v):>7}" for v in values) + marks)
+
+    print(f"\nSuggested CONFIDENCE_THRESHOLD: {report['best_threshold']}")
+    t = report["throughput"]
+    print(
+        f"Throughput: {t['images_per_s']:.1f} images/s "
+        f"(batch {report['batch_size']}, {report['workers']} decode workers, "
+        f"{report['torch_threads']} torch threads)"
+    )
+    print(
+        f"Per image: decode {t['decode_ms_per_image']:.1f} ms "
+        f"(waited {t['decode_wait_ms_per_image']:.1f}), "
+        f"inference {t['inference_ms_per_image']:.1f} ms, "
+        f"postprocess {t['postprocess_ms_per_image']:.1f} ms"
+    )
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Evaluate a model artifact on a labelled split")
+    parser.add_argument(
+        "--model", type=str, default="model/anti_spoofing.pt", help=".pt or exported artifact"
+    )
+    parser.add_argument("--data", type=str, default="Dataset/SplitData/data.yaml")
+    parser.add_argument("--split", type=str, default=None, help="Defaults to test, else val")
+    parser.add_argument("--imgsz", type=int, default=None, help="Defaults as in the backend")
+    parser.add_argument("--batch", type=int, default=8, help="Images per inference call")
+    parser.add_argument("--workers", type=int, default=4, help="Decode worker threads")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=DEFAULT_THRESHOLDS)
+    parser.add_argument("--min-iou", type=float, default=0.5)
+    parser.add_argument("--limit", type=int, default=None, help="Only the first N images")
+    parser.add_argument("--output", type=str, default="runs/eval/eval_report.json")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"Error: model not found: {args.model}")
+        return
+    if not os.path.exists(args.data):
+        print(f"Error: {args.data} not found. Please run split_data.py first.")
+        return
+
+    report = evaluate(
+        args.model,
+        args.data,
+        split=args.split,
+        imgsz=args.imgsz,
+        batch_size=args.batch,
+        workers=args.workers,
+        thresholds=args.thresholds,
+        min_iou=args.min_iou,
+        limit=args.limit,
+    )
+    print_report(report)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""
+Export the model to a matrix of formats/sizes and select the fastest artifact.
+
+For every requested variant and input size this script:
+
+1. exports the checkpoint (ONNX with dynamic batch/shape axes in FP32/FP16,
+   TorchScript, OpenVINO IR in FP32/FP16, or the `.pt` itself),
+2. checks parity: detections on test images must match the `.pt` at the
+   reference size (same class, box IoU and confidence within tolerance;
+   detections within tolerance of the confidence threshold may come and go),
+3. benchmarks it on this host through the serving `ModelWrapper`.
+
+The results go to `export_manifest.json` next to the checkpoint, naming the
+fastest artifact that passed parity; the backend serves it automatically (see
+`MODEL_MANIFEST_PATH`). Sizes below the reference size are only selected if
+they still match the reference detections.
+
+Example:
+    python -m training.export_models --model model/anti_spoofing.pt --imgsz 640 480 320
+"""
+
+import argparse
+import os
+import shutil
+from typing import Dict, List, Optional
+
+import numpy as np
+from ultralytics import YOLO
+
+from training.common import load_split_images, measure_latency
+
+# name -> Ultralytics export arguments
+VARIANTS: Dict[str, Optional[dict]] = {
+    "pytorch": None,  # the checkpoint itself
+    "onnx": {"format": "onnx", "half": False, "dynamic": True, "simplify": True},
+    "onnx-fp16": {"format": "onnx", "half": True, "dynamic": True, "simplify": True},
+    "torchscript": {"format": "torchscript", "half": False},
+    "openvino": {"format": "openvino", "half": False},
+    "openvino-fp16": {"format": "openvino", "half": True},
+}
+DEFAULT_VARIANTS = ["pytorch", "onnx", "onnx-fp16", "torchscript", "openvino", "openvino-fp16"]
+# Formats whose FP16 export needs a CUDA device; on CPU Ultralytics silently exports FP32
+FP16_NEEDS_CUDA = ("onnx",)
+
+
+def precision_skip_reason(variant: str, device: Optional[str] = None) -> Optional[str]:
+    """Why `variant` cannot be exported at its precision with `device`, or None."""
+    import torch
+
+    spec = VARIANTS[variant]
+    if not spec or not spec.get("half") or spec["format"] not in FP16_NEEDS_CUDA:
+        return None
+    if torch.cuda.is_available() and str(device).lower() != "cpu":
+        return None
+    return f"FP16 {spec['format']} export needs a CUDA device; it would be FP32"
+
+
+def export_variant(
+    source: str, variant: str, imgsz: int, output_dir: str, device: Optional[str] = None
+) -> str:
+    """
+    Export one variant and move it to `output_dir` under a unique name.
+
+    Returns:
+        Path of the artifact
+    """
+    spec = VARIANTS[variant]
+    if spec is None:
+        return source
+
+    exported = str(YOLO(source).export(imgsz=imgsz, device=device, **spec)).rstrip("/\\")
+    stem = os.path.splitext(os.path.basename(source))[0]
+    name = f"{stem}_{imgsz}_{variant.replace('-', '_')}"
+    if spec["format"] == "openvino":
+        target = os.path.join(output_dir, f"{name}_openvino_model")
+    else:
+        target = os.path.join(output_dir, name + os.path.splitext(exported)[1])
+
+    os.makedirs(output_dir, exist_ok=True)
+    if os.path.isdir(target):
+        shutil.rmtree(target)
+    elif os.path.exists(target):
+        os.remove(target)
+    shutil.move(exported, target)
+    return target
+
+
+def detections(path: str, images, imgsz: int, conf: float) -> List[np.ndarray]:
+    """Per image (N, 6) arrays of x1, y1, x2, y2, confidence, class."""
+    from app.inference.model import ModelWrapper
+    from app.inference.preprocessor import preprocess_image
+
+    wrapper = ModelWrapper(path, imgsz=imgsz)
+    return [
+        wrapper.predict(preprocess_image(image), conf=conf)[0].astype(np.float64)
+        for image in images
+    ]
+
+
+def box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of (N, 4) and (M, 4) xyxy boxes."""
+    tl = np.maximum(a[:, None, :2], b[None, :, :2])
+    br = np.minimum(a[:, None, 2:4], b[None, :, 2:4])
+    inter = np.prod(np.clip(br - tl, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:4] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:4] - b[:, :2], axis=1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def compare_detections(
+    reference: List[np.ndarray],
+    candidate: List[np.ndarray],
+    conf: float,
+    conf_tol: float = 0.05,
+    min_iou: float = 0.9,
+) -> dict:
+    """
+    Match candidate detections to the reference ones, greedily by confidence.
+
+    Returns:
+        Dict with passed, max_conf_diff, min_iou, matched and mismatched counts
+    """
+    conf_diffs, ious, matched, mismatched = [0.0], [1.0], 0, 0
+    for ref, cand in zip(reference, candidate):
+        used = np.zeros(len(cand), dtype=bool)
+        iou = box_iou(ref, cand) if len(ref) and len(cand) else np.zeros((len(ref), len(cand)))
+        for i in np.argsort(-ref[:, 4]):
+            same = (cand[:, 5] == ref[i, 5]) & ~used
+            scores = np.where(same, iou[i], 0.0)
+            j = int(np.argmax(scores)) if len(cand) else -1
+            if j >= 0 and scores[j] >= min_iou:
+                used[j] = True
+                matched += 1
+                conf_diffs.append(abs(ref[i, 4] - cand[j, 4]))
+                ious.append(scores[j])
+            elif ref[i, 4] >= conf + conf_tol:
+                mismatched += 1
+        # Unmatched candidates are only tolerated near the threshold too.
+        mismatched += int(np.sum(~used & (cand[:, 4] >= conf + conf_tol)))
+
+    max_conf_diff = float(max(conf_diffs))
+    return {
+        "passed": mismatched == 0 and max_conf_diff <= conf_tol,
+        "max_conf_diff": max_conf_diff,
+        "min_iou": float(min(ious)),
+        "matched": matched,
+        "mismatched": mismatched,
+    }
+
+
+def export_matrix(
+    source: str,
+    data_yaml: str,
+    sizes: List[int],
+    variants: List[str] = DEFAULT_VARIANTS,
+    output_dir: Optional[str] = None,
+    manifest_path: Optional[str] = None,
+    reference_imgsz: Optional[int] = None,
+    conf: Optional[float] = None,
+    conf_tol: float = 0.05,
+    min_iou: float = 0.9,
+    runs: int = 50,
+    device: Optional[str] = None,
+) -> dict:
+    """
+    Export, check and benchmark every variant x size, then write the manifest.
+
+    Returns:
+        The manifest dict
+    """
+    from app.core.config import settings
+    from app.inference.autotune import configure_runtime, host_fingerprint
+    from app.inference.manifest import write_manifest
+
+    model_dir = os.path.dirname(os.path.abspath(source))
+    output_dir = output_dir or os.path.join(model_dir, "exports")
+    manifest_path = manifest_path or os.path.join(model_dir, "export_manifest.json")
+    conf = settings.CONFIDENCE_THRESHOLD if conf is None else conf
+
+    runtime = configure_runtime()
+    _, images = load_split_images(data_yaml)
+    if not images:
+        raise ValueError(f"No test images found for {data_yaml}")
+
+    if reference_imgsz is None:
+        train_args = (YOLO(source).ckpt or {}).get("train_args") or {}
+        reference_imgsz = int(train_args.get("imgsz") or 640)
+    reference = detections(source, images, reference_imgsz, conf)
+    print(f"Reference: {source} at imgsz={reference_imgsz}, {runtime.torch_threads} torch threads")
+
+    artifacts = []
+    for imgsz in sizes:
+        for variant in variants:
+            spec = VARIANTS[variant]
+            entry = {
+                "variant": variant,
+                "imgsz": imgsz,
+                "path": source,
+                "precision": "fp16" if spec and spec.get("half") else "fp32",
+            }
+            reason = precision_skip_reason(variant, device)
+            if reason:
+                print(f"Skipping {variant} at imgsz={imgsz}: {reason}")
+                entry["status"] = "skipped"
+                entry["error"] = reason
+                artifacts.append(entry)
+                continue
+            try:
+                entry["path"] = export_variant(source, variant, imgsz, output_dir, device)
+                entry["parity"] = compare_detections(
+                    reference, detections(entry["path"], images, imgsz, conf), conf, conf_tol, min_iou
+                )
+                entry["latency"] = measure_latency(entry["path"], images, imgsz=imgsz, runs=runs)
+                entry["status"] = "ok"
+            except Exception as e:
+                entry["status"] = "failed"
+                entry["error"] = str(e)
+            artifacts.append(entry)
+
+    manifest = write_manifest(manifest_path, source, artifacts, host=host_fingerprint(source))
+
+    print(f"\n{'variant':<14} {'imgsz':>5} {'parity':>7} {'max dconf':>10} {'median ms':>10} {'p95 ms':>8}")
+    for a in artifacts:
+        if a["status"] != "ok":
+            print(f"{a['variant']:<14} {a['imgsz']:>5}  {a['status']}: {a['error'][:60]}")
+            continue
+        parity = a["parity"]
+        print(
+            f"{a['variant']:<14} {a['imgsz']:>5} {'pass' if parity['passed'] else 'FAIL':>7} "
+            f"{parity['max_conf_diff']:>10.4f} {a['latency']['median_ms']:>10.1f} "
+            f"{a['latency']['p95_ms']:>8.1f}"
+        )
+    print(f"Selected: {manifest['selected']}")
+    print(f"Manifest written to: {manifest_path}")
+    return manifest
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Export and benchmark model artifacts")
+    parser.add_argument("--model", type=str, default="model/anti_spoofing.pt")
+    parser.add_argument("--data", type=str, default="Dataset/SplitData/data.yaml")
+    parser.add_argument("--imgsz", type=int, nargs="+", default=[640], help="Export sizes")
+    parser.add_argument(
+        "--variants", nargs="+", default=DEFAULT_VARIANTS, choices=list(VARIANTS)
+    )
+    parser.add_argument("--output", type=str, default=None, help="Defaults to <model dir>/exports")
+    parser.add_argument("--manifest", type=str, default=None)
+    parser.add_argument(
+        "--reference-imgsz", type=int, default=None, help="Defaults to the trained size"
+    )
+    parser.add_argument("--conf", type=float, default=None, help="Defaults to CONFIDENCE_THRESHOLD")
+    parser.add_argument("--conf-tol", type=float, default=0.05)
+    parser.add_argument("--min-iou", type=float, default=0.9)
+    parser.add_argument("--runs", type=int, default=50, help="Timed predictions per artifact")
+    parser.add_argument("--device", type=str, default=None, help="Export device")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"Error: model not found: {args.model}")
+        return
+    if not os.path.exists(args.data):
+        print(f"Error: {args.data} not found. Please run split_data.py first.")
+        return
+
+    export_matrix(
+        args.model,
+        args.data,
+        args.imgsz,
+        variants=args.variants,
+        output_dir=args.output,
+        manifest_path=args.manifest,
+        reference_imgsz=args.reference_imgsz,
+        conf=args.conf,
+        conf_tol=args.conf_tol,
+        min_iou=args.min_iou,
+        runs=args.runs,
+        device=args.device,
+    )
+
+
+if __name__ == "__main__":
+    main()
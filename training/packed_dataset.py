@@ -0,0 +1,435 @@
+"""
+Packed, memory-mapped dataset format for YOLO training.
+
+Folder datasets cost one file open and one JPEG decode per sample per epoch,
+which dominates data loading on network-mounted storage. This module packs a
+split into a small set of files that can be memory-mapped:
+
+    <out>/meta.json          format version, image size, file names, shards
+    <out>/index.npy          int64 (N, 6): shard, offset, h, w, h0, w0
+    <out>/images_000.bin     raw uint8 BGR pixels, images back to back
+    <out>/labels.npy         float32 (M, 5): class, x, y, w, h (normalised)
+    <out>/label_offsets.npy  int64 (N + 1): labels of image i are rows [o[i], o[i+1])
+
+Images are stored already resized (long side = imgsz, aspect preserved), the
+same resize Ultralytics applies on load, so normalised labels are unchanged.
+`PackedYOLODataset` reads these shards in place of the folder and
+`PackedDetectionTrainer` makes Ultralytics use it for train and val.
+
+Examples:
+    python -m training.packed_dataset pack --data Dataset/SplitData/data.yaml --output Dataset/Packed
+    python -m training.packed_dataset bench --data Dataset/SplitData/data.yaml --packed Dataset/Packed/data.yaml
+    python -m training.train --data Dataset/Packed/data.yaml --packed
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+FORMAT_VERSION = 1
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def list_images(source: str) -> List[str]:
+    """Image paths from a folder or a YOLO file-list manifest."""
+    if os.path.isdir(source):
+        return sorted(
+            os.path.join(source, name)
+            for name in os.listdir(source)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, "r") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    return [line if os.path.isabs(line) else os.path.join(base, line) for line in lines]
+
+
+def label_path_for(image_path: str) -> str:
+    """Same rule as Ultralytics: `/images/` -> `/labels/`, extension -> `.txt`."""
+    sa, sb = f"{os.sep}images{os.sep}", f"{os.sep}labels{os.sep}"
+    return os.path.splitext(sb.join(image_path.rsplit(sa, 1)))[0] + ".txt"
+
+
+def read_labels(label_path: str) -> np.ndarray:
+    """YOLO label file as float32 (n, 5); empty if missing."""
+    try:
+        with open(label_path, "r") as f:
+            rows = [line.split()[:5] for line in f if line.strip()]
+    except FileNotFoundError:
+        rows = []
+    return np.array(rows, dtype=np.float32).reshape(-1, 5)
+
+
+def load_resized(image_path: str, imgsz: int) -> Tuple[Optional[np.ndarray], Tuple[int, int]]:
+    """Decode and resize so the long side equals imgsz (as Ultralytics does)."""
+    im = cv2.imread(image_path, cv2.IMREAD_COLOR)
+    if im is None:
+        return None, (0, 0)
+    h0, w0 = im.shape[:2]
+    r = imgsz / max(h0, w0)
+    if r != 1:
+        w, h = min(math.ceil(w0 * r), imgsz), min(math.ceil(h0 * r), imgsz)
+        im = cv2.resize(im, (w, h), interpolation=cv2.INTER_LINEAR)
+    return np.ascontiguousarray(im), (h0, w0)
+
+
+def pack_split(
+    source: str,
+    output: str,
+    imgsz: int = 640,
+    workers: int = 8,
+    shard_bytes: int = 4 << 30,
+) -> int:
+    """
+    Pack one split (image folder or manifest) into a shard set.
+
+    Args:
+        source: Folder of images or file-list manifest
+        output: Destination folder
+        imgsz: Long side of stored images
+        workers: Decode/resize threads
+        shard_bytes: Start a new shard file after this many bytes
+
+    Returns:
+        Number of images packed
+    """
+    os.makedirs(output, exist_ok=True)
+    images = list_images(source)
+
+    def load(path):
+        im, hw0 = load_resized(path, imgsz)
+        return path, im, hw0, read_labels(label_path_for(path))
+
+    index, labels, label_offsets, files, shards = [], [], [0], [], []
+    shard_file, shard_size = None, shard_bytes
+
+    def loaded(pool):
+        # pool.map would decode the whole split ahead of the writer; keep a
+        # bounded number of decoded images in flight instead
+        pending = deque()
+        todo = iter(images)
+        while True:
+            while len(pending) < workers * 4:
+                path = next(todo, None)
+                if path is None:
+                    break
+                pending.append(pool.submit(load, path))
+            if not pending:
+                return
+            yield pending.popleft().result()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for path, im, (h0, w0), lb in loaded(pool):
+            if im is None:
+                print(f"Skipping unreadable image: {path}")
+                continue
+            if shard_size + im.nbytes > shard_bytes and shard_size:
+                if shard_file is not None:
+                    shard_file.close()
+                shards.append(f"images_{len(shards):03d}.bin")
+                shard_file = open(os.path.join(output, shards[-1]), "wb")
+                shard_size = 0
+
+            h, w = im.shape[:2]
+            index.append((len(shards) - 1, shard_size, h, w, h0, w0))
+            shard_file.write(im.tobytes())
+            shard_size += im.nbytes
+
+            labels.append(lb)
+            label_offsets.append(label_offsets[-1] + len(lb))
+            files.append(os.path.basename(path))
+    if shard_file is not None:
+        shard_file.close()
+
+    np.save(os.path.join(output, "index.npy"), np.array(index, dtype=np.int64).reshape(-1, 6))
+    np.save(
+        os.path.join(output, "labels.npy"),
+        np.concatenate(labels) if labels else np.zeros((0, 5), np.float32),
+    )
+    np.save(os.path.join(output, "label_offsets.npy"), np.array(label_offsets, dtype=np.int64))
+    with open(os.path.join(output, "meta.json"), "w") as f:
+        json.dump(
+            {
+                "version": FORMAT_VERSION,
+                "imgsz": imgsz,
+                "count": len(files),
+                "files": files,
+                "shards": shards,
+            },
+            f,
+        )
+
+    elapsed = time.perf_counter() - start
+    print(f"Packed {len(files)} images from {source} in {elapsed:.1f}s -> {output}")
+    return len(files)
+
+
+def is_packed(path) -> bool:
+    """True if path is a packed shard set."""
+    return isinstance(path, str) and os.path.isfile(os.path.join(path, "meta.json"))
+
+
+class PackedShard:
+    """Random-access reader over a packed shard set.
+
+    Shard files are memory-mapped lazily, per process, so the reader can be
+    pickled cheaply into DataLoader workers.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported packed format in {path}")
+        self.index = np.load(os.path.join(path, "index.npy"))
+        self.labels = np.load(os.path.join(path, "labels.npy"))
+        self.label_offsets = np.load(os.path.join(path, "label_offsets.npy"))
+        self._maps = None
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_maps"] = None
+        return state
+
+    def image(self, i: int) -> np.ndarray:
+        """Read-only HWC uint8 view of image i (copy before modifying)."""
+        if self._maps is None:
+            self._maps = [
+                np.memmap(os.path.join(self.path, name), dtype=np.uint8, mode="r")
+                for name in self.meta["shards"]
+            ]
+        shard, offset, h, w = (int(v) for v in self.index[i, :4])
+        return self._maps[shard][offset : offset + h * w * 3].reshape(h, w, 3)
+
+    def image_labels(self, i: int) -> np.ndarray:
+        """(n, 5) labels of image i."""
+        return self.labels[self.label_offsets[i] : self.label_offsets[i + 1]]
+
+    def original_shape(self, i: int) -> Tuple[int, int]:
+        return int(self.index[i, 4]), int(self.index[i, 5])
+
+
+def _packed_dataset_class():
+    """Build the Ultralytics dataset subclass lazily (ultralytics import is heavy)."""
+    from ultralytics.data import YOLODataset
+
+    class PackedYOLODataset(YOLODataset):
+        """YOLODataset that reads images and labels from a packed shard set."""
+
+        def __init__(self, *args, **kwargs):
+            self.shard = PackedShard(kwargs.get("img_path", args[0] if args else None))
+            # Images are already resident in the page cache; RAM/disk caching is moot.
+            kwargs["cache"] = False
+            super().__init__(*args, **kwargs)
+
+        def get_img_files(self, img_path):
+            files = [os.path.join(self.shard.path, name) for name in self.shard.meta["files"]]
+            fraction = getattr(self, "fraction", 1.0)
+            if fraction < 1:
+                files = files[: round(len(files) * fraction)]
+            return files
+
+        def get_labels(self):
+            labels = []
+            for i, im_file in enumerate(self.im_files):
+                lb = self.shard.image_labels(i)
+                labels.append(
+                    {
+                        "im_file": im_file,
+                        "shape": self.shard.original_shape(i),
+                        "cls": lb[:, 0:1].copy(),
+                        "bboxes": lb[:, 1:].copy(),
+                        "segments": [],
+                        "keypoints": None,
+                        "normalized": True,
+                        "bbox_format": "xywh",
+                    }
+                )
+            return labels
+
+        def load_image(self, i, rect_mode=True, resize_short=False):
+            if self.ims[i] is not None:
+                return self.ims[i], self.im_hw0[i], self.im_hw[i]
+
+            im = np.array(self.shard.image(i))
+            h0, w0 = self.shard.original_shape(i)
+            h, w = im.shape[:2]
+            if rect_mode:
+                r = self.imgsz / max(h0, w0)
+                size = (min(math.ceil(w0 * r), self.imgsz), min(math.ceil(h0 * r), self.imgsz))
+                if size != (w, h):
+                    im = cv2.resize(im, size, interpolation=cv2.INTER_LINEAR)
+            elif not (h == w == self.imgsz):
+                im = cv2.resize(im, (self.imgsz, self.imgsz), interpolation=cv2.INTER_LINEAR)
+
+            # Keep the mosaic buffer behaviour of the base class.
+            if self.augment:
+                self.ims[i], self.im_hw0[i], self.im_hw[i] = im, (h0, w0), im.shape[:2]
+                self.buffer.append(i)
+                if 1 < len(self.buffer) >= self.max_buffer_length:
+                    j = self.buffer.pop(0)
+                    self.ims[j], self.im_hw0[j], self.im_hw[j] = None, None, None
+
+            return im, (h0, w0), im.shape[:2]
+
+    return PackedYOLODataset
+
+
+@contextmanager
+def _use_dataset_class(cls):
+    """Make Ultralytics' dataset builder construct `cls` instead of YOLODataset."""
+    from ultralytics.data import build as data_build
+
+    original = data_build.YOLODataset
+    data_build.YOLODataset = cls
+    try:
+        yield
+    finally:
+        data_build.YOLODataset = original
+
+
+def build_packed_dataset(cfg, img_path, batch, data, mode="train", rect=False, stride=32):
+    """Packed counterpart of `ultralytics.data.build_yolo_dataset`."""
+    from ultralytics.data import build_yolo_dataset
+
+    with _use_dataset_class(_packed_dataset_class()):
+        return build_yolo_dataset(cfg, img_path, batch, data, mode=mode, rect=rect, stride=stride)
+
+
+def packed_trainer_class():
+    """DetectionTrainer that builds packed datasets for packed split paths."""
+    from ultralytics.models.yolo.detect import DetectionTrainer
+
+    class PackedDetectionTrainer(DetectionTrainer):
+        def build_dataset(self, img_path, mode="train", batch=None):
+            if not is_packed(img_path):
+                return super().build_dataset(img_path, mode, batch)
+            model = self.model.module if hasattr(self.model, "module") else self.model
+            gs = max(int(model.stride.max() if model else 0), 32)
+            return build_packed_dataset(
+                self.args, img_path, batch, self.data, mode=mode, rect=mode == "val", stride=gs
+            )
+
+    return PackedDetectionTrainer
+
+
+def pack_dataset(data_yaml: str, output: str, imgsz: int = 640, workers: int = 8) -> str:
+    """
+    Pack every split listed in a data.yaml and write a matching data.yaml.
+
+    Returns:
+        Path of the packed data.yaml
+    """
+    import yaml
+
+    with open(data_yaml, "r") as f:
+        data = yaml.safe_load(f)
+    root = data.get("path") or os.path.dirname(os.path.abspath(data_yaml))
+    if not os.path.isabs(root):
+        root = os.path.join(os.path.dirname(os.path.abspath(data_yaml)), root)
+
+    packed = {"path": os.path.abspath(output)}
+    for split in ("train", "val", "test"):
+        if not data.get(split):
+            continue
+        source = data[split] if os.path.isabs(data[split]) else os.path.join(root, data[split])
+        pack_split(source, os.path.join(output, split), imgsz=imgsz, workers=workers)
+        packed[split] = split
+    packed["nc"] = data.get("nc", len(data["names"]))
+    packed["names"] = data["names"]
+
+    packed_yaml = os.path.join(output, "data.yaml")
+    with open(packed_yaml, "w") as f:
+        yaml.safe_dump(packed, f, sort_keys=False)
+    return packed_yaml
+
+
+def benchmark_loading(
+    data_yaml: str,
+    packed_yaml: str,
+    split: str = "train",
+    imgsz: int = 640,
+    batch: int = 16,
+    workers: int = 8,
+    max_batches: Optional[int] = None,
+) -> dict:
+    """
+    Time one epoch of augmented data loading in folder mode vs. packed mode.
+
+    Returns:
+        Dict of {"folder": {...}, "packed": {...}} with epoch_s and images_per_s
+    """
+    from ultralytics.cfg import get_cfg
+    from ultralytics.data import build_dataloader, build_yolo_dataset
+    from ultralytics.data.utils import check_det_dataset
+
+    cfg = get_cfg(overrides={"imgsz": imgsz, "task": "detect", "mode": "train"})
+    report = {}
+    for mode_name, yaml_path, builder in (
+        ("folder", data_yaml, build_yolo_dataset),
+        ("packed", packed_yaml, build_packed_dataset),
+    ):
+        data = check_det_dataset(yaml_path)
+        dataset = builder(cfg, data[split], batch, data, mode="train")
+        loader = build_dataloader(dataset, batch, workers, shuffle=True)
+
+        images = 0
+        start = time.perf_counter()
+        for n, item in enumerate(loader):
+            images += len(item["img"])
+            if max_batches is not None and n + 1 >= max_batches:
+                break
+        elapsed = time.perf_counter() - start
+        report[mode_name] = {"epoch_s": elapsed, "images": images, "images_per_s": images / elapsed}
+        print(f"{mode_name:>6}: {images} images in {elapsed:.1f}s ({images / elapsed:.1f} img/s)")
+
+    speedup = report["packed"]["images_per_s"] / report["folder"]["images_per_s"]
+    print(f"Packed speedup: {speedup:.2f}x")
+    return report
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Pack YOLO splits into memory-mapped shards")
+    parser.add_argument("command", choices=["pack", "bench"])
+    parser.add_argument("--data", type=str, default="Dataset/SplitData/data.yaml")
+    parser.add_argument("--output", type=str, default="Dataset/Packed")
+    parser.add_argument("--packed", type=str, default="Dataset/Packed/data.yaml")
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--split", type=str, default="train")
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "pack":
+        packed_yaml = pack_dataset(args.data, args.output, args.imgsz, args.workers)
+        print(f"Packed data.yaml written to: {packed_yaml}")
+    else:
+        benchmark_loading(
+            args.data,
+            args.packed,
+            split=args.split,
+            imgsz=args.imgsz,
+            batch=args.batch,
+            workers=args.workers,
+            max_batches=args.max_batches,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,451 @@
+"""
+Structured channel pruning for the anti-spoofing detector.
+
+Removes whole output channels from convolutions whose output is consumed by
+exactly one other convolution, so no concat/residual bookkeeping is needed:
+
+- the hidden conv of every Bottleneck (`cv1` -> `cv2`, the residual is on `cv2`)
+- the two stacked 3x3 convs of each Detect box/class branch
+
+Channels are ranked by BatchNorm |gamma|. A dropped channel's constant
+response `act(beta)` is folded into the consumer's bias/BN mean, so a freshly
+pruned model is already close to the original.
+
+Per-layer ratios are chosen by a greedy search against a CPU latency budget
+measured on this host: every unit is first profiled alone at each ratio
+(output error vs. the original on calibration images, and FLOPs saved), then
+the unit with the lowest error per FLOP saved is pruned one step further until
+the measured forward latency meets the budget. The pruned model is fine-tuned
+with the normal Ultralytics trainer and saved as a standard checkpoint
+(optionally ONNX) that `ModelWrapper` loads unchanged. `pruning_report.json`
+records the latency/accuracy trade-off.
+
+Example:
+    python -m training.prune --model model/anti_spoofing.pt --target-speedup 1.5 --epochs 30
+"""
+
+import argparse
+import json
+import os
+import time
+from copy import deepcopy
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import torch
+import torch.nn as nn
+from ultralytics import YOLO
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+@dataclass
+class PruneUnit:
+    """A producer conv whose output channels feed only `consumer`."""
+
+    name: str
+    producer: str
+    consumer: str
+    channels: int
+
+
+def _is_conv_bn(module: nn.Module) -> bool:
+    """Ultralytics `Conv` with an unfused BatchNorm and no grouping."""
+    return (
+        hasattr(module, "conv")
+        and isinstance(getattr(module, "bn", None), nn.BatchNorm2d)
+        and module.conv.groups == 1
+    )
+
+
+def _as_conv2d(module: nn.Module) -> Optional[nn.Conv2d]:
+    if isinstance(module, nn.Conv2d):
+        return module if module.groups == 1 else None
+    conv = getattr(module, "conv", None)
+    if isinstance(conv, nn.Conv2d) and conv.groups == 1:
+        return conv
+    return None
+
+
+def find_units(model: nn.Module) -> List[PruneUnit]:
+    """List prunable producer/consumer pairs of a detection model."""
+    units = []
+    for name, module in model.named_modules():
+        pairs = []
+        if type(module).__name__ == "Bottleneck":
+            pairs.append(("cv1", "cv2"))
+        elif isinstance(module, nn.Sequential) and name != "model":
+            # Detect branches: Conv -> Conv -> Conv2d. The top-level layer
+            # Sequential is excluded, its outputs may be reused by later layers.
+            children = [n for n, _ in module.named_children()]
+            pairs.extend(zip(children, children[1:]))
+
+        for prod_name, cons_name in pairs:
+            producer = module.get_submodule(prod_name)
+            consumer = module.get_submodule(cons_name)
+            if _is_conv_bn(producer) and _as_conv2d(consumer) is not None:
+                units.append(
+                    PruneUnit(
+                        name=f"{name}.{prod_name}",
+                        producer=f"{name}.{prod_name}",
+                        consumer=f"{name}.{cons_name}",
+                        channels=producer.conv.out_channels,
+                    )
+                )
+    return units
+
+
+def kept_channels(channels: int, ratio: float, divisor: int = 8) -> int:
+    """Channels left after pruning `ratio`, rounded to a SIMD-friendly multiple."""
+    if ratio <= 0:
+        return channels
+    if channels < 2 * divisor:
+        divisor = 1
+    keep = int(round(channels * (1 - ratio) / divisor)) * divisor
+    return min(channels, max(divisor, keep))
+
+
+def prune_unit(model: nn.Module, unit: PruneUnit, keep_count: int) -> None:
+    """Remove the lowest-|gamma| output channels of `unit` in place."""
+    producer = model.get_submodule(unit.producer)
+    consumer = model.get_submodule(unit.consumer)
+    consumer_conv = _as_conv2d(consumer)
+    channels = producer.conv.out_channels
+    if keep_count >= channels:
+        return
+
+    with torch.no_grad():
+        order = torch.argsort(producer.bn.weight.abs(), descending=True)
+        keep = order[:keep_count].sort().values
+        drop = order[keep_count:]
+
+        # A dropped channel outputs roughly act(beta) everywhere; fold that
+        # constant into whatever follows the consumer conv.
+        constant = producer.act(producer.bn.bias[drop])
+        shift = (consumer_conv.weight[:, drop].sum(dim=(2, 3)) * constant).sum(dim=1)
+        if isinstance(getattr(consumer, "bn", None), nn.BatchNorm2d):
+            consumer.bn.running_mean.sub_(shift)
+        elif consumer_conv.bias is not None:
+            consumer_conv.bias.add_(shift)
+
+        conv, bn = producer.conv, producer.bn
+        conv.weight = nn.Parameter(conv.weight[keep].clone())
+        if conv.bias is not None:
+            conv.bias = nn.Parameter(conv.bias[keep].clone())
+        conv.out_channels = keep_count
+        bn.weight = nn.Parameter(bn.weight[keep].clone())
+        bn.bias = nn.Parameter(bn.bias[keep].clone())
+        bn.running_mean = bn.running_mean[keep].clone()
+        bn.running_var = bn.running_var[keep].clone()
+        bn.num_features = keep_count
+
+        consumer_conv.weight = nn.Parameter(consumer_conv.weight[:, keep].clone())
+        consumer_conv.in_channels = keep_count
+
+
+def apply_ratios(model: nn.Module, units: List[PruneUnit], ratios: Dict[str, float]) -> nn.Module:
+    """Return a pruned copy of `model`; `ratios` maps unit name -> pruned fraction."""
+    pruned = deepcopy(model)
+    for unit in units:
+        ratio = ratios.get(unit.name, 0.0)
+        if ratio > 0:
+            prune_unit(pruned, unit, kept_channels(unit.channels, ratio))
+    return pruned
+
+
+def load_calibration(data_yaml: str, imgsz: int, count: int = 16) -> torch.Tensor:
+    """A small batch of training images, resized to imgsz x imgsz, as model input."""
+    from ultralytics.data.utils import check_det_dataset
+
+    data = check_det_dataset(data_yaml)
+    split_path = data["train"]
+    image_dir = split_path if os.path.isdir(split_path) else os.path.dirname(split_path)
+    names = sorted(n for n in os.listdir(image_dir) if n.lower().endswith(IMAGE_EXTENSIONS))
+    step = max(1, len(names) // count)
+    images = []
+    for name in names[::step][:count]:
+        image = cv2.imread(os.path.join(image_dir, name))
+        image = cv2.cvtColor(cv2.resize(image, (imgsz, imgsz)), cv2.COLOR_BGR2RGB)
+        images.append(image.transpose(2, 0, 1))
+    if not images:
+        raise ValueError(f"No calibration images found in {image_dir}")
+    return torch.from_numpy(np.stack(images)).float() / 255.0
+
+
+def _decoded(output) -> torch.Tensor:
+    return output[0] if isinstance(output, (tuple, list)) else output
+
+
+def evaluate(model: nn.Module, images: torch.Tensor, reference: Optional[torch.Tensor] = None):
+    """
+    Forward the calibration batch once.
+
+    Returns:
+        (decoded output, mean abs error vs. reference, GFLOPs per image)
+    """
+    flops = []
+
+    def hook(module, inputs, output):
+        flops.append(
+            2 * output.numel() * module.in_channels // module.groups * module.kernel_size[0]
+            * module.kernel_size[1]
+        )
+
+    handles = [m.register_forward_hook(hook) for m in model.modules() if isinstance(m, nn.Conv2d)]
+    try:
+        with torch.inference_mode():
+            output = _decoded(model.eval()(images)).float()
+    finally:
+        for handle in handles:
+            handle.remove()
+
+    error = 0.0
+    if reference is not None:
+        diff = (output - reference).abs()
+        diff[:, :4] /= images.shape[-1]  # boxes in pixels, scores in [0, 1]
+        error = float(diff.mean())
+    return output, error, sum(flops) / images.shape[0] / 1e9
+
+
+def forward_latency(model: nn.Module, imgsz: int, warmup: int = 5, runs: int = 30) -> float:
+    """Median batch-1 CPU forward latency in ms of a fused copy of `model`."""
+    fused = deepcopy(model).float().cpu().eval()
+    if hasattr(fused, "fuse"):
+        fused = fused.fuse(verbose=False)
+    x = torch.zeros(1, 3, imgsz, imgsz)
+    latencies = []
+    with torch.inference_mode():
+        for i in range(warmup + runs):
+            start = time.perf_counter()
+            fused(x)
+            if i >= warmup:
+                latencies.append((time.perf_counter() - start) * 1000)
+    return float(np.median(latencies))
+
+
+def search_ratios(
+    model: nn.Module,
+    units: List[PruneUnit],
+    images: torch.Tensor,
+    budget_ms: float,
+    imgsz: int,
+    steps: Tuple[float, ...] = (0.25, 0.5, 0.75),
+) -> Tuple[Dict[str, float], List[dict]]:
+    """
+    Greedy per-unit ratio search until forward latency <= `budget_ms`.
+
+    Returns:
+        (ratios per unit name, search history)
+    """
+    reference, _, base_gflops = evaluate(model, images)
+
+    # Single-unit sensitivity: error and FLOPs saved at every ratio.
+    profile = {}
+    for unit in units:
+        profile[unit.name] = {0.0: (0.0, 0.0)}
+        for ratio in steps:
+            _, error, gflops = evaluate(apply_ratios(model, units, {unit.name: ratio}), images, reference)
+            profile[unit.name][ratio] = (error, base_gflops - gflops)
+    print(f"Profiled {len(units)} units at ratios {list(steps)}")
+
+    ratios = {unit.name: 0.0 for unit in units}
+    latency = forward_latency(model, imgsz)
+    history = [{"latency_ms": latency, "gflops": base_gflops, "error": 0.0, "unit": None}]
+    print(f"Baseline latency {latency:.1f} ms, budget {budget_ms:.1f} ms")
+
+    while latency > budget_ms:
+        best, best_score = None, None
+        for name, current in ratios.items():
+            following = [r for r in steps if r > current]
+            if not following:
+                continue
+            error, saved = profile[name][following[0]]
+            prev_error, prev_saved = profile[name][current]
+            gain = saved - prev_saved
+            if gain <= 0:
+                continue
+            score = max(error - prev_error, 0.0) / gain
+            if best_score is None or score < best_score:
+                best, best_score = (name, following[0]), score
+        if best is None:
+            print("Budget not reachable with the allowed ratios, stopping at the maximum")
+            break
+
+        ratios[best[0]] = best[1]
+        pruned = apply_ratios(model, units, ratios)
+        _, error, gflops = evaluate(pruned, images, reference)
+        latency = forward_latency(pruned, imgsz)
+        history.append({"latency_ms": latency, "gflops": gflops, "error": error, "unit": best[0]})
+        print(f"  {best[0]} -> {best[1]:.2f}: {latency:.1f} ms, {gflops:.2f} GFLOPs, error {error:.4f}")
+
+    return {name: r for name, r in ratios.items() if r > 0}, history
+
+
+def pruned_trainer_class():
+    """DetectionTrainer that fine-tunes the given (pruned) model as-is."""
+    from ultralytics.models.yolo.detect import DetectionTrainer
+
+    class PrunedDetectionTrainer(DetectionTrainer):
+        def get_model(self, cfg=None, weights=None, verbose=True):
+            # The default rebuilds from the yaml and copies matching weights,
+            # which would silently undo the pruning.
+            if not isinstance(weights, nn.Module):
+                raise ValueError("Pruned fine-tuning needs a loaded pruned model")
+            return weights
+
+    return PrunedDetectionTrainer
+
+
+def save_checkpoint(model: nn.Module, path: str, train_args: dict) -> str:
+    """Save `model` in the Ultralytics checkpoint layout the serving code loads."""
+    from ultralytics import __version__
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    torch.save(
+        {
+            "model": deepcopy(model).half(),
+            "train_args": train_args,
+            "date": datetime.now().isoformat(),
+            "version": __version__,
+        },
+        path,
+    )
+    return path
+
+
+def validate(path: str, data_yaml: str, imgsz: int) -> dict:
+    """mAP/precision/recall on the test split (val if there is none)."""
+    from ultralytics.data.utils import check_det_dataset
+
+    split = "test" if check_det_dataset(data_yaml).get("test") else "val"
+    metrics = YOLO(path).val(data=data_yaml, split=split, imgsz=imgsz, verbose=False)
+    return {
+        "map50": float(metrics.box.map50),
+        "map50_95": float(metrics.box.map),
+        "precision": float(metrics.box.mp),
+        "recall": float(metrics.box.mr),
+    }
+
+
+def count_parameters(model: nn.Module) -> int:
+    return sum(p.numel() for p in model.parameters())
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Prune and fine-tune the anti-spoofing model")
+    parser.add_argument("--model", type=str, default="model/anti_spoofing.pt")
+    parser.add_argument("--data", type=str, default="Dataset/SplitData/data.yaml")
+    parser.add_argument("--imgsz", type=int, default=None, help="Defaults to the trained size")
+    parser.add_argument("--latency-ms", type=float, default=None, help="CPU forward latency budget")
+    parser.add_argument(
+        "--target-speedup", type=float, default=1.5, help="Budget as baseline / speedup"
+    )
+    parser.add_argument("--max-ratio", type=float, default=0.75)
+    parser.add_argument("--calib-images", type=int, default=16)
+    parser.add_argument("--epochs", type=int, default=30, help="Fine-tuning epochs (0 to skip)")
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--device", type=str, default=None)
+    parser.add_argument("--onnx", action="store_true", help="Also export the result to ONNX")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        print(f"Error: {args.data} not found. Please run split_data.py first.")
+        return
+
+    from app.inference.autotune import configure_runtime
+
+    runtime = configure_runtime()
+    print(f"Measuring with {runtime.torch_threads} torch threads")
+
+    source = YOLO(args.model)
+    train_args = dict(source.ckpt.get("train_args", {})) if source.ckpt else {}
+    imgsz = args.imgsz or int(train_args.get("imgsz") or 640)
+    model = source.model.float().cpu().eval()
+
+    units = find_units(model)
+    if not units:
+        print("Error: no prunable layers found (is the checkpoint fused?)")
+        return
+    images = load_calibration(args.data, imgsz, args.calib_images)
+
+    baseline_ms = forward_latency(model, imgsz)
+    budget = args.latency_ms or baseline_ms / args.target_speedup
+    steps = tuple(r for r in (0.25, 0.5, 0.75, 0.875) if r <= args.max_ratio)
+    ratios, history = search_ratios(model, units, images, budget, imgsz, steps)
+    pruned = apply_ratios(model, units, ratios)
+
+    output_dir = os.path.join("runs", "prune")
+    pruned_path = save_checkpoint(pruned, os.path.join(output_dir, "pruned.pt"), train_args)
+    print(f"Pruned checkpoint saved at: {pruned_path}")
+
+    final_path = pruned_path
+    if args.epochs > 0:
+        print(f"Fine-tuning for {args.epochs} epochs...")
+        results = YOLO(pruned_path).train(
+            data=args.data,
+            epochs=args.epochs,
+            batch=args.batch,
+            imgsz=imgsz,
+            workers=args.workers,
+            device=args.device,
+            project="runs",
+            name="prune_finetune",
+            exist_ok=True,
+            trainer=pruned_trainer_class(),
+        )
+        final_path = f"{results.save_dir}/weights/best.pt"
+
+    stages = [("original", args.model), ("pruned", pruned_path)]
+    if final_path != pruned_path:
+        stages.append(("fine-tuned", final_path))
+
+    report = {
+        "model": args.model,
+        "imgsz": imgsz,
+        "budget_ms": budget,
+        "torch_threads": runtime.torch_threads,
+        "ratios": ratios,
+        "search": history,
+        "stages": {},
+    }
+    for stage, path in stages:
+        stage_model = YOLO(path).model.float().cpu().eval()
+        _, _, gflops = evaluate(stage_model, images[:1])
+        report["stages"][stage] = {
+            "path": path,
+            "params": count_parameters(stage_model),
+            "gflops": gflops,
+            "latency_ms": forward_latency(stage_model, imgsz),
+            **validate(path, args.data, imgsz),
+        }
+
+    print(f"\n{'stage':<11} {'params':>9} {'GFLOPs':>7} {'latency ms':>11} {'mAP50':>7} {'mAP50-95':>9}")
+    for stage, r in report["stages"].items():
+        print(
+            f"{stage:<11} {r['params']:>9,} {r['gflops']:>7.2f} {r['latency_ms']:>11.1f} "
+            f"{r['map50']:>7.3f} {r['map50_95']:>9.3f}"
+        )
+
+    if args.onnx:
+        onnx_path = YOLO(final_path).export(format="onnx", imgsz=imgsz)
+        report["onnx"] = str(onnx_path)
+        print(f"ONNX model exported to: {onnx_path}")
+
+    report_path = os.path.join(output_dir, "pruning_report.json")
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report saved at: {report_path}")
+    print(f"Deploy by copying {final_path} to model/anti_spoofing.pt")
+
+
+if __name__ == "__main__":
+    # For Windows multiprocessing
+    import multiprocessing
+
+    multiprocessing.freeze_support()
+    main()
@@ -1,91 +1,487 @@
 """
 Dataset splitting script for YOLO format.
-Ports code from transcript with automatic train/val/test split and data.yaml generation.
+Splits collected images + labels into train/val/test and generates data.yaml.
+
+Splits are deterministic (seeded) and stratified by class and collection
+session, so reruns produce the same assignment. Files are placed with
+hardlinks by default instead of copies; symlinks, parallel copies or YOLO
+file-list manifests (no files placed at all) are also available.
+
+The assignment is recorded in `<output>/splits.json`. With `--incremental`,
+existing assignments are kept and only newly collected files are placed,
+filling each stratum back towards the target ratios.
+
+Examples:
+    python -m training.split_data
+    python -m training.split_data --mode manifest --seed 1
+    python -m training.split_data --incremental
+    python -m training.split_data --groups Dataset/all/clusters.json
 """
 
+import argparse
+import json
 import os
 import random
 import shutil
-from itertools import islice
-
-outputFolderPath = "Dataset/SplitData"
-inputFolderPath = "Dataset/all"
-splitRatio = {"train": 0.7, "val": 0.2, "test": 0.1}
-classes = ["fake", "real"]
-
-try:
-    shutil.rmtree(outputFolderPath)
-except OSError as e:
-    os.mkdir(outputFolderPath)
-
-# --------  Directories to Create -----------
-os.makedirs(f"{outputFolderPath}/train/images", exist_ok=True)
-os.makedirs(f"{outputFolderPath}/train/labels", exist_ok=True)
-os.makedirs(f"{outputFolderPath}/val/images", exist_ok=True)
-os.makedirs(f"{outputFolderPath}/val/labels", exist_ok=True)
-os.makedirs(f"{outputFolderPath}/test/images", exist_ok=True)
-os.makedirs(f"{outputFolderPath}/test/labels", exist_ok=True)
-
-# --------  Get the Names  -----------
-listNames = os.listdir(inputFolderPath)
-
-uniqueNames = []
-for name in listNames:
-    uniqueNames.append(name.split(".")[0])
-uniqueNames = list(set(uniqueNames))
-
-# --------  Shuffle -----------
-random.shuffle(uniqueNames)
-
-# --------  Find the number of images for each folder -----------
-lenData = len(uniqueNames)
-lenTrain = int(lenData * splitRatio["train"])
-lenVal = int(lenData * splitRatio["val"])
-lenTest = int(lenData * splitRatio["test"])
-
-# --------  Put remaining images in Training -----------
-if lenData != lenTrain + lenTest + lenVal:
-    remaining = lenData - (lenTrain + lenTest + lenVal)
-    lenTrain += remaining
-
-# --------  Split the list -----------
-lengthToSplit = [lenTrain, lenVal, lenTest]
-Input = iter(uniqueNames)
-Output = [list(islice(Input, elem)) for elem in lengthToSplit]
-print(
-    f"Total Images:{lenData} \nSplit: {len(Output[0])} {len(Output[1])} {len(Output[2])}"
-)
-
-# --------  Copy the files  -----------
-
-sequence = ["train", "val", "test"]
-for i, out in enumerate(Output):
-    for fileName in out:
-        shutil.copy(
-            f"{inputFolderPath}/{fileName}.jpg",
-            f"{outputFolderPath}/{sequence[i]}/images/{fileName}.jpg",
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+SPLITS = ("train", "val", "test")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+MODES = ("hardlink", "symlink", "copy", "manifest")
+
+
+def scan_input(inputFolderPath: str) -> Dict[str, str]:
+    """
+    Find image/label pairs in the input folder.
+
+    Returns:
+        Mapping of file stem to image file name, for stems that have both an
+        image and a `.txt` label
+    """
+    images, labels = {}, set()
+    with os.scandir(inputFolderPath) as it:
+        for entry in it:
+            stem, ext = os.path.splitext(entry.name)
+            ext = ext.lower()
+            if ext in IMAGE_EXTENSIONS:
+                images[stem] = entry.name
+            elif ext == ".txt":
+                labels.add(stem)
+    return {stem: name for stem, name in images.items() if stem in labels}
+
+
+def read_class(label_path: str) -> str:
+    """Class ID of the first box in a label file ("none" if empty)."""
+    with open(label_path, "r") as f:
+        for line in f:
+            parts = line.split()
+            if parts:
+                return parts[0]
+    return "none"
+
+
+def session_of(stem: str) -> str:
+    """Collection session encoded as the file name prefix (`<session>_<n>`)."""
+    return stem.split("_", 1)[0] if "_" in stem else ""
+
+
+def stratum_keys(
+    inputFolderPath: str, stems: List[str], stratify: List[str], workers: int
+) -> Dict[str, Tuple[str, ...]]:
+    """
+    Compute the stratum of every stem.
+
+    Args:
+        inputFolderPath: Folder containing the label files
+        stems: Stems to classify
+        stratify: Any of "class" and "session"
+        workers: Threads used to read label files
+
+    Returns:
+        Mapping of stem to stratum key
+    """
+    classes = {}
+    if "class" in stratify:
+        paths = [os.path.join(inputFolderPath, f"{stem}.txt") for stem in stems]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            classes = dict(zip(stems, pool.map(read_class, paths, chunksize=256)))
+
+    keys = {}
+    for stem in stems:
+        key = []
+        if "class" in stratify:
+            key.append(classes[stem])
+        if "session" in stratify:
+            key.append(session_of(stem))
+        keys[stem] = tuple(key)
+    return keys
+
+
+def target_counts(total: int, splitRatio: Dict[str, float]) -> Dict[str, int]:
+    """Items per split for the whole dataset; the remainder goes to train."""
+    counts = {name: int(total * splitRatio[name]) for name in ("val", "test")}
+    counts["train"] = total - counts["val"] - counts["test"]
+    return counts
+
+
+def stratum_targets(
+    totals: Dict[Tuple[str, ...], int], splitRatio: Dict[str, float], seed: int
+) -> Dict[Tuple[str, ...], Dict[str, int]]:
+    """
+    Items per split for every stratum, adding up to the dataset-wide targets.
+
+    Each stratum gets the floor of its share; the items those floors leave
+    short of `target_counts` go one each to the strata with the largest
+    remainders (largest-remainder method), ties broken by a seeded shuffle.
+    Strata smaller than 1 / ratio (e.g. short capture sessions) thereby still
+    contribute val and test items instead of all going to train.
+
+    Args:
+        totals: Items (images) per stratum
+        splitRatio: Fraction per split
+        seed: Tie-break seed
+
+    Returns:
+        Mapping of stratum key to items per split
+    """
+    overall = target_counts(sum(totals.values()), splitRatio)
+    targets = {key: {"val": 0, "test": 0} for key in totals}
+    for name in ("val", "test"):
+        remainders = {}
+        for key, total in totals.items():
+            share = total * splitRatio[name]
+            targets[key][name] = min(int(share), total - targets[key]["val"])
+            remainders[key] = share - targets[key][name]
+        keys = sorted(totals)
+        random.Random(f"{seed}:{name}").shuffle(keys)
+        keys.sort(key=lambda k: -remainders[k])
+        short = overall[name] - sum(t[name] for t in targets.values())
+        for key in keys:
+            if short <= 0:
+                break
+            if targets[key]["val"] + targets[key]["test"] < totals[key]:
+                targets[key][name] += 1
+                short -= 1
+    for key, total in totals.items():
+        targets[key]["train"] = total - targets[key]["val"] - targets[key]["test"]
+    return targets
+
+
+def assign_splits(
+    strata: Dict[str, Tuple[str, ...]],
+    splitRatio: Dict[str, float],
+    seed: int,
+    existing: Optional[Dict[str, str]] = None,
+    weights: Optional[Dict[str, int]] = None,
+) -> Dict[str, str]:
+    """
+    Assign every stem to a split, deterministically for a given seed.
+
+    Existing assignments are preserved; new stems fill each stratum's
+    deficit towards its `stratum_targets` (val, then test, then train). Each new
+    stem goes to the first split it brings closer to its target, so a heavy
+    unit that would overshoot val or test goes to train.
+
+    Args:
+        strata: Mapping of stem to stratum key
+        splitRatio: Fraction per split
+        seed: Shuffle seed
+        existing: Previous assignments to keep (incremental mode)
+        weights: Images per stem when stems are groups (default 1), so the
+            ratios hold for images rather than groups
+
+    Returns:
+        Mapping of stem to split name
+    """
+    existing = existing or {}
+    weights = weights or {}
+    members = defaultdict(list)
+    for stem, key in strata.items():
+        members[key].append(stem)
+
+    targets = stratum_targets(
+        {key: sum(weights.get(s, 1) for s in stems) for key, stems in members.items()},
+        splitRatio,
+        seed,
+    )
+
+    assignment = {}
+    for key in sorted(members):
+        stems = sorted(members[key])
+        kept = [s for s in stems if s in existing]
+        new = [s for s in stems if s not in existing]
+        for stem in kept:
+            assignment[stem] = existing[stem]
+
+        random.Random(f"{seed}:{'/'.join(key)}").shuffle(new)
+
+        have = Counter()
+        for stem in kept:
+            have[existing[stem]] += weights.get(stem, 1)
+        want = targets[key]
+        for stem in new:
+            weight = weights.get(stem, 1)
+            # Closer to target iff the deficit is more than half the weight
+            name = next(
+                (n for n in ("val", "test") if 2 * (want[n] - have[n]) > weight), "train"
+            )
+            assignment[stem] = name
+            have[name] += weight
+
+    return assignment
+
+
+def place_file(src: str, dst: str, mode: str) -> None:
+    """Place one file by hardlink, symlink or copy (skips existing files)."""
+    if os.path.lexists(dst):
+        return
+    if mode == "hardlink":
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            # Cross-device or unsupported filesystem: fall back to copying.
+            pass
+    elif mode == "symlink":
+        os.symlink(os.path.abspath(src), dst)
+        return
+    shutil.copy2(src, dst)
+
+
+def remove_placed(outputFolderPath: str, split: str, stem: str, image_name: str) -> None:
+    """Remove a previously placed image/label pair."""
+    for path in (
+        f"{outputFolderPath}/{split}/images/{image_name}",
+        f"{outputFolderPath}/{split}/labels/{stem}.txt",
+    ):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def write_manifests(
+    outputFolderPath: str,
+    inputFolderPath: str,
+    images: Dict[str, str],
+    assignment: Dict[str, str],
+) -> None:
+    """
+    Write YOLO file-list manifests (`<split>.txt`) pointing at the input files.
+    Ultralytics finds each label next to its image when the path has no
+    `images/` component.
+    """
+    lists = defaultdict(list)
+    for stem in sorted(assignment):
+        lists[assignment[stem]].append(os.path.abspath(f"{inputFolderPath}/{images[stem]}"))
+    for split in SPLITS:
+        with open(f"{outputFolderPath}/{split}.txt", "w") as f:
+            f.writelines(f"{path}\n" for path in lists[split])
+
+
+def write_data_yaml(outputFolderPath: str, classes: List[str], mode: str) -> None:
+    """Write data.yaml, replacing any previous version."""
+    if mode == "manifest":
+        paths = {split: f"{split}.txt" for split in SPLITS}
+    else:
+        paths = {split: f"{split}/images" for split in SPLITS}
+
+    dataYaml = (
+        f"path: {os.path.abspath(outputFolderPath)}\n"
+        f"train: {paths['train']}\n"
+        f"val: {paths['val']}\n"
+        f"test: {paths['test']}\n"
+        f"\n"
+        f"nc: {len(classes)}\n"
+        f"names: {classes}\n"
+    )
+    with open(f"{outputFolderPath}/data.yaml", "w") as f:
+        f.write(dataYaml)
+
+
+def load_record(outputFolderPath: str) -> dict:
+    try:
+        with open(f"{outputFolderPath}/splits.json", "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def split_dataset(
+    inputFolderPath: str = "Dataset/all",
+    outputFolderPath: str = "Dataset/SplitData",
+    splitRatio: Dict[str, float] = None,
+    classes: List[str] = None,
+    seed: int = 0,
+    mode: str = "hardlink",
+    stratify: List[str] = None,
+    incremental: bool = False,
+    workers: int = 16,
+    groups: Optional[Dict[str, str]] = None,
+) -> Dict[str, str]:
+    """
+    Split a folder of YOLO image/label pairs.
+
+    Args:
+        inputFolderPath: Folder with `<stem>.jpg` + `<stem>.txt` pairs
+        outputFolderPath: Destination folder for splits and data.yaml
+        splitRatio: Fraction per split (train/val/test)
+        classes: Class names for data.yaml
+        seed: Shuffle seed
+        mode: hardlink, symlink, copy or manifest
+        stratify: Any of "class" and "session"
+        incremental: Keep previous assignments and only place new files
+        workers: Threads for label reads and file placement
+        groups: Optional mapping of stem to group ID; all stems of a group go
+            to the same split (e.g. near-duplicate clusters from
+            `dataset_index.py`), so near-identical frames cannot leak
+            between train and val
+
+    Returns:
+        Mapping of stem to split name
+    """
+    splitRatio = splitRatio or {"train": 0.7, "val": 0.2, "test": 0.1}
+    classes = classes or ["fake", "real"]
+    stratify = ["class", "session"] if stratify is None else stratify
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode: {mode}")
+
+    images = scan_input(inputFolderPath)
+    record = load_record(outputFolderPath)
+    previous = record.get("assignments", {})
+    if incremental and record.get("mode", mode) != mode:
+        raise ValueError(
+            f"Existing split uses mode '{record['mode']}'; rerun without --incremental"
         )
-        shutil.copy(
-            f"{inputFolderPath}/{fileName}.txt",
-            f"{outputFolderPath}/{sequence[i]}/labels/{fileName}.txt",
+
+    # --------  Start clean unless extending a previous split -----------
+    if not incremental:
+        for split in SPLITS:
+            shutil.rmtree(f"{outputFolderPath}/{split}", ignore_errors=True)
+        previous = {}
+    if mode != "manifest":
+        for split in SPLITS:
+            os.makedirs(f"{outputFolderPath}/{split}/images", exist_ok=True)
+            os.makedirs(f"{outputFolderPath}/{split}/labels", exist_ok=True)
+    os.makedirs(outputFolderPath, exist_ok=True)
+
+    # --------  Assign (a group is assigned as one unit) -----------
+    stems = sorted(images)
+    strata = stratum_keys(inputFolderPath, stems, stratify, workers)
+    if groups:
+        # Group IDs are prefixed with NUL so they can never equal a stem
+        unit_of = {stem: f"\0{groups[stem]}" if stem in groups else stem for stem in stems}
+        unit_strata = defaultdict(Counter)
+        for stem in stems:
+            unit_strata[unit_of[stem]][strata[stem]] += 1
+        # A group belongs to its most common stratum (ties: smallest key)
+        units = {
+            unit: max(sorted(counts), key=counts.get) for unit, counts in unit_strata.items()
+        }
+        weights = {unit: sum(counts.values()) for unit, counts in unit_strata.items()}
+        unit_previous = {unit_of[s]: split for s, split in previous.items() if s in unit_of}
+        unit_assignment = assign_splits(units, splitRatio, seed, unit_previous, weights)
+        assignment = {stem: unit_assignment[unit_of[stem]] for stem in stems}
+    else:
+        assignment = assign_splits(strata, splitRatio, seed, previous)
+
+    # --------  Place the files  -----------
+    if mode == "manifest":
+        write_manifests(outputFolderPath, inputFolderPath, images, assignment)
+    else:
+        placed_images = record.get("images", {})
+        for stem, split in previous.items():
+            # Removed from the input, or moved with its group.
+            if assignment.get(stem) != split:
+                remove_placed(outputFolderPath, split, stem, placed_images.get(stem, f"{stem}.jpg"))
+
+        jobs = []
+        for stem, split in assignment.items():
+            if previous.get(stem) == split:
+                continue
+            jobs.append(
+                (
+                    f"{inputFolderPath}/{images[stem]}",
+                    f"{outputFolderPath}/{split}/images/{images[stem]}",
+                )
+            )
+            jobs.append(
+                (
+                    f"{inputFolderPath}/{stem}.txt",
+                    f"{outputFolderPath}/{split}/labels/{stem}.txt",
+                )
+            )
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(lambda job: place_file(job[0], job[1], mode), jobs, chunksize=256))
+
+    counts = Counter(assignment.values())
+    new_count = sum(1 for stem in assignment if stem not in previous)
+    print(
+        f"Total Images:{len(assignment)} (new: {new_count}) \n"
+        f"Split: {counts['train']} {counts['val']} {counts['test']}"
+    )
+
+    with open(f"{outputFolderPath}/splits.json", "w") as f:
+        json.dump(
+            {
+                "seed": seed,
+                "mode": mode,
+                "ratios": splitRatio,
+                "stratify": stratify,
+                "images": {stem: images[stem] for stem in sorted(assignment)},
+                "assignments": dict(sorted(assignment.items())),
+            },
+            f,
         )
+    print("Split Process Completed...")
 
-print("Split Process Completed...")
+    # -------- Creating Data.yaml file  -----------
+    write_data_yaml(outputFolderPath, classes, mode)
+    print("Data.yaml file Created...")
 
+    return assignment
 
-# -------- Creating Data.yaml file  -----------
 
-dataYaml = f"path: ../Data\n\
-train: ../train/images\n\
-val: ../val/images\n\
-test: ../test/images\n\
-\n\
-nc: {len(classes)}\n\
-names: {classes}"
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Split a YOLO dataset into train/val/test")
+    parser.add_argument("--input", type=str, default="Dataset/all")
+    parser.add_argument("--output", type=str, default="Dataset/SplitData")
+    parser.add_argument(
+        "--ratios",
+        type=float,
+        nargs=3,
+        default=[0.7, 0.2, 0.1],
+        metavar=("TRAIN", "VAL", "TEST"),
+    )
+    parser.add_argument("--classes", type=str, nargs="+", default=["fake", "real"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--mode",
+        type=str,
+        default="hardlink",
+        choices=MODES,
+        help="How files are placed; manifest writes file lists instead",
+    )
+    parser.add_argument(
+        "--stratify",
+        type=str,
+        nargs="*",
+        default=["class", "session"],
+        choices=["class", "session"],
+    )
+    parser.add_argument(
+        "--incremental", action="store_true", help="Only place newly collected files"
+    )
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument(
+        "--groups",
+        type=str,
+        default=None,
+        help="clusters.json from dataset_index.py; keeps each cluster in one split",
+    )
 
+    args = parser.parse_args()
+    groups = None
+    if args.groups:
+        with open(args.groups, "r") as f:
+            groups = json.load(f)["groups"]
+    train, val, test = args.ratios
+    split_dataset(
+        inputFolderPath=args.input,
+        outputFolderPath=args.output,
+        splitRatio={"train": train, "val": val, "test": test},
+        classes=args.classes,
+        seed=args.seed,
+        mode=args.mode,
+        stratify=args.stratify,
+        incremental=args.incremental,
+        workers=args.workers,
+        groups=groups,
+    )
 
-f = open(f"{outputFolderPath}/data.yaml", "a")
-f.write(dataYaml)
-f.close()
 
-print("Data.yaml file Created...")
+if __name__ == "__main__":
+    main()
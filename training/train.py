@@ -1,54 +1,98 @@
 """
 YOLOv8 training script for anti-spoofing detection.
 Supports both offline and online (Colab) training.
+
+Pass `--packed` with the data.yaml written by `packed_dataset.py pack` to read
+memory-mapped shards instead of image folders.
 """
 
+import argparse
 import os
+import time
 
 from ultralytics import YOLO
 
+from training.export_models import export_matrix
+from training.packed_dataset import packed_trainer_class
+
+
+def add_throughput_callbacks(model: YOLO, packed: bool = False) -> None:
+    """Print epoch time and training images/s at the end of every epoch."""
+    state = {}
+    mode = "packed" if packed else "folder"
+
+    def on_train_epoch_start(trainer):
+        state["start"] = time.perf_counter()
+
+    def on_train_epoch_end(trainer):
+        elapsed = time.perf_counter() - state["start"]
+        images = len(trainer.train_loader.dataset)
+        print(
+            f"Epoch {trainer.epoch + 1}: {elapsed:.1f}s, {images / elapsed:.1f} img/s "
+            f"({mode} mode)"
+        )
+
+    model.add_callback("on_train_epoch_start", on_train_epoch_start)
+    model.add_callback("on_train_epoch_end", on_train_epoch_end)
+
 
 def main():
     """Main training function."""
-    # Configuration
-    model_name = "yolov8n.pt"  # or 'yolov8l.pt' for large
-    data_yaml = "Dataset/SplitData/data.yaml"
-    epochs = 300
-    patience = 25
-    batch_size = 16
-    imgsz = 640
+    parser = argparse.ArgumentParser(description="Train the anti-spoofing YOLO model")
+    parser.add_argument("--model", type=str, default="yolov8n.pt", help="or 'yolov8l.pt' for large")
+    parser.add_argument("--data", type=str, default="Dataset/SplitData/data.yaml")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--patience", type=int, default=25)
+    parser.add_argument("--batch", type=int, default=16)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--workers", type=int, default=8, help="Dataloader workers")
+    parser.add_argument(
+        "--device", type=str, default=None, help="Use GPU if available, else CPU"
+    )
+    parser.add_argument(
+        "--packed", action="store_true", help="--data points at a packed dataset"
+    )
+    parser.add_argument(
+        "--export",
+        action="store_true",
+        help="Export, check and benchmark artifacts of best.pt (see export_models.py)",
+    )
+    args = parser.parse_args()
 
     # Check if data.yaml exists
+    data_yaml = args.data
     if not os.path.exists(data_yaml):
         print(f"Error: {data_yaml} not found. Please run split_data.py first.")
         return
 
     # Load model
-    print(f"Loading model: {model_name}")
-    model = YOLO(model_name)
+    print(f"Loading model: {args.model}")
+    model = YOLO(args.model)
+    add_throughput_callbacks(model, packed=args.packed)
 
     # Train
-    print(f"Starting training with {epochs} epochs...")
+    print(f"Starting training with {args.epochs} epochs...")
     results = model.train(
         data=data_yaml,
-        epochs=epochs,
-        patience=patience,
-        batch=batch_size,
-        imgsz=imgsz,
-        device=0,  # Use GPU if available, else CPU
+        epochs=args.epochs,
+        patience=args.patience,
+        batch=args.batch,
+        imgsz=args.imgsz,
+        workers=args.workers,
+        device=args.device,
         project="runs",
         name="anti_spoofing",
         exist_ok=True,
+        trainer=packed_trainer_class() if args.packed else None,
     )
 
     print("Training completed!")
     print(f"Best model saved at: {results.save_dir}/weights/best.pt")
 
-    # Export to ONNX (optional)
-    export_onnx = input("Export to ONNX? (y/n): ").lower() == "y"
-    if export_onnx:
-        model.export(format="onnx", imgsz=imgsz)
-        print(f"ONNX model exported to: {results.save_dir}/weights/best.onnx")
+    if args.export and args.packed:
+        print("Export parity checks need image folders, run export_models.py with the folder data.yaml")
+    elif args.export:
+        export_matrix(f"{results.save_dir}/weights/best.pt", data_yaml, [args.imgsz])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,346 @@
+"""
+Train and benchmark the crop-level liveness classifier (serving crop mode).
+
+Commands:
+
+- `build`: cut a square crop around every labelled face of each split in the
+  YOLO dataset (the serving `crop_faces`, so training and serving crops
+  match) into an image-classification folder tree:
+  `<out>/{train,val,test}/{fake,real}/<image>_<face>.jpg`.
+- `train`: build the crops if needed and train an Ultralytics classifier
+  (yolov8n-cls by default) on them at a low resolution such as 128 px.
+- `bench`: on the test split, compare the full-frame detector with crop mode
+  (localiser + classifier) and with the classifier on the labelled boxes
+  (which isolates classifier accuracy from localisation). Each runs one
+  frame at a time, as requests are served. Reports ms per image and per
+  labelled face, with APCER/BPCER/ACER from `evaluate.py`.
+
+Examples:
+    python -m training.train_crops train --data Dataset/SplitData/data.yaml --imgsz 128
+    python -m training.train_crops bench --detector model/anti_spoofing.pt \\
+        --classifier runs/crops/weights/best.pt
+"""
+
+import argparse
+import json
+import os
+import shutil
+import time
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from training.evaluate import (
+    DEFAULT_THRESHOLDS,
+    _load,
+    match_faces,
+    read_labels,
+    report_thresholds,
+    score,
+    split_files,
+)
+
+SPLITS = ("train", "val", "test")
+
+
+def build_crops(data_yaml: str, out_dir: str, imgsz: int = 128, margin: float = 1.3) -> dict:
+    """
+    Write a crop of every labelled face, by split and class.
+
+    Returns:
+        Crop counts per split and class
+    """
+    from app.inference.crops import crop_faces
+
+    counts = {}
+    for split in SPLITS:
+        try:
+            _, images, labels, names = split_files(data_yaml, split)
+        except KeyError:
+            continue
+        names = dict(enumerate(names)) if isinstance(names, list) else names
+        counts[split] = {str(n).lower(): 0 for n in names.values()}
+        for name in counts[split]:
+            os.makedirs(os.path.join(out_dir, split, name), exist_ok=True)
+        for image_path, label_path in zip(images, labels):
+            image = cv2.imread(image_path)
+            if image is None:
+                continue
+            faces = read_labels(label_path, image.shape[1], image.shape[0], names)
+            if not faces:
+                continue
+            crops = crop_faces(image, np.array([f[1:] for f in faces]), imgsz, margin)
+            stem = os.path.splitext(os.path.basename(image_path))[0]
+            for i, (face, crop) in enumerate(zip(faces, crops)):
+                cv2.imwrite(os.path.join(out_dir, split, face[0], f"{stem}_{i}.jpg"), crop)
+                counts[split][face[0]] += 1
+    if "train" not in counts:
+        raise ValueError(f"{data_yaml} has no train split")
+    return counts
+
+
+def train(
+    data_yaml: str,
+    out_dir: str,
+    model: str = "yolov8n-cls.pt",
+    imgsz: int = 128,
+    margin: float = 1.3,
+    epochs: int = 50,
+    batch: int = 64,
+    workers: int = 8,
+    device: Optional[str] = None,
+    rebuild: bool = False,
+) -> str:
+    """Build crops (unless present) and train the classifier. Returns best.pt."""
+    from ultralytics import YOLO
+
+    if rebuild and os.path.isdir(out_dir):
+        shutil.rmtree(out_dir)
+    if not os.path.isdir(os.path.join(out_dir, "train")):
+        print(f"Building {imgsz}px crops (margin {margin}) in {out_dir}...")
+        for split, per_class in build_crops(data_yaml, out_dir, imgsz, margin).items():
+            print(f"  {split}: " + ", ".join(f"{n} {c}" for n, c in per_class.items()))
+
+    classifier = YOLO(model)
+    results = classifier.train(
+        data=out_dir,
+        imgsz=imgsz,
+        epochs=epochs,
+        batch=batch,
+        workers=workers,
+        device=device,
+        project="runs",
+        name="crops",
+        exist_ok=True,
+        # Flips and colour jitter only: crops are already centred on the face
+        fliplr=0.5,
+        erasing=0.0,
+        auto_augment=None,
+    )
+    return f"{results.save_dir}/weights/best.pt"
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def benchmark(
+    detector_path: str,
+    classifier_path: str,
+    data_yaml: str,
+    split: Optional[str] = None,
+    detector_imgsz: Optional[int] = None,
+    localiser: str = "detector",
+    localiser_path: Optional[str] = None,
+    localiser_imgsz: int = 256,
+    localiser_conf: float = 0.25,
+    margin: float = 1.3,
+    thresholds: List[float] = DEFAULT_THRESHOLDS,
+    min_iou: float = 0.5,
+    limit: Optional[int] = None,
+) -> dict:
+    """
+    Compare the detector, crop mode and the classifier on labelled boxes.
+
+    Returns:
+        Report dict with latency and accuracy per mode
+    """
+    from app.core.config import settings
+    from app.inference.autotune import configure_runtime
+    from app.inference.crops import (
+        CropClassifier,
+        CropPipeline,
+        DetectorLocaliser,
+        HaarLocaliser,
+    )
+    from app.inference.model import ModelWrapper
+    from app.inference.postprocessor import postprocess_results
+
+    runtime = configure_runtime()
+    split, images, labels, names = split_files(data_yaml, split)
+    if limit:
+        images, labels = images[:limit], labels[:limit]
+    if not images:
+        raise ValueError(f"No images in the {split} split of {data_yaml}")
+    names = dict(enumerate(names)) if isinstance(names, list) else names
+    frames = [_load(image, label, names)[:2] for image, label in zip(images, labels)]
+    face_count = sum(len(faces) for _, faces in frames)
+
+    detector = ModelWrapper(detector_path, imgsz=detector_imgsz)
+    if localiser == "haar":
+        locate = HaarLocaliser(settings.CROP_LOCALISER_WIDTH, settings.CROP_HAAR_BOX_SCALE)
+    else:
+        locate = DetectorLocaliser(localiser_path or detector_path, localiser_imgsz, localiser_conf)
+    pipeline = CropPipeline(CropClassifier(classifier_path), locate, margin=margin)
+
+    def run_detector(frame, faces):
+        results, ms = _timed(detector.predict, frame)
+        return results[0], {"detect": ms}
+
+    def run_crops(frame, faces):
+        boxes, localise_ms = _timed(pipeline.localise, frame)
+        result, classify_ms = _timed(pipeline.classify, frame, boxes)
+        return result, {"localise": localise_ms, "classify": classify_ms}
+
+    def run_labelled_boxes(frame, faces):
+        boxes = np.array([f[1:] for f in faces], dtype=np.float64).reshape(-1, 4)
+        result, classify_ms = _timed(pipeline.classify, frame, boxes)
+        return result, {"classify": classify_ms}
+
+    modes = {
+        "detector": run_detector,
+        "crops": run_crops,
+        "crops_labelled_boxes": run_labelled_boxes,
+    }
+    thresholds = report_thresholds(thresholds, settings.CONFIDENCE_THRESHOLD)
+    floor = thresholds[0]
+    report = {
+        "data": data_yaml,
+        "split": split,
+        "images": len(frames),
+        "faces": face_count,
+        "torch_threads": runtime.torch_threads,
+        "detector": {"model": detector_path, "imgsz": detector.imgsz},
+        "classifier": {"model": classifier_path, "imgsz": pipeline.classifier.imgsz},
+        "localiser": {
+            "type": localiser,
+            "imgsz": localiser_imgsz if localiser == "detector" else None,
+        },
+        "modes": {},
+    }
+    for mode, run in modes.items():
+        # Warm up so one-off initialisation is not counted
+        run(*frames[0])
+        det_rows, face_rows, stages = [], [], {}
+        for frame, faces in frames:
+            result, ms = run(frame, faces)
+            for stage, value in ms.items():
+                stages[stage] = stages.get(stage, 0.0) + value
+            detections = postprocess_results([result], confidence_threshold=floor)
+            dets, matched = match_faces(detections, faces, min_iou)
+            det_rows.extend(dets)
+            face_rows.extend(matched)
+        rows = score(det_rows, face_rows, thresholds)
+        scored = [r for r in rows if r["acer"] is not None]
+        total_ms = sum(stages.values())
+        report["modes"][mode] = {
+            "ms_per_image": total_ms / len(frames),
+            "ms_per_face": total_ms / face_count if face_count else None,
+            "stage_ms_per_image": {k: v / len(frames) for k, v in stages.items()},
+            "configured": next(r for r in rows if r["threshold"] == settings.CONFIDENCE_THRESHOLD),
+            "best": min(scored, key=lambda r: (r["acer"], -r["threshold"])) if scored else None,
+        }
+    return report
+
+
+def _fmt(value) -> str:
+    return f"{value:.3f}" if value is not None else "-"
+
+
+def print_benchmark(report: dict) -> None:
+    print(
+        f"\n{report['images']} images, {report['faces']} labelled faces ({report['split']} split), "
+        f"detector at {report['detector']['imgsz']}px, classifier at "
+        f"{report['classifier']['imgsz']}px, {report['localiser']['type']} localiser\n"
+    )
+    print(
+        f"{'mode':<22}{'ms/image':>10}{'ms/face':>10}   {'ACER@cfg':>9}{'APCER':>8}{'BPCER':>8}"
+        f"   {'best t':>7}{'ACER':>8}"
+    )
+    for mode, result in report["modes"].items():
+        configured, best = result["configured"], result["best"] or {}
+        print(
+            f"{mode:<22}{result['ms_per_image']:>10.1f}{result['ms_per_face'] or 0:>10.1f}   "
+            f"{_fmt(configured['acer']):>9}{_fmt(configured['apcer']):>8}"
+            f"{_fmt(configured['bpcer']):>8}   {best.get('threshold', '-'):>7}"
+            f"{_fmt(best.get('acer')):>8}"
+        )
+    for mode, result in report["modes"].items():
+        stages = ", ".join(f"{k} {v:.1f} ms" for k, v in result["stage_ms_per_image"].items())
+        print(f"  {mode}: {stages}")
+
+
+def main():
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(description="Crop-level liveness classifier")
+    parser.add_argument("command", choices=["build", "train", "bench"])
+    parser.add_argument("--data", type=str, default="Dataset/SplitData/data.yaml")
+    parser.add_argument("--crops", type=str, default="Dataset/Crops", help="Crop dataset dir")
+    parser.add_argument("--imgsz", type=int, default=128, help="Crop size (112-160 works well)")
+    parser.add_argument("--margin", type=float, default=1.3, help="Crop side / longer box side")
+    parser.add_argument("--model", type=str, default="yolov8n-cls.pt", help="Classifier to train")
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=8, help="Dataloader workers")
+    parser.add_argument("--device", type=str, default=None)
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild crops before training")
+    parser.add_argument("--detector", type=str, default="model/anti_spoofing.pt")
+    parser.add_argument("--detector-imgsz", type=int, default=None)
+    parser.add_argument("--classifier", type=str, default="runs/crops/weights/best.pt")
+    parser.add_argument("--localiser", choices=["detector", "haar"], default="detector")
+    parser.add_argument(
+        "--localiser-model", type=str, default=None, help="Detector for boxes (default --detector)"
+    )
+    parser.add_argument("--localiser-imgsz", type=int, default=256)
+    parser.add_argument("--split", type=str, default=None, help="Benchmark split (default test)")
+    parser.add_argument("--limit", type=int, default=None, help="Benchmark on the first N images")
+    parser.add_argument("--output", type=str, default="runs/crops/benchmark.json")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.data):
+        print(f"Error: {args.data} not found. Please run split_data.py first.")
+        return
+
+    if args.command == "build":
+        counts = build_crops(args.data, args.crops, args.imgsz, args.margin)
+        for split, per_class in counts.items():
+            print(f"{split}: " + ", ".join(f"{n} {c}" for n, c in per_class.items()))
+        print(f"Crops written to: {args.crops}")
+    elif args.command == "train":
+        best = train(
+            args.data,
+            args.crops,
+            model=args.model,
+            imgsz=args.imgsz,
+            margin=args.margin,
+            epochs=args.epochs,
+            batch=args.batch,
+            workers=args.workers,
+            device=args.device,
+            rebuild=args.rebuild,
+        )
+        print("Training completed!")
+        print(f"Best classifier saved at: {best}")
+        print(
+            f"Serve it with CROP_MODE_ENABLED=true CROP_CLASSIFIER_PATH={best} "
+            f"CROP_MARGIN={args.margin}"
+        )
+    else:
+        report = benchmark(
+            args.detector,
+            args.classifier,
+            args.data,
+            split=args.split,
+            detector_imgsz=args.detector_imgsz,
+            localiser=args.localiser,
+            localiser_path=args.localiser_model,
+            localiser_imgsz=args.localiser_imgsz,
+            margin=args.margin,
+            limit=args.limit,
+        )
+        print_benchmark(report)
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to: {args.output}")
+
+
+if __name__ == "__main__":
+    # For Windows multiprocessing
+    import multiprocessing
+
+    multiprocessing.freeze_support()
+    main()